@@ -1,7 +1,7 @@
-from flask import Flask, request, jsonify, send_from_directory, send_file
+from flask import Flask, request, jsonify, send_from_directory
+from flask.logging import default_handler
 from flask_pymongo import PyMongo
 from flask_cors import CORS
-from bson import ObjectId
 from datetime import datetime
 import os
 import json
@@ -9,30 +9,26 @@ import time
 import logging
 from logging.handlers import RotatingFileHandler
 from dotenv import load_dotenv
-from prometheus_client import Counter, Histogram, Gauge, generate_latest, CONTENT_TYPE_LATEST
+# Imported before prometheus_client: it decides whether metrics are shared across workers
+from services.metrics import endpoint_label, method_label, render_metrics
+from prometheus_client import Counter, Histogram, Gauge
+from services.admission import AdmissionController, EXEMPT, route_priority
+from services.cache import ResponseCache
+from services.compression import Compression, CompressionMiddleware
+from services.json_provider import MongoJSONProvider
+from services.leaderboards import Leaderboards
+from services.log_queue import start_queue_logging, RequestLogSampler
+from services.purge import Purger, start_purge_worker
+from services.review_queue import ReviewQueue, start_review_flusher
+from services.static_assets import SpaBuild
+from services.mongo_metrics import CommandMetricsListener, PoolMetricsListener, request_mongo_stats
 
 load_dotenv()
 
-static_url_path = os.getenv('STATIC_URL_PATH', '')
-app = Flask(__name__, static_folder='static', static_url_path=static_url_path)
-
-# Prometheus metrics
+# Prometheus metrics (aggregated across workers when PROMETHEUS_MULTIPROC_DIR is set)
 REQUEST_COUNT = Counter('flask_requests_total', 'Total Flask requests', ['method', 'endpoint', 'status'])
-REQUEST_DURATION = Histogram('flask_request_duration_seconds', 'Flask request duration')
-ACTIVE_CONNECTIONS = Gauge('flask_active_connections', 'Active Flask connections')
-DB_CONNECTIONS = Gauge('mongodb_connections_active', 'Active MongoDB connections')
-
-# MongoDB configuration
-MONGODB_URI = os.getenv('MONGODB_URI', 'mongodb://db:27017/restaurant_db')
-app.config['MONGO_URI'] = MONGODB_URI
-app.config['SECRET_KEY'] = os.getenv('SECRET_KEY', 'dev-secret-key')
-
-# Initialize MongoDB connection
-mongo = PyMongo(app)
-CORS(app)
-
-# Make mongo available globally
-app.mongo = mongo
+REQUEST_DURATION = Histogram('flask_request_duration_seconds', 'Flask request duration', ['method', 'endpoint'])
+ACTIVE_CONNECTIONS = Gauge('flask_active_connections', 'Active Flask connections', multiprocess_mode='livesum')
 
 # Configure structured logging for EFK stack
 class JsonFormatter(logging.Formatter):
@@ -56,113 +52,297 @@ class JsonFormatter(logging.Formatter):
             log_entry['status_code'] = record.status_code
         if hasattr(record, 'duration'):
             log_entry['duration_ms'] = record.duration
+        if hasattr(record, 'mongo_ms'):
+            log_entry['mongo_ms'] = record.mongo_ms
+            log_entry['mongo_commands'] = record.mongo_commands
+        if hasattr(record, 'sample_rate'):
+            log_entry['sample_rate'] = record.sample_rate
             
         return json.dumps(log_entry)
 
-# Setup JSON logging
-if not app.debug:
+def default_config():
+    """Settings read from the environment; create_app(config) overrides them"""
+    return {
+        'MONGO_URI': os.getenv('MONGODB_URI', 'mongodb://db:27017/restaurant_db'),
+        'SECRET_KEY': os.getenv('SECRET_KEY', 'dev-secret-key'),
+        'STATIC_URL_PATH': os.getenv('STATIC_URL_PATH', ''),
+        'RESPONSE_CACHE_SIZE': int(os.getenv('RESPONSE_CACHE_SIZE', '1024')),
+        'RESPONSE_CACHE_TTL': float(os.getenv('RESPONSE_CACHE_TTL', '30')),
+        'REVIEW_EMBED_LIMIT': int(os.getenv('REVIEW_EMBED_LIMIT', '20')),
+        'LEADERBOARD_SIZE': int(os.getenv('LEADERBOARD_SIZE', '50')),
+        'LEADERBOARD_PRIOR_MEAN': float(os.getenv('LEADERBOARD_PRIOR_MEAN', '3.5')),
+        'LEADERBOARD_PRIOR_WEIGHT': float(os.getenv('LEADERBOARD_PRIOR_WEIGHT', '10')),
+        'LEADERBOARD_MIN_REVIEWS': int(os.getenv('LEADERBOARD_MIN_REVIEWS', '1')),
+        'PURGE_ENABLED': os.getenv('PURGE_ENABLED', 'true').lower() in ('1', 'true', 'yes'),
+        'PURGE_BATCH_SIZE': int(os.getenv('PURGE_BATCH_SIZE', '500')),
+        'PURGE_PAUSE': float(os.getenv('PURGE_PAUSE', '0.1')),
+        'PURGE_LEASE': float(os.getenv('PURGE_LEASE', '60')),
+        'PURGE_POLL_INTERVAL': float(os.getenv('PURGE_POLL_INTERVAL', '30')),
+        'REVIEW_WRITE_BEHIND': os.getenv('REVIEW_WRITE_BEHIND', 'false').lower() in ('1', 'true', 'yes'),
+        'REVIEW_QUEUE_SIZE': int(os.getenv('REVIEW_QUEUE_SIZE', '10000')),
+        'REVIEW_BATCH_SIZE': int(os.getenv('REVIEW_BATCH_SIZE', '500')),
+        'REVIEW_FLUSH_INTERVAL': float(os.getenv('REVIEW_FLUSH_INTERVAL', '0.05')),
+        'REVIEW_SHUTDOWN_TIMEOUT': float(os.getenv('REVIEW_SHUTDOWN_TIMEOUT', '10')),
+        'REVIEW_RETRY_AFTER': int(os.getenv('REVIEW_RETRY_AFTER', '1')),
+        'COMPRESS_ENABLED': os.getenv('COMPRESS_ENABLED', 'true').lower() in ('1', 'true', 'yes'),
+        'COMPRESS_ENCODINGS': os.getenv('COMPRESS_ENCODINGS', 'br,zstd,gzip'),
+        'COMPRESS_MIN_SIZE': int(os.getenv('COMPRESS_MIN_SIZE', '1024')),
+        'COMPRESS_GZIP_LEVEL': int(os.getenv('COMPRESS_GZIP_LEVEL', '6')),
+        'COMPRESS_BR_QUALITY': int(os.getenv('COMPRESS_BR_QUALITY', '4')),
+        'COMPRESS_ZSTD_LEVEL': int(os.getenv('COMPRESS_ZSTD_LEVEL', '3')),
+        # Unset: derived from WORKER_CONCURRENCY, which gunicorn.conf.py exports
+        'ADMISSION_LIMIT': int(os.environ['ADMISSION_LIMIT']) if os.getenv('ADMISSION_LIMIT') else None,
+        'WORKER_CONCURRENCY': int(os.getenv('WORKER_CONCURRENCY', '0')),
+        'ADMISSION_QUEUE_SIZE': int(os.getenv('ADMISSION_QUEUE_SIZE', '100')),
+        'ADMISSION_QUEUE_TIMEOUT': float(os.getenv('ADMISSION_QUEUE_TIMEOUT', '1.0')),
+        'ADMISSION_RETRY_AFTER': int(os.getenv('ADMISSION_RETRY_AFTER', '1')),
+        'LOG_DIR': os.getenv('LOG_DIR', 'logs'),
+        'LOG_QUEUE_SIZE': int(os.getenv('LOG_QUEUE_SIZE', '10000')),
+        'LOG_SAMPLE_RATE': float(os.getenv('LOG_SAMPLE_RATE', '1.0')),
+        'LOG_SLOW_REQUEST_MS': float(os.getenv('LOG_SLOW_REQUEST_MS', '1000'))
+    }
+
+def create_app(config=None):
+    """
+    Build the Flask application.
+
+    Everything that holds sockets, files or threads (the Mongo client, the
+    log listener) is created here rather than at import time, so a
+    preforking server can call this once per worker after fork.
+    """
+    settings = default_config()
+    settings.update(config or {})
+    
+    # Static files are served from memory by register_routes, not Flask's static view
+    app = Flask(__name__, static_folder=None)
+    app.config.update(settings)
+    
+    # Initialize MongoDB connection; listeners export command latency and pool usage
+    app.mongo = PyMongo(app, event_listeners=[CommandMetricsListener(), PoolMetricsListener()])
+    CORS(app, expose_headers=['X-Next-Cursor', 'ETag', 'Retry-After'])
+    
+    # In-process cache of encoded GET responses, invalidated by writes
+    app.response_cache = ResponseCache(
+        'restaurants',
+        max_entries=app.config['RESPONSE_CACHE_SIZE'],
+        ttl=app.config['RESPONSE_CACHE_TTL']
+    )
+    
+    # Materialized top-rated boards per style, kept current by review/restaurant writes
+    app.leaderboards = Leaderboards.from_config(app.config)
+    
+    # Per-worker in-flight limit; list queries are shed before writes (0 disables)
+    app.admission = AdmissionController.from_config(app.config)
+    
+    # Encode ObjectId/datetime natively (orjson-backed when installed)
+    app.json = MongoJSONProvider(app)
+    
+    configure_logging(app)
+    register_middleware(app)
+    
+    # Deleted restaurants are tombstoned; their reviews are removed in the background
+    if app.config['PURGE_ENABLED'] and not app.testing:
+        start_purge_worker(
+            lambda: app.mongo.db,
+            Purger.from_config(app.config),
+            poll_interval=app.config['PURGE_POLL_INTERVAL'],
+            logger=app.logger
+        )
+    
+    # Import and register API blueprints
+    from routes.restaurants import restaurants_bp, record_review_writes
+    from routes.export import export_bp
+    from routes.leaderboards import leaderboards_bp
+    app.register_blueprint(restaurants_bp)
+    app.register_blueprint(export_bp)
+    app.register_blueprint(leaderboards_bp)
+    
+    register_routes(app)
+    
+    # Compress JSON/text responses for clients that accept it (streamed exports included)
+    compression = Compression.from_config(app.config)
+    if compression.enabled:
+        app.wsgi_app = CompressionMiddleware(app.wsgi_app, compression)
+    
+    # Opt-in write-behind for single reviews: accepted with 202, written in batches
+    app.review_queue = None
+    if app.config['REVIEW_WRITE_BEHIND']:
+        app.review_queue = ReviewQueue.from_config(app.config)
+        
+        def record_flushed(db, updated):
+            # The flusher thread has no request; cache and leaderboards need the app context
+            with app.app_context():
+                record_review_writes(db, updated)
+        
+        if not app.testing:
+            start_review_flusher(
+                lambda: app.mongo.db,
+                app.review_queue,
+                on_flush=record_flushed,
+                shutdown_timeout=app.config['REVIEW_SHUTDOWN_TIMEOUT'],
+                logger=app.logger
+            )
+    return app
+
+def configure_logging(app):
+    # Setup JSON logging
+    if app.debug or app.testing:
+        return
+    
+    # Flask's stderr handler moves behind the queue as well.
+    app.logger.removeHandler(default_handler)
+    start_json_logging(app.logger, app.config, default_handler)
+    app.logger.info('Application startup', extra={'event': 'startup'})
+
+def start_json_logging(logger, config, console_handler):
+    """Log `logger` as JSON to LOG_DIR/app.log and to `console_handler`"""
     # Create logs directory if it doesn't exist
-    os.makedirs('logs', exist_ok=True)
+    os.makedirs(config['LOG_DIR'], exist_ok=True)
     
     formatter = JsonFormatter()
-    handler = RotatingFileHandler('logs/app.log', maxBytes=10000000, backupCount=3)
+    handler = RotatingFileHandler(os.path.join(config['LOG_DIR'], 'app.log'), maxBytes=10000000, backupCount=3)
     handler.setFormatter(formatter)
     handler.setLevel(logging.INFO)
-    app.logger.addHandler(handler)
-    app.logger.setLevel(logging.INFO)
-    app.logger.info('Application startup', extra={'event': 'startup'})
+    # Records are queued and written by a background thread; a full queue drops them.
+    start_queue_logging(logger, [handler, console_handler], maxsize=config['LOG_QUEUE_SIZE'])
+    logger.setLevel(logging.INFO)
 
-# Monitoring middleware
-@app.before_request
-def before_request():
-    request.start_time = time.time()
-    ACTIVE_CONNECTIONS.inc()
-
-@app.after_request
-def after_request(response):
-    request_duration = time.time() - request.start_time
-    
-    REQUEST_COUNT.labels(
-        method=request.method,
-        endpoint=request.endpoint or 'unknown',
-        status=response.status_code
-    ).inc()
-    
-    REQUEST_DURATION.observe(request_duration)
-    ACTIVE_CONNECTIONS.dec()
-    
-    # Log request in JSON format
-    app.logger.info(
-        f'{request.method} {request.url} - {response.status_code}',
-        extra={
-            'method': request.method,
-            'url': request.url,
-            'status_code': response.status_code,
-            'duration': round(request_duration * 1000, 2),
-            'event': 'http_request'
-        }
+def register_middleware(app):
+    # Successful fast requests are logged at LOG_SAMPLE_RATE; errors and slow requests always
+    request_log_sampler = RequestLogSampler(
+        sample_rate=app.config['LOG_SAMPLE_RATE'],
+        slow_ms=app.config['LOG_SLOW_REQUEST_MS']
     )
     
-    return response
-
-# JSON encoder for ObjectId
-class JSONEncoder(json.JSONEncoder):
-    def default(self, obj):
-        if isinstance(obj, ObjectId):
-            return str(obj)
-        if isinstance(obj, datetime):
-            return obj.isoformat()
-        return super().default(obj)
-
-app.json_encoder = JSONEncoder
-
-# Import and register API blueprints
-from routes.restaurants import restaurants_bp
-app.register_blueprint(restaurants_bp)
-
-# Serve React App
-@app.route('/')
-def serve_react_app():
-    # Check if React build exists in the build directory
-    build_path = os.path.join(app.root_path, 'build', 'index.html')
-    if os.path.exists(build_path):
-        return send_file(build_path)
-    else:
-        # Fallback to API info if no React build
-        return jsonify({
-            'message': 'Restaurant SaaS API',
-            'version': '1.0',
-            'architecture': '3-tier: nginx -> flask -> mongodb',
-            'endpoints': {
-                'restaurants': '/api/restaurants',
-                'health': '/health'
-            },
-            'note': f'React frontend not found at {build_path}'
-        })
+    # Monitoring middleware
+    @app.before_request
+    def before_request():
+        request.start_time = time.time()
+        ACTIVE_CONNECTIONS.inc()
+        
+        # Shed load before any Mongo work; returning a response skips the view
+        priority = route_priority(request.endpoint)
+        if app.admission.enabled and priority != EXEMPT:
+            if not app.admission.acquire(priority):
+                return busy_response(app.admission.retry_after)
+            request.admitted = True
+    
+    @app.after_request
+    def release_admission_on_close(response):
+        # A streamed body (the exports) is produced after teardown; hold the slot until it is sent
+        if getattr(request, 'admitted', False):
+            request.admitted = False
+            response.call_on_close(app.admission.release)
+        return response
+    
+    @app.teardown_request
+    def release_admission(error=None):
+        # Only when no response took over the slot
+        if getattr(request, 'admitted', False):
+            app.admission.release()
+    
+    @app.after_request
+    def after_request(response):
+        request_duration = time.time() - request.start_time
+        
+        # Labels come from the route table, not the URL, to keep cardinality bounded
+        endpoint = endpoint_label(app, request)
+        method = method_label(request)
+        REQUEST_COUNT.labels(
+            method=method,
+            endpoint=endpoint,
+            status=response.status_code
+        ).inc()
+        
+        REQUEST_DURATION.labels(method=method, endpoint=endpoint).observe(request_duration)
+        ACTIVE_CONNECTIONS.dec()
+        
+        # Log request in JSON format
+        duration_ms = round(request_duration * 1000, 2)
+        if request_log_sampler.should_log(response.status_code, duration_ms):
+            mongo_ms, mongo_commands = request_mongo_stats()
+            app.logger.info(
+                f'{request.method} {request.url} - {response.status_code}',
+                extra={
+                    'method': request.method,
+                    'url': request.url,
+                    'status_code': response.status_code,
+                    'duration': duration_ms,
+                    'mongo_ms': mongo_ms,
+                    'mongo_commands': mongo_commands,
+                    'sample_rate': request_log_sampler.sample_rate,
+                    'event': 'http_request'
+                }
+            )
+        
+        return response
 
-@app.route('/<path:path>')
-def serve_react_static(path):
-    # If it's an API route, let it pass through to blueprints
-    if path.startswith('api/'):
-        return jsonify({"error": "API endpoint not found"}), 404
-    
-    
-    # For all other paths, serve React app (SPA routing)
-    build_path = os.path.join(app.root_path, 'build', 'index.html')
-    if os.path.exists(build_path):
-        return send_file(build_path)
-    else:
-        return serve_react_app()  # Fallback to root handler
+def busy_response(retry_after):
+    response = jsonify({'error': 'Server is busy, please retry later'})
+    response.status_code = 503
+    response.headers['Retry-After'] = str(retry_after)
+    return response
 
-# Prometheus metrics endpoint
-@app.route('/metrics')
-def metrics():
-    return generate_latest(), 200, {'Content-Type': CONTENT_TYPE_LATEST}
+def api_info(build_path):
+    """Root response when no React build is present"""
+    return {
+        'message': 'Restaurant SaaS API',
+        'version': '1.0',
+        'architecture': '3-tier: nginx -> flask -> mongodb',
+        'endpoints': {
+            'restaurants': '/api/restaurants',
+            'health': '/health'
+        },
+        'note': f'React frontend not found at {build_path}'
+    }
 
-# Health check
-@app.route('/health')
-def health_check():
-    return jsonify({'status': 'healthy', 'service': 'app'}), 200
+def register_routes(app):
+    # React build (or the API info fallback) loaded and precompressed once per worker
+    build_path = os.path.join(app.root_path, 'build')
+    spa = SpaBuild(
+        build_path,
+        app.config['STATIC_URL_PATH'],
+        fallback=app.json.response(api_info(os.path.join(build_path, 'index.html'))).get_data()
+    )
+    
+    def send_asset(asset):
+        status, body, headers = asset.response(request.accept_encodings, request.if_none_match)
+        return app.response_class(body, status=status, headers=headers)
+    
+    # Serve React App
+    @app.route('/')
+    def serve_react_app():
+        return send_asset(spa.index)
+    
+    @app.route('/<path:path>')
+    def serve_react_static(path):
+        # If it's an API route, let it pass through to blueprints
+        if path.startswith('api/'):
+            return jsonify({"error": "API endpoint not found"}), 404
+        
+        asset = spa.assets.get('/' + path)
+        if asset is not None:
+            return send_asset(asset)
+        
+        # Source maps and oversized build files are read from disk
+        static_file = spa.static_file('/' + path)
+        if static_file is not None:
+            return send_from_directory(spa.static_dir, static_file)
+        
+        # For all other paths, serve React app (SPA routing)
+        return send_asset(spa.index)
+    
+    # Prometheus metrics endpoint
+    @app.route('/metrics')
+    def metrics():
+        payload, content_type = render_metrics()
+        return payload, 200, {'Content-Type': content_type}
+    
+    # Health check
+    @app.route('/health')
+    def health_check():
+        return jsonify({'status': 'healthy', 'service': 'app'}), 200
 
 if __name__ == '__main__':
-    app.run(host='0.0.0.0', port=5000, debug=os.getenv('FLASK_ENV') == 'development')
\ No newline at end of file
+    # Flask development server; production runs gunicorn (see gunicorn.conf.py)
+    create_app().run(host='0.0.0.0', port=int(os.getenv('PORT', '5000')), debug=os.getenv('FLASK_ENV') == 'development')
@@ -0,0 +1,332 @@
+"""
+Async serving mode: the same API as app.py as an ASGI application on
+Starlette, backed by Motor. One event loop per worker serves many slow
+clients concurrently, with no thread held per connection.
+
+    gunicorn -c gunicorn.conf.py            # with SERVER_MODE=async
+    uvicorn --factory asgi:create_asgi_app  # single process, development
+
+Routes, status codes, headers and bodies match the Flask app; validation,
+query building, paging, rating and leaderboard logic are shared with it.
+"""
+import contextlib
+import logging
+import os
+import time
+from bson import ObjectId
+from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import MongoClient
+from starlette.applications import Starlette
+from starlette.middleware import Middleware
+from starlette.middleware.cors import CORSMiddleware
+from starlette.responses import FileResponse, Response
+from starlette.routing import Match, Route
+from werkzeug.datastructures import Headers
+from werkzeug.http import parse_accept_header, parse_etags
+from app import REQUEST_COUNT, REQUEST_DURATION, ACTIVE_CONNECTIONS, default_config, start_json_logging, api_info
+from routes.async_restaurants import JSONResponse, error_response, invalidate_cache, routes as restaurant_routes
+from routes.async_leaderboards import routes as leaderboard_routes
+from routes.async_export import routes as export_routes
+from services.admission import AsyncAdmissionController, EXEMPT, route_priority
+from services.cache import ResponseCache
+from services.compression import Compression
+from services.json_provider import orjson_enabled
+from services.leaderboards import Leaderboards, AsyncLeaderboards
+from services.log_queue import RequestLogSampler
+from services.metrics import KNOWN_METHODS, OTHER_METHOD, UNMATCHED_ENDPOINT, render_metrics
+from services.mongo_metrics import CommandMetricsListener, PoolMetricsListener, begin_async_request_stats, end_async_request_stats
+from services.purge import Purger, start_purge_worker
+from services.review_queue import ReviewQueue, start_review_flusher
+from services.static_assets import SpaBuild
+from services.versions import bump_version
+
+ROOT_PATH = os.path.dirname(os.path.abspath(__file__))
+BUILD_PATH = os.path.join(ROOT_PATH, 'build')
+
+logger = logging.getLogger('asgi')
+
+class RequestMetricsMiddleware:
+    """
+    ASGI counterpart of app.register_middleware: request count, latency and
+    in-flight gauge with the Flask endpoint names as labels, plus the
+    sampled JSON request log.
+    """
+
+    def __init__(self, app, endpoint_names, sampler):
+        self.app = app
+        self.endpoint_names = endpoint_names
+        self.sampler = sampler
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http':
+            await self.app(scope, receive, send)
+            return
+
+        started = time.time()
+        status_code = 500
+        ACTIVE_CONNECTIONS.inc()
+        mongo_stats = begin_async_request_stats()
+
+        async def send_with_status(message):
+            nonlocal status_code
+            if message['type'] == 'http.response.start':
+                status_code = message['status']
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            duration = time.time() - started
+            # The router stores the matched endpoint in the scope
+            endpoint = self.endpoint_names.get(scope.get('endpoint'), UNMATCHED_ENDPOINT)
+            method = scope['method'] if scope['method'] in KNOWN_METHODS else OTHER_METHOD
+            REQUEST_COUNT.labels(method=method, endpoint=endpoint, status=status_code).inc()
+            REQUEST_DURATION.labels(method=method, endpoint=endpoint).observe(duration)
+            ACTIVE_CONNECTIONS.dec()
+            mongo_ms, mongo_commands = end_async_request_stats(mongo_stats)
+            self.log(scope, status_code, round(duration * 1000, 2), mongo_ms, mongo_commands)
+
+    def log(self, scope, status_code, duration_ms, mongo_ms, mongo_commands):
+        if not self.sampler.should_log(status_code, duration_ms):
+            return
+        url = scope['path'] + ('?' + scope['query_string'].decode('latin-1') if scope['query_string'] else '')
+        logger.info(
+            f"{scope['method']} {url} - {status_code}",
+            extra={
+                'method': scope['method'],
+                'url': url,
+                'status_code': status_code,
+                'duration': duration_ms,
+                'mongo_ms': mongo_ms,
+                'mongo_commands': mongo_commands,
+                'sample_rate': self.sampler.sample_rate,
+                'event': 'http_request'
+            }
+        )
+
+class AdmissionMiddleware:
+    """
+    ASGI counterpart of the admission check in app.register_middleware. It
+    runs ahead of the router, so it matches the route itself to find the
+    priority; the slot is held until the response body is fully sent.
+    """
+
+    def __init__(self, app, routes, admission):
+        self.app = app
+        self.routes = routes
+        self.admission = admission
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http' or not self.admission.enabled:
+            await self.app(scope, receive, send)
+            return
+
+        route = self.match(scope)
+        priority = route_priority(route.name if route else None)
+        if priority == EXEMPT:
+            await self.app(scope, receive, send)
+            return
+
+        if not await self.admission.acquire(priority):
+            # Label the rejection with the route it was meant for
+            if route:
+                scope['endpoint'] = route.endpoint
+            response = error_response('Server is busy, please retry later', 503)
+            response.headers['Retry-After'] = str(self.admission.retry_after)
+            await response(scope, receive, send)
+            return
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            await self.admission.release()
+
+    def match(self, scope):
+        for route in self.routes:
+            match, _ = route.matches(scope)
+            if match == Match.FULL:
+                return route
+        return None
+
+class CompressionMiddleware:
+    """
+    ASGI counterpart of services.compression.CompressionMiddleware. The
+    response start is held until the first body message: a single message
+    is compressed in one piece, a stream (exports) chunk by chunk.
+    """
+
+    def __init__(self, app, compression):
+        self.app = app
+        self.compression = compression
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http' or scope['method'] == 'HEAD' or not self.compression.enabled:
+            await self.app(scope, receive, send)
+            return
+
+        request_headers = Headers([(name.decode('latin-1'), value.decode('latin-1')) for name, value in scope['headers']])
+        encoding = self.compression.negotiate(request_headers.get('Accept-Encoding'))
+        suffixed = False
+        if encoding and 'If-None-Match' in request_headers:
+            request_headers['If-None-Match'], suffixed = self.compression.strip_etag_suffixes(request_headers['If-None-Match'])
+            # In place: the metrics middleware reads the endpoint the router stores in this scope
+            scope['headers'] = [(name.lower().encode('latin-1'), value.encode('latin-1'))
+                                for name, value in request_headers.items()]
+
+        start = None
+        encoder = None
+
+        async def send_compressed(message):
+            nonlocal start, encoder
+            if message['type'] == 'http.response.start':
+                start = message
+                return
+            if message['type'] != 'http.response.body':
+                await send(message)
+                return
+
+            more_body = message.get('more_body', False)
+            body = message.get('body', b'')
+            if start is not None:
+                headers = Headers([(name.decode('latin-1'), value.decode('latin-1')) for name, value in start['headers']])
+                if not more_body and 'Content-Length' not in headers:
+                    headers['Content-Length'] = str(len(body))
+                encoder = self.compression.prepare(start['status'], headers, encoding, suffixed)
+                if encoder is not None and not more_body:
+                    body = encoder.encode(body, final=True)
+                    headers['Content-Length'] = str(len(body))
+                    encoder = None
+                await send(dict(start, headers=[(name.lower().encode('latin-1'), value.encode('latin-1'))
+                                                for name, value in headers.items()]))
+                start = None
+            if encoder is not None:
+                body = encoder.encode(body, final=not more_body)
+            await send({'type': 'http.response.body', 'body': body, 'more_body': more_body})
+
+        await self.app(scope, receive, send_compressed)
+
+def send_asset(request, asset):
+    status, body, headers = asset.response(
+        parse_accept_header(request.headers.get('accept-encoding')),
+        parse_etags(request.headers.get('if-none-match'))
+    )
+    return Response(body, status, headers)
+
+async def serve_react_app(request):
+    return send_asset(request, request.app.state.spa.index)
+
+async def serve_react_static(request):
+    path = request.path_params['path']
+    if path.startswith('api/'):
+        return error_response('API endpoint not found', 404)
+
+    spa = request.app.state.spa
+    asset = spa.assets.get('/' + path)
+    if asset is not None:
+        return send_asset(request, asset)
+
+    # Source maps and oversized build files are read from disk
+    static_file = spa.static_file('/' + path)
+    if static_file is not None:
+        return FileResponse(os.path.join(spa.static_dir, static_file))
+    return send_asset(request, spa.index)
+
+async def metrics(request):
+    payload, content_type = render_metrics()
+    return Response(payload, 200, {'Content-Type': content_type})
+
+async def health_check(request):
+    return JSONResponse({'status': 'healthy', 'service': 'app'})
+
+def create_asgi_app(config=None):
+    """
+    Build the ASGI application; takes the same settings as create_app.
+
+    Like create_app it runs once per worker after fork, so the Motor client,
+    log listener and purge thread belong to the worker that uses them.
+    """
+    settings = default_config()
+    settings.update(config or {})
+    testing = settings.get('TESTING', False)
+
+    routes = restaurant_routes + leaderboard_routes + export_routes + [
+        Route('/metrics', metrics, name='metrics'),
+        Route('/health', health_check, name='health_check'),
+        Route('/', serve_react_app, name='serve_react_app'),
+        Route('/{path:path}', serve_react_static, name='serve_react_static'),
+    ]
+    sampler = RequestLogSampler(sample_rate=settings['LOG_SAMPLE_RATE'], slow_ms=settings['LOG_SLOW_REQUEST_MS'])
+    admission = AsyncAdmissionController.from_config(settings)
+    middleware = [
+        Middleware(RequestMetricsMiddleware, endpoint_names={route.endpoint: route.name for route in routes}, sampler=sampler),
+        Middleware(CompressionMiddleware, compression=Compression.from_config(settings)),
+        Middleware(CORSMiddleware, allow_origins=['*'], allow_methods=['*'], allow_headers=['*'],
+                   expose_headers=['X-Next-Cursor', 'ETag', 'Retry-After']),
+        Middleware(AdmissionMiddleware, routes=routes, admission=admission)
+    ]
+
+    @contextlib.asynccontextmanager
+    async def lifespan(app):
+        yield
+        app.state.mongo_client.close()
+
+    app = Starlette(routes=routes, middleware=middleware, lifespan=lifespan)
+    app.state.config = settings
+
+    # Motor runs pymongo underneath, so the same listeners export command and pool metrics
+    app.state.mongo_client = AsyncIOMotorClient(
+        settings['MONGO_URI'],
+        event_listeners=[CommandMetricsListener(), PoolMetricsListener()]
+    )
+    app.state.db = app.state.mongo_client.get_default_database()
+    app.state.response_cache = ResponseCache(
+        'restaurants',
+        max_entries=settings['RESPONSE_CACHE_SIZE'],
+        ttl=settings['RESPONSE_CACHE_TTL']
+    )
+    app.state.leaderboards = AsyncLeaderboards.from_config(settings)
+    JSONResponse.use_orjson = orjson_enabled()
+    app.state.spa = SpaBuild(
+        BUILD_PATH,
+        settings['STATIC_URL_PATH'],
+        fallback=JSONResponse(api_info(os.path.join(BUILD_PATH, 'index.html'))).body
+    )
+
+    if not testing:
+        console = logging.StreamHandler()
+        console.setFormatter(logging.Formatter('[%(asctime)s] %(levelname)s in %(module)s: %(message)s'))
+        start_json_logging(logger, settings, console)
+        logger.info('Application startup', extra={'event': 'startup'})
+
+    # Purge batches and review flushes are background work: they keep their own threads and sync client
+    background_db = None
+    if not testing and (settings['PURGE_ENABLED'] or settings['REVIEW_WRITE_BEHIND']):
+        background_db = MongoClient(settings['MONGO_URI']).get_default_database
+
+    if settings['PURGE_ENABLED'] and not testing:
+        start_purge_worker(
+            background_db,
+            Purger.from_config(settings),
+            poll_interval=settings['PURGE_POLL_INTERVAL'],
+            logger=logger
+        )
+
+    app.state.review_queue = None
+    if settings['REVIEW_WRITE_BEHIND']:
+        app.state.review_queue = ReviewQueue.from_config(settings)
+        leaderboards = Leaderboards.from_config(settings)
+
+        def record_flushed(db, updated):
+            leaderboards.record_many(db, [ObjectId(restaurant_id) for restaurant_id in updated])
+            bump_version(db, 'restaurants')
+            for restaurant_id in updated:
+                invalidate_cache(app.state.response_cache, restaurant_id)
+
+        if not testing:
+            start_review_flusher(
+                background_db,
+                app.state.review_queue,
+                on_flush=record_flushed,
+                shutdown_timeout=settings['REVIEW_SHUTDOWN_TIMEOUT'],
+                logger=logger
+            )
+    return app
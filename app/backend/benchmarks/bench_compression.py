@@ -0,0 +1,126 @@
+"""
+CPU cost vs bytes saved by response compression, per encoding and level,
+on the JSON bodies the API sends most:
+
+- list:    GET /api/restaurants page (default 100, max 500 restaurants)
+- reviews: GET /api/restaurants/<id>/reviews page (default 20, max 100)
+- export:  NDJSON export, compressed in EXPORT_FLUSH_DOCS chunks with a
+           flush after each, the way the middleware streams it
+
+    cd backend && python -m benchmarks.bench_compression [--repeat 20] [--output results.json]
+
+Encodings whose library is not installed (brotli, zstandard) are skipped.
+"""
+import argparse
+import json
+import platform
+import random
+import time
+from datetime import datetime, timedelta
+from bson import ObjectId
+from flask import Flask
+
+from benchmarks.bench_json_encoding import make_restaurants
+from models.restaurant import Review
+from routes.export import EXPORT_FLUSH_DOCS
+from services import compression
+from services.compression import ResponseEncoder
+from services.json_provider import MongoJSONProvider
+from services.pagination import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE
+from routes.restaurants import REVIEW_PAGE_SIZE, MAX_REVIEW_PAGE_SIZE
+
+LEVELS = {
+    'gzip': (1, 4, 6, 9),
+    'br': (1, 4, 6, 9, 11),
+    'zstd': (1, 3, 6, 12, 19),
+}
+COMMENTS = (
+    'Great food and friendly staff, will come back',
+    'Portions were small for the price',
+    'Best shakshuka in town',
+    'Slow service on a busy evening but worth the wait',
+    '',
+)
+
+def make_reviews(count, seed=7):
+    rng = random.Random(seed)
+    restaurant_id = str(ObjectId())
+    docs = []
+    for i in range(count):
+        doc = Review(restaurant_id, f'user{rng.randint(1, 5000)}', rng.randint(1, 5), rng.choice(COMMENTS)).to_dict()
+        doc['_id'] = ObjectId()
+        doc['created_at'] = datetime(2024, 1, 1) + timedelta(seconds=rng.randint(0, 10 ** 7))
+        docs.append(doc)
+    return docs
+
+def payloads():
+    app = Flask('bench')
+    app.json = MongoJSONProvider(app, backend='json')
+    restaurants = make_restaurants(MAX_PAGE_SIZE)
+    reviews = make_reviews(MAX_REVIEW_PAGE_SIZE)
+
+    def body(docs):
+        return [app.json.dumps_bytes(docs) + b'\n']
+
+    export = [app.json.dumps_bytes(doc) for doc in make_restaurants(2000, seed=3)]
+    export_chunks = [b'\n'.join(export[i:i + EXPORT_FLUSH_DOCS]) + b'\n' for i in range(0, len(export), EXPORT_FLUSH_DOCS)]
+    return [
+        (f'list {DEFAULT_PAGE_SIZE}', body(restaurants[:DEFAULT_PAGE_SIZE])),
+        (f'list {MAX_PAGE_SIZE}', body(restaurants)),
+        (f'reviews {REVIEW_PAGE_SIZE}', body(reviews[:REVIEW_PAGE_SIZE])),
+        (f'reviews {MAX_REVIEW_PAGE_SIZE}', body(reviews)),
+        (f'export {len(export)}', export_chunks),
+    ]
+
+def compress(encoding, level, chunks):
+    encoder = ResponseEncoder(encoding, level)
+    out = [encoder.encode(chunk) for chunk in chunks[:-1]]
+    out.append(encoder.encode(chunks[-1], final=True))
+    return sum(len(chunk) for chunk in out)
+
+def best_of(repeat, func):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        size = func()
+        timings.append(time.perf_counter() - start)
+    return min(timings), size
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark response compression levels')
+    parser.add_argument('--repeat', type=int, default=20, help='runs per variant (best is reported)')
+    parser.add_argument('--output', help='write the results as JSON to this file')
+    args = parser.parse_args()
+
+    encodings = [encoding for encoding in LEVELS if compression.installed(encoding)]
+    skipped = [encoding for encoding in LEVELS if encoding not in encodings]
+    if skipped:
+        print(f'not installed, skipping: {", ".join(skipped)}')
+
+    results = []
+    for name, chunks in payloads():
+        size = sum(len(chunk) for chunk in chunks)
+        print(f'\n{name}: {size / 1024:.1f} KiB')
+        print(f'{"encoding":10} {"level":>5} {"bytes":>9} {"ratio":>6} {"time":>10} {"MB/s":>7}')
+        for encoding in encodings:
+            for level in LEVELS[encoding]:
+                seconds, compressed = best_of(args.repeat, lambda: compress(encoding, level, chunks))
+                results.append({
+                    'payload': name,
+                    'encoding': encoding,
+                    'level': level,
+                    'input_bytes': size,
+                    'output_bytes': compressed,
+                    'ratio': round(size / compressed, 2),
+                    'seconds': seconds
+                })
+                print(f'{encoding:10} {level:5} {compressed:9} {size / compressed:5.1f}x '
+                      f'{seconds * 1e6:8.0f} µs {size / seconds / 1e6:7.1f}')
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump({'python': platform.python_version(), 'machine': platform.machine(), 'results': results}, f, indent=2)
+        print(f'\nwrote {args.output}')
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,110 @@
+"""
+Compare response encoding paths on a list of synthetic restaurants:
+
+- legacy:  serialize_doc() copy + jsonify() with Flask's default provider
+- json:    MongoJSONProvider on the standard library encoder
+- orjson:  MongoJSONProvider on orjson (skipped when not installed)
+
+    cd backend && python -m benchmarks.bench_json_encoding [--count 10000] [--repeat 5]
+"""
+import argparse
+import random
+import time
+from datetime import datetime, timedelta
+from bson import ObjectId
+from flask import Flask, jsonify
+
+from models.restaurant import Restaurant
+from routes.restaurants import allowed_cuisines
+from services import json_provider
+from services.json_provider import MongoJSONProvider
+
+def serialize_doc(doc):
+    """The copy routes made before the JSON provider encoded documents itself"""
+    if doc is None:
+        return None
+    if isinstance(doc, list):
+        return [serialize_doc(item) for item in doc]
+    if isinstance(doc, dict):
+        result = {}
+        for key, value in doc.items():
+            if isinstance(value, ObjectId):
+                result[key] = str(value)
+            elif isinstance(value, datetime):
+                result[key] = value.isoformat()
+            elif isinstance(value, (dict, list)):
+                result[key] = serialize_doc(value)
+            else:
+                result[key] = value
+        return result
+    return doc
+
+def make_restaurants(count, seed=42):
+    rng = random.Random(seed)
+    docs = []
+    for i in range(count):
+        restaurant = Restaurant(
+            name=f'Restaurant {i}',
+            address=f'{rng.randint(1, 200)} Dizengoff St, Tel Aviv, Israel',
+            latitude=32.0 + rng.random() * 0.2,
+            longitude=34.7 + rng.random() * 0.2,
+            style=rng.choice(allowed_cuisines),
+            description='Synthetic restaurant used for encoding benchmarks',
+            phone='+972-3-000-0000',
+            website='https://example.com'
+        )
+        doc = restaurant.to_dict()
+        doc['_id'] = ObjectId()
+        doc['created_at'] = datetime(2024, 1, 1) + timedelta(seconds=rng.randint(0, 10 ** 7))
+        doc['average_rating'] = round(rng.uniform(1, 5), 1)
+        doc['total_reviews'] = rng.randint(0, 500)
+        docs.append(doc)
+    return docs
+
+def best_of(repeat, func):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        body = func()
+        timings.append(time.perf_counter() - start)
+    return min(timings), len(body)
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark JSON response encoding')
+    parser.add_argument('--count', type=int, default=10000, help='restaurants per payload')
+    parser.add_argument('--repeat', type=int, default=5, help='runs per variant (best is reported)')
+    args = parser.parse_args()
+
+    docs = make_restaurants(args.count)
+
+    legacy_app = Flask('legacy')
+    fast_app = Flask('fast')
+    fast_app.json = MongoJSONProvider(fast_app, backend='json')
+    orjson_app = Flask('orjson')
+    orjson_app.json = MongoJSONProvider(orjson_app, backend='orjson')
+
+    def legacy():
+        with legacy_app.app_context():
+            return jsonify(serialize_doc(docs)).get_data()
+
+    def provider(app):
+        def run():
+            with app.app_context():
+                return jsonify(docs).get_data()
+        return run
+
+    variants = [('legacy (serialize_doc + jsonify)', legacy), ('MongoJSONProvider/json', provider(fast_app))]
+    if json_provider.orjson is not None:
+        variants.append(('MongoJSONProvider/orjson', provider(orjson_app)))
+    else:
+        print('orjson not installed; skipping orjson variant')
+
+    print(f'{args.count} restaurants, best of {args.repeat}')
+    baseline = None
+    for name, func in variants:
+        seconds, size = best_of(args.repeat, func)
+        baseline = baseline or seconds
+        print(f'{name:34} {seconds * 1000:9.1f} ms  {size / 1024:8.0f} KiB  {baseline / seconds:5.1f}x')
+
+if __name__ == '__main__':
+    main()
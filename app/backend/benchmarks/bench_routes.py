@@ -0,0 +1,272 @@
+"""
+Benchmark every route of the restaurants blueprint against a seeded
+database, through the Flask test client and over concurrent HTTP.
+
+    cd backend && python -m benchmarks.bench_routes \\
+        [--sizes 10000 100000 1000000] [--reviews-per-restaurant 5] \\
+        [--mongo-uri mongodb://localhost:27017] [--modes client http] \\
+        [--iterations 200] [--concurrency 16] [--duration 10] [--cache] \\
+        [--output results.json] [--compare baseline.json]
+
+Without --mongo-uri the data lives in mongomock. That is enough for the
+CPU-bound paths (routing, validation, encoding, keyset pages), but
+mongomock does not implement $geoNear or $text, so the proximity and search
+routes are skipped. With --mongo-uri the suite seeds the dedicated database
+--database (dropped first, default restauratings_bench) on a real mongod
+with the app's indexes.
+
+Each size reports per route throughput, p50/p95/p99 latency and the peak
+RSS of the process. Sizes run in ascending order within one process, so
+the RSS figure is the peak reached so far. --output writes the results and
+the current commit as JSON; --compare prints the change against an
+earlier result file.
+"""
+import argparse
+import json
+import logging
+import platform
+import random
+import resource
+import subprocess
+import threading
+import time
+from datetime import datetime, timedelta
+
+import mongomock
+from bson import ObjectId
+from pymongo import MongoClient
+from werkzeug.serving import make_server
+
+from app import create_app
+from benchmarks.loadgen import run_load, summarize
+from models.restaurant import Restaurant, Review
+from routes.restaurants import allowed_cuisines
+from services.indexes import ensure_indexes
+from services.pagination import encode_cursor
+from services.ratings import empty_histogram, rating_bucket
+
+INSERT_CHUNK = 10000
+SAMPLE_IDS = 1000
+WRITE_BATCH = 100
+SEARCH_WORDS = ('pizza', 'grill', 'garden', 'corner', 'house', 'kitchen', 'bistro', 'bakery')
+
+class MongoHandle:
+    """Stands in for flask_pymongo.PyMongo: routes only use `.db`"""
+
+    def __init__(self, db):
+        self.db = db
+
+def synthetic_restaurant(rng, index):
+    restaurant = Restaurant(
+        name=f'{rng.choice(SEARCH_WORDS).title()} {rng.choice(SEARCH_WORDS).title()} {index}',
+        address=f'{rng.randint(1, 300)} Synthetic St, Tel Aviv, Israel',
+        latitude=round(31.9 + rng.random() * 0.4, 6),
+        longitude=round(34.6 + rng.random() * 0.4, 6),
+        style=rng.choice(allowed_cuisines),
+        description=f'A {rng.choice(SEARCH_WORDS)} for benchmarks',
+        phone='+972-3-000-0000',
+        website='https://example.com'
+    )
+    return restaurant.to_dict()
+
+def seed(db, count, reviews_per_restaurant, seed_value=42):
+    """Insert `count` restaurants with consistent rating aggregates and their reviews; returns the ids"""
+    rng = random.Random(seed_value)
+    start = datetime(2024, 1, 1)
+    ids = []
+    for offset in range(0, count, INSERT_CHUNK):
+        restaurants, reviews = [], []
+        for index in range(offset, min(count, offset + INSERT_CHUNK)):
+            doc = synthetic_restaurant(rng, index)
+            doc['_id'] = ObjectId()
+            ratings = [rng.randint(1, 5) for _ in range(rng.randint(0, 2 * reviews_per_restaurant))]
+            doc['rating_sum'] = sum(ratings)
+            doc['total_reviews'] = len(ratings)
+            doc['average_rating'] = round(sum(ratings) / len(ratings), 1) if ratings else 0.0
+            doc['rating_counts'] = empty_histogram()
+            for rating in ratings:
+                doc['rating_counts'][rating_bucket(rating)] += 1
+                review = Review(str(doc['_id']), f'user{rng.randint(1, 10 ** 6)}', rating, 'Synthetic review').to_dict()
+                review['created_at'] = start + timedelta(seconds=rng.randint(0, 3 * 10 ** 7))
+                reviews.append(review)
+            restaurants.append(doc)
+            ids.append(doc['_id'])
+        db.restaurants.insert_many(restaurants, ordered=False)
+        if reviews:
+            db.reviews.insert_many(reviews, ordered=False)
+    return ids
+
+def routes(ids, rng, full_backend):
+    """
+    (name, method, path(i), body(i)) for every route of the blueprint.
+    `i` is the iteration number, so writes touch different documents.
+    """
+    # delete_restaurant consumes the newest ids; reads and reviews use the others
+    doomed = ids[-SAMPLE_IDS:]
+    pool = ids[:-SAMPLE_IDS] if len(ids) > 2 * SAMPLE_IDS else ids
+    sample = rng.sample(pool, min(SAMPLE_IDS, len(pool)))
+    middle = encode_cursor(ids[len(ids) // 2])
+    new_restaurant = {
+        'name': 'Bench Bistro', 'address': '1 Bench St', 'latitude': 32.08,
+        'longitude': 34.78, 'style': 'cafe', 'description': 'benchmark'
+    }
+
+    def pick(i):
+        return sample[i % len(sample)]
+
+    table = [
+        ('list_first_page', 'GET', lambda i: '/api/restaurants?limit=100', None),
+        ('list_deep_page', 'GET', lambda i: f'/api/restaurants?limit=100&cursor={middle}', None),
+        ('list_style', 'GET', lambda i: '/api/restaurants?style=pizza&limit=100', None),
+        ('list_styles_by_rating', 'GET', lambda i: '/api/restaurants?style=pizza,burger&sort=rating&limit=100', None),
+        ('detail', 'GET', lambda i: f'/api/restaurants/{pick(i)}', None),
+        ('reviews_page', 'GET', lambda i: f'/api/restaurants/{pick(i)}/reviews', None),
+        ('add_review', 'POST', lambda i: f'/api/restaurants/{pick(i)}/reviews',
+            lambda i: {'user_name': 'bench', 'rating': 1 + i % 5, 'comment': 'benchmark'}),
+        ('add_restaurant', 'POST', lambda i: '/api/restaurants', lambda i: new_restaurant),
+        ('add_restaurants_bulk', 'POST', lambda i: '/api/restaurants/bulk', lambda i: [new_restaurant] * WRITE_BATCH),
+        ('add_reviews_bulk', 'POST', lambda i: '/api/reviews/bulk',
+            lambda i: [{'restaurant_id': str(pick(i + n)), 'user_name': 'bench', 'rating': 4} for n in range(WRITE_BATCH)]),
+        ('delete_restaurant', 'DELETE', lambda i: f'/api/restaurants/{doomed[i % len(doomed)]}', None),
+    ]
+    if full_backend:
+        table += [
+            ('nearby', 'GET', lambda i: '/api/restaurants?lat=32.08&lng=34.78&radius=2&limit=100', None),
+            ('search', 'GET', lambda i: f'/api/restaurants/search?q={SEARCH_WORDS[i % len(SEARCH_WORDS)]}&limit=50', None),
+        ]
+    return table
+
+def bench_client(app, table, iterations):
+    """Time each route in-process through the Flask test client"""
+    client = app.test_client()
+    results = {}
+    for name, method, path, body in table:
+        count = iterations if name != 'delete_restaurant' else min(iterations, SAMPLE_IDS)
+        latencies, errors = [], 0
+        started = time.perf_counter()
+        for i in range(count):
+            request_started = time.perf_counter()
+            response = client.open(path(i), method=method, json=body(i) if body else None)
+            if response.status_code >= 500:
+                errors += 1
+            else:
+                latencies.append(time.perf_counter() - request_started)
+        results[name] = summarize(latencies, errors, time.perf_counter() - started)
+    return results
+
+def bench_http(app, table, concurrency, duration, port):
+    """Drive the idempotent-enough routes (reads and review posts) over concurrent HTTP"""
+    # Per-request access lines from the embedded server would dominate the output
+    logging.getLogger('werkzeug').setLevel(logging.ERROR)
+    server = make_server('127.0.0.1', port, app, threaded=True)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    results = {}
+    try:
+        for name, method, path, body in table:
+            if method == 'DELETE' or name.endswith('_bulk') or name == 'add_restaurant':
+                continue
+            requests = []
+            for i in range(SAMPLE_IDS):
+                payload = json.dumps(body(i)).encode() if body else None
+                headers = {'Content-Type': 'application/json'} if body else None
+                requests.append((method, path(i), payload, headers))
+            results[name] = run_load(f'http://127.0.0.1:{port}', requests, concurrency=concurrency, duration=duration)
+    finally:
+        server.shutdown()
+        thread.join()
+    return results
+
+def peak_rss_mb():
+    # ru_maxrss is in KiB on Linux
+    return round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1)
+
+def git_revision():
+    try:
+        commit = subprocess.run(['git', 'rev-parse', 'HEAD'], capture_output=True, text=True, check=True).stdout.strip()
+        dirty = subprocess.run(['git', 'status', '--porcelain', '--untracked-files=no'], capture_output=True, text=True).stdout.strip()
+        return {'commit': commit, 'dirty': bool(dirty)}
+    except (OSError, subprocess.CalledProcessError):
+        return {'commit': None, 'dirty': None}
+
+def print_results(size, results):
+    print(f'\n== {size} restaurants (seeded in {results["seed_seconds"]} s, peak RSS {results["peak_rss_mb"]} MiB)')
+    for mode in ('client', 'http'):
+        for name, stats in results.get(mode, {}).items():
+            print(f"{mode:6} {name:24} {stats['throughput_rps']:9.1f} req/s  p50 {stats['p50_ms']:8.2f}  "
+                  f"p95 {stats['p95_ms']:8.2f}  p99 {stats['p99_ms']:8.2f} ms  errors {stats['errors']}")
+
+def print_comparison(current, baseline):
+    print(f"\nChange vs {baseline['revision']['commit']} (p50 latency, throughput):")
+    for size, results in current['results'].items():
+        previous = baseline['results'].get(size, {})
+        for mode in ('client', 'http'):
+            for name, stats in results.get(mode, {}).items():
+                before = previous.get(mode, {}).get(name)
+                if not before or not before['p50_ms'] or not before['throughput_rps']:
+                    continue
+                p50 = (stats['p50_ms'] / before['p50_ms'] - 1) * 100
+                rps = (stats['throughput_rps'] / before['throughput_rps'] - 1) * 100
+                print(f'{size:>8} {mode:6} {name:24} p50 {p50:+7.1f}%  throughput {rps:+7.1f}%')
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the restaurants blueprint at scale')
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10000], help='restaurant counts to seed')
+    parser.add_argument('--reviews-per-restaurant', type=int, default=5, help='average reviews per restaurant')
+    parser.add_argument('--mongo-uri', help='benchmark against this mongod instead of mongomock')
+    parser.add_argument('--database', default='restauratings_bench', help='database to (re)create on --mongo-uri')
+    parser.add_argument('--modes', nargs='+', default=['client', 'http'], choices=['client', 'http'])
+    parser.add_argument('--iterations', type=int, default=200, help='requests per route through the test client')
+    parser.add_argument('--concurrency', type=int, default=16)
+    parser.add_argument('--duration', type=float, default=10, help='seconds per route over HTTP')
+    parser.add_argument('--port', type=int, default=5056)
+    parser.add_argument('--cache', action='store_true', help='keep the response cache enabled')
+    parser.add_argument('--output', help='write results as JSON to this file')
+    parser.add_argument('--compare', help='earlier --output file to compare against')
+    args = parser.parse_args()
+
+    report = {
+        'revision': git_revision(),
+        'timestamp': datetime.utcnow().isoformat(),
+        'python': platform.python_version(),
+        'backend': 'mongod' if args.mongo_uri else 'mongomock',
+        'config': vars(args),
+        'results': {}
+    }
+
+    for size in sorted(args.sizes):
+        client = MongoClient(args.mongo_uri) if args.mongo_uri else mongomock.MongoClient()
+        client.drop_database(args.database)
+        db = client[args.database]
+        ensure_indexes(db)
+
+        started = time.perf_counter()
+        ids = seed(db, size, args.reviews_per_restaurant)
+        results = {'seed_seconds': round(time.perf_counter() - started, 1)}
+
+        app = create_app({'TESTING': True, 'RESPONSE_CACHE_SIZE': 1024 if args.cache else 0})
+        app.mongo = MongoHandle(db)
+        for style in allowed_cuisines:
+            app.leaderboards.rebuild(db, style)
+
+        table = routes(ids, random.Random(size), full_backend=bool(args.mongo_uri))
+        if 'client' in args.modes:
+            results['client'] = bench_client(app, table, args.iterations)
+        if 'http' in args.modes:
+            results['http'] = bench_http(app, table, args.concurrency, args.duration, args.port)
+        results['peak_rss_mb'] = peak_rss_mb()
+
+        report['results'][str(size)] = results
+        print_results(size, results)
+        client.drop_database(args.database)
+        client.close()
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+    if args.compare:
+        with open(args.compare) as f:
+            print_comparison(report, json.load(f))
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,84 @@
+"""
+Compare throughput of the Flask development server (`python app.py`),
+gunicorn serving the Flask app and gunicorn serving the async ASGI app
+(SERVER_MODE=async, see asgi.py) on the same machine. Each mode is started
+as a subprocess, warmed up and then driven with keep-alive HTTP clients.
+
+    cd backend && python -m benchmarks.bench_serving \\
+        [--paths /health /api/restaurants?limit=50] [--concurrency 32] [--duration 15] \\
+        [--modes dev gunicorn async] [--slow-clients 1000] \\
+        [--workers 4] [--threads 4] [--worker-class gthread|gevent] [--output serving.json]
+
+--slow-clients holds that many connections open with unfinished requests
+during the measured run, so the load is served next to them.
+
+/health needs no database; API paths need MONGODB_URI to point at a
+seeded MongoDB.
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+from benchmarks.loadgen import run_load, wait_until_up, hold_slow_clients
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+def serve(mode, port, args):
+    env = dict(os.environ, PORT=str(port), FLASK_ENV='production', LOG_SAMPLE_RATE='0')
+    if mode == 'dev':
+        command = [sys.executable, 'app.py']
+    elif mode == 'async':
+        env.update(SERVER_MODE='async', GUNICORN_WORKERS=str(args.workers))
+        env.pop('GUNICORN_WORKER_CLASS', None)
+        command = ['gunicorn', '-c', 'gunicorn.conf.py']
+    else:
+        env.update(
+            GUNICORN_WORKERS=str(args.workers),
+            GUNICORN_THREADS=str(args.threads),
+            GUNICORN_WORKER_CLASS=args.worker_class
+        )
+        command = ['gunicorn', '-c', 'gunicorn.conf.py']
+    return subprocess.Popen(command, cwd=BACKEND_DIR, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark dev server vs gunicorn vs the async app')
+    parser.add_argument('--paths', nargs='+', default=['/health'])
+    parser.add_argument('--modes', nargs='+', default=['dev', 'gunicorn', 'async'], choices=['dev', 'gunicorn', 'async'])
+    parser.add_argument('--concurrency', type=int, default=32)
+    parser.add_argument('--slow-clients', type=int, default=0, help='unfinished requests held open during the run')
+    parser.add_argument('--duration', type=float, default=15)
+    parser.add_argument('--workers', type=int, default=4)
+    parser.add_argument('--threads', type=int, default=4)
+    parser.add_argument('--worker-class', default='gthread')
+    parser.add_argument('--port', type=int, default=5055)
+    parser.add_argument('--output', help='write results as JSON to this file')
+    args = parser.parse_args()
+
+    requests = [('GET', path, None, None) for path in args.paths]
+    results = {}
+    for mode in args.modes:
+        process = serve(mode, args.port, args)
+        base_url = f'http://127.0.0.1:{args.port}'
+        try:
+            wait_until_up(base_url)
+            run_load(base_url, requests, concurrency=args.concurrency, duration=2)  # warm-up
+            release = hold_slow_clients(base_url, args.slow_clients)
+            try:
+                results[mode] = run_load(base_url, requests, concurrency=args.concurrency, duration=args.duration)
+            finally:
+                release()
+        finally:
+            process.terminate()
+            process.wait(timeout=30)
+        print(f"{mode:9} {results[mode]['throughput_rps']:9.1f} req/s  "
+              f"p50 {results[mode]['p50_ms']:7.2f} ms  p95 {results[mode]['p95_ms']:7.2f} ms  "
+              f"p99 {results[mode]['p99_ms']:7.2f} ms  errors {results[mode]['errors']}")
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump({'config': vars(args), 'results': results}, f, indent=2)
+
+if __name__ == '__main__':
+    main()
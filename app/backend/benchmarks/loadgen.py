@@ -0,0 +1,118 @@
+"""Small closed-loop HTTP load generator shared by the benchmark scripts."""
+import http.client
+import socket
+import threading
+import time
+from urllib.parse import urlsplit
+
+def percentile(sorted_values, fraction):
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, int(round(fraction * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+def summarize(latencies, errors, seconds):
+    """Throughput and latency percentiles (milliseconds) for one run"""
+    latencies = sorted(latencies)
+    return {
+        'requests': len(latencies),
+        'errors': errors,
+        'seconds': round(seconds, 3),
+        'throughput_rps': round(len(latencies) / seconds, 1) if seconds else 0.0,
+        'p50_ms': round(percentile(latencies, 0.50) * 1000, 2),
+        'p95_ms': round(percentile(latencies, 0.95) * 1000, 2),
+        'p99_ms': round(percentile(latencies, 0.99) * 1000, 2)
+    }
+
+def run_load(base_url, requests, concurrency=16, duration=10.0, timeout=30):
+    """
+    Drive `requests` — (method, path, body, headers) tuples, used round-robin —
+    against `base_url` from `concurrency` keep-alive connections for
+    `duration` seconds. Responses >= 500 and connection errors count as errors.
+    """
+    target = urlsplit(base_url)
+    deadline = time.perf_counter() + duration
+    lock = threading.Lock()
+    latencies, errors = [], [0]
+
+    def worker(offset):
+        connection = http.client.HTTPConnection(target.hostname, target.port, timeout=timeout)
+        local_latencies, local_errors, i = [], 0, offset
+        while time.perf_counter() < deadline:
+            method, path, body, headers = requests[i % len(requests)]
+            i += 1
+            started = time.perf_counter()
+            try:
+                connection.request(method, path, body=body, headers=headers or {})
+                response = connection.getresponse()
+                response.read()
+                if response.status >= 500:
+                    local_errors += 1
+                    continue
+                local_latencies.append(time.perf_counter() - started)
+            except (OSError, http.client.HTTPException):
+                local_errors += 1
+                connection.close()
+                connection = http.client.HTTPConnection(target.hostname, target.port, timeout=timeout)
+        connection.close()
+        with lock:
+            latencies.extend(local_latencies)
+            errors[0] += local_errors
+
+    started = time.perf_counter()
+    threads = [threading.Thread(target=worker, args=(n,)) for n in range(concurrency)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return summarize(latencies, errors[0], time.perf_counter() - started)
+
+def wait_until_up(base_url, path='/health', timeout=30.0):
+    target = urlsplit(base_url)
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            connection = http.client.HTTPConnection(target.hostname, target.port, timeout=2)
+            connection.request('GET', path)
+            if connection.getresponse().status == 200:
+                return
+        except (OSError, http.client.HTTPException):
+            pass
+        time.sleep(0.2)
+    raise RuntimeError(f'{base_url}{path} did not come up within {timeout}s')
+
+def hold_slow_clients(base_url, count, interval=1.0):
+    """
+    Keep `count` connections busy sending one request header line every
+    `interval` seconds, never finishing the request, the way slow mobile
+    clients do. All sockets are driven from one thread; returns a function
+    that closes them.
+    """
+    target = urlsplit(base_url)
+    stop = threading.Event()
+    sockets = []
+    for _ in range(count):
+        try:
+            sock = socket.create_connection((target.hostname, target.port), timeout=5)
+            sock.sendall(b'GET /health HTTP/1.1\r\nHost: bench\r\n')
+            sockets.append(sock)
+        except OSError:
+            break
+
+    def trickle():
+        while not stop.wait(interval):
+            for sock in sockets:
+                try:
+                    sock.sendall(b'X-Slow: 1\r\n')
+                except OSError:
+                    pass
+
+    thread = threading.Thread(target=trickle, daemon=True)
+    thread.start()
+
+    def release():
+        stop.set()
+        thread.join()
+        for sock in sockets:
+            sock.close()
+    return release
@@ -0,0 +1,72 @@
+# Gunicorn settings for production serving:
+#
+#     gunicorn -c gunicorn.conf.py
+#
+# SERVER_MODE selects the application: `sync` (default) serves the Flask
+# app from app.py with thread or gevent workers; `async` serves the ASGI
+# app from asgi.py with uvicorn workers, one event loop per process.
+#
+# The app is not preloaded, so every worker imports the code and calls
+# its factory after fork: each worker gets its own MongoClient and log
+# listener thread. `kill -HUP <master pid>` performs a graceful reload:
+# new workers start with fresh code/config while old ones finish their
+# in-flight requests (up to graceful_timeout).
+import os
+import shutil
+
+bind = f"0.0.0.0:{os.getenv('PORT', '5000')}"
+
+server_mode = os.getenv('SERVER_MODE', 'sync')
+if server_mode not in ('sync', 'async'):
+    raise ValueError(f'SERVER_MODE must be sync or async, not {server_mode!r}')
+wsgi_app = 'asgi:create_asgi_app()' if server_mode == 'async' else 'app:create_app()'
+
+# gthread (sync default): a pool of threads per worker process.
+# gevent: cooperative greenlets for many slow/idle clients (requires gevent).
+# uvicorn (async default): an asyncio event loop per worker process.
+worker_class = os.getenv(
+    'GUNICORN_WORKER_CLASS',
+    'uvicorn.workers.UvicornWorker' if server_mode == 'async' else 'gthread'
+)
+workers = int(os.getenv('GUNICORN_WORKERS', '2'))
+threads = int(os.getenv('GUNICORN_THREADS', '4'))
+worker_connections = int(os.getenv('GUNICORN_WORKER_CONNECTIONS', '1000'))
+
+# Requests one worker runs at once, exported so the app's admission limit
+# (ADMISSION_LIMIT) defaults to something the worker can actually reach.
+# uvicorn workers do not cap connections, so nothing is exported for them.
+if worker_class in ('sync', 'gthread'):
+    os.environ['WORKER_CONCURRENCY'] = str(threads)
+elif 'gevent' in worker_class or 'eventlet' in worker_class:
+    os.environ['WORKER_CONCURRENCY'] = str(worker_connections)
+
+preload_app = False
+timeout = int(os.getenv('GUNICORN_TIMEOUT', '30'))
+graceful_timeout = int(os.getenv('GUNICORN_GRACEFUL_TIMEOUT', '30'))
+keepalive = int(os.getenv('GUNICORN_KEEPALIVE', '5'))
+
+# Recycle workers periodically to bound memory growth (0 disables)
+max_requests = int(os.getenv('GUNICORN_MAX_REQUESTS', '0'))
+max_requests_jitter = int(os.getenv('GUNICORN_MAX_REQUESTS_JITTER', '0'))
+
+# Requests are already logged by the app as structured JSON
+accesslog = None
+errorlog = '-'
+loglevel = os.getenv('GUNICORN_LOG_LEVEL', 'info')
+
+
+# Prometheus multiprocess mode: workers write metrics to PROMETHEUS_MULTIPROC_DIR
+# and /metrics merges them. It is set here, for the server and the workers it
+# forks only, so scripts run from the same image keep in-process metrics;
+# stale files from a previous run are removed before the workers start.
+os.environ.setdefault('PROMETHEUS_MULTIPROC_DIR', '/tmp/prometheus_multiproc')
+
+def on_starting(server):
+    path = os.environ['PROMETHEUS_MULTIPROC_DIR']
+    shutil.rmtree(path, ignore_errors=True)
+    os.makedirs(path, exist_ok=True)
+
+def child_exit(server, worker):
+    # Drop the exited worker's live gauges (its counters/histograms are kept)
+    from prometheus_client import multiprocess
+    multiprocess.mark_process_dead(worker.pid)
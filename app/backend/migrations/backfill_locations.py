@@ -0,0 +1,68 @@
+"""
+Add the GeoJSON `location` field to restaurants that only have
+latitude/longitude, and create the 2dsphere index used by proximity search.
+
+    cd backend && python -m migrations.backfill_locations [--dry-run]
+"""
+import argparse
+from pymongo import UpdateOne
+
+from migrations.common import connect
+from models.restaurant import geo_point
+from services.geo import validate_coordinates
+from services.indexes import ensure_indexes
+
+BATCH_SIZE = 1000
+
+def backfill_locations(db, dry_run=False):
+    stats = {'scanned': 0, 'updated': 0, 'invalid': 0}
+    operations = []
+    cursor = db.restaurants.find(
+        {'location': {'$exists': False}},
+        {'latitude': 1, 'longitude': 1}
+    ).batch_size(BATCH_SIZE)
+
+    for restaurant in cursor:
+        stats['scanned'] += 1
+        latitude, longitude = restaurant.get('latitude'), restaurant.get('longitude')
+        try:
+            validate_coordinates(latitude, longitude)
+        except ValueError:
+            stats['invalid'] += 1
+            print(f"Skipping {restaurant['_id']}: invalid coordinates ({latitude}, {longitude})")
+            continue
+
+        operations.append(UpdateOne(
+            {'_id': restaurant['_id']},
+            {'$set': {'location': geo_point(latitude, longitude)}}
+        ))
+        if len(operations) >= BATCH_SIZE:
+            stats['updated'] += _flush(db, operations, dry_run)
+            operations = []
+
+    stats['updated'] += _flush(db, operations, dry_run)
+    return stats
+
+def _flush(db, operations, dry_run):
+    if not operations or dry_run:
+        return 0
+    return db.restaurants.bulk_write(operations, ordered=False).modified_count
+
+def main():
+    parser = argparse.ArgumentParser(description='Backfill GeoJSON locations on restaurants')
+    parser.add_argument('--dry-run', action='store_true', help='report without writing')
+    args = parser.parse_args()
+
+    client, db = connect()
+    try:
+        stats = backfill_locations(db, dry_run=args.dry_run)
+        print(f"Scanned {stats['scanned']} restaurants without location, "
+              f"{stats['updated']} updated, {stats['invalid']} with invalid coordinates")
+        if not args.dry_run:
+            ensure_indexes(db)
+            print("Indexes ensured")
+    finally:
+        client.close()
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,30 @@
+"""
+Rebuild the running rating aggregates (rating_sum, total_reviews,
+rating_counts, average_rating) on every restaurant from the reviews
+collection.
+
+Run it once before rolling out incremental review posting, and again at any
+time to reconcile drift:
+
+    cd backend && python -m migrations.backfill_rating_aggregates [--dry-run]
+"""
+import argparse
+
+from migrations.common import connect
+from services.ratings import rebuild_rating_aggregates
+
+def main():
+    parser = argparse.ArgumentParser(description='Rebuild restaurant rating aggregates from reviews')
+    parser.add_argument('--dry-run', action='store_true', help='report drift without writing')
+    args = parser.parse_args()
+
+    client, db = connect()
+    try:
+        stats = rebuild_rating_aggregates(db, dry_run=args.dry_run)
+        print(f"Scanned {stats['scanned']} restaurants, "
+              f"{stats['drifted']} drifted, {stats['updated']} updated")
+    finally:
+        client.close()
+
+if __name__ == '__main__':
+    main()
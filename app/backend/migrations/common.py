@@ -0,0 +1,11 @@
+import os
+from pymongo import MongoClient
+from dotenv import load_dotenv
+
+load_dotenv()
+
+def connect():
+    """Return (client, db) for the database named in MONGODB_URI"""
+    uri = os.getenv('MONGODB_URI', 'mongodb://db:27017/restaurant_db')
+    client = MongoClient(uri, serverSelectionTimeoutMS=5000)
+    return client, client.get_default_database()
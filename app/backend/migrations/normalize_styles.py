@@ -0,0 +1,76 @@
+"""
+Rewrite restaurant styles to their normalized (trimmed, lowercase) form so
+style filters can use exact matches on the style indexes, then create those
+indexes and drop the superseded single-field `style_1` index.
+
+    cd backend && python -m migrations.normalize_styles [--dry-run]
+"""
+import argparse
+from pymongo import UpdateOne
+
+from migrations.common import connect
+from routes.restaurants import allowed_cuisines, normalize_style
+from services.indexes import ensure_indexes
+from services.versions import bump_version
+
+BATCH_SIZE = 1000
+LEGACY_STYLE_INDEX = 'style_1'
+
+def normalize_styles(db, dry_run=False):
+    stats = {'scanned': 0, 'updated': 0, 'unknown': 0}
+    operations = []
+    # Documents already holding a canonical value are not touched
+    cursor = db.restaurants.find(
+        {'style': {'$nin': allowed_cuisines}},
+        {'style': 1}
+    ).batch_size(BATCH_SIZE)
+
+    for restaurant in cursor:
+        stats['scanned'] += 1
+        style = restaurant.get('style')
+        normalized = normalize_style(style) if isinstance(style, str) else None
+        if normalized not in allowed_cuisines:
+            stats['unknown'] += 1
+            print(f"Skipping {restaurant['_id']}: unknown style {style!r}")
+            continue
+
+        operations.append(UpdateOne(
+            {'_id': restaurant['_id']},
+            {'$set': {'style': normalized}, '$currentDate': {'updated_at': True}}
+        ))
+        if len(operations) >= BATCH_SIZE:
+            stats['updated'] += _flush(db, operations, dry_run)
+            operations = []
+
+    stats['updated'] += _flush(db, operations, dry_run)
+    if stats['updated']:
+        bump_version(db, 'restaurants')
+        bump_version(db, 'styles')
+    return stats
+
+def _flush(db, operations, dry_run):
+    if not operations or dry_run:
+        return 0
+    return db.restaurants.bulk_write(operations, ordered=False).modified_count
+
+def main():
+    parser = argparse.ArgumentParser(description='Normalize restaurant styles to lowercase')
+    parser.add_argument('--dry-run', action='store_true', help='report without writing')
+    args = parser.parse_args()
+
+    client, db = connect()
+    try:
+        stats = normalize_styles(db, dry_run=args.dry_run)
+        print(f"Scanned {stats['scanned']} restaurants with non-canonical styles, "
+              f"{stats['updated']} updated, {stats['unknown']} with unknown styles")
+        if not args.dry_run:
+            ensure_indexes(db)
+            if LEGACY_STYLE_INDEX in db.restaurants.index_information():
+                db.restaurants.drop_index(LEGACY_STYLE_INDEX)
+                print(f"Dropped {LEGACY_STYLE_INDEX} (covered by the compound style indexes)")
+            print("Indexes ensured")
+    finally:
+        client.close()
+
+if __name__ == '__main__':
+    main()
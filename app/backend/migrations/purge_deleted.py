@@ -0,0 +1,39 @@
+"""
+Purge every deleted restaurant and its reviews now instead of waiting for
+the background worker. Uses the PURGE_* settings of the app and the same
+leases, so it is safe to run while the API is serving.
+
+    cd backend && python -m migrations.purge_deleted [--dry-run]
+
+--dry-run reports the backlog without deleting anything.
+"""
+import argparse
+
+from app import default_config
+from migrations.common import connect
+from services.indexes import ensure_indexes
+from services.purge import Purger, TOMBSTONED
+
+def pending_reviews(db):
+    ids = [str(doc['_id']) for doc in db.restaurants.find(TOMBSTONED, {'_id': 1})]
+    return db.reviews.count_documents({'restaurant_id': {'$in': ids}}) if ids else 0
+
+def main():
+    parser = argparse.ArgumentParser(description='Purge deleted restaurants and their reviews')
+    parser.add_argument('--dry-run', action='store_true', help='report the backlog without deleting')
+    args = parser.parse_args()
+
+    client, db = connect()
+    try:
+        purger = Purger.from_config(default_config())
+        if args.dry_run:
+            print(f'{purger.backlog(db)} deleted restaurants with {pending_reviews(db)} reviews awaiting purge')
+            return
+        ensure_indexes(db)
+        restaurants, reviews = purger.drain(db)
+        print(f'Purged {restaurants} restaurants and {reviews} reviews')
+    finally:
+        client.close()
+
+if __name__ == '__main__':
+    main()
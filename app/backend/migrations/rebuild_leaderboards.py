@@ -0,0 +1,50 @@
+"""
+Recompute `weighted_rating` on every restaurant and rebuild the per-style
+leaderboards from scratch. Uses the LEADERBOARD_* settings of the app.
+
+    cd backend && python -m migrations.rebuild_leaderboards [--dry-run | --check]
+
+--check reports drift without writing and exits with status 1 if any
+restaurant score or board is out of date.
+"""
+import argparse
+import sys
+
+from app import default_config
+from migrations.common import connect
+from routes.restaurants import allowed_cuisines
+from services.indexes import ensure_indexes
+from services.leaderboards import Leaderboards
+
+def rebuild_leaderboards(db, leaderboards, dry_run=False):
+    stats = {'rescored': leaderboards.rescore_all(db, dry_run=dry_run), 'stale_boards': []}
+    for style in allowed_cuisines:
+        if leaderboards.is_stale(db, style):
+            stats['stale_boards'].append(style)
+        if not dry_run:
+            leaderboards.rebuild(db, style)
+    return stats
+
+def main():
+    parser = argparse.ArgumentParser(description='Rebuild weighted ratings and per-style leaderboards')
+    mode = parser.add_mutually_exclusive_group()
+    mode.add_argument('--dry-run', action='store_true', help='report drift without writing')
+    mode.add_argument('--check', action='store_true', help='like --dry-run, but exit 1 on drift')
+    args = parser.parse_args()
+
+    client, db = connect()
+    try:
+        if not (args.dry_run or args.check):
+            ensure_indexes(db)
+        leaderboards = Leaderboards.from_config(default_config())
+        stats = rebuild_leaderboards(db, leaderboards, dry_run=args.dry_run or args.check)
+        print(f"{stats['rescored']} restaurants with a stale weighted_rating, "
+              f"stale boards: {', '.join(stats['stale_boards']) or 'none'}")
+    finally:
+        client.close()
+
+    if args.check and (stats['rescored'] or stats['stale_boards']):
+        sys.exit(1)
+
+if __name__ == '__main__':
+    main()
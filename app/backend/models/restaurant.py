@@ -1,6 +1,14 @@
 from datetime import datetime
 from bson import ObjectId
 
+def geo_point(latitude, longitude):
+    """GeoJSON point for a latitude/longitude pair (GeoJSON order is lng, lat)"""
+    return {'type': 'Point', 'coordinates': [longitude, latitude]}
+
+# Deleted restaurants keep their document, with `deleted_at` set, until the
+# purge worker has removed their reviews; every read and update filters on this
+NOT_DELETED = {'deleted_at': None}
+
 class Restaurant:
     def __init__(self, name, address, latitude, longitude, style, description="", phone="", website=""):
         self.name = name
@@ -12,8 +20,11 @@ class Restaurant:
         self.phone = phone
         self.website = website
         self.created_at = datetime.utcnow()
+        self.updated_at = self.created_at
         self.average_rating = 0.0
         self.total_reviews = 0
+        self.rating_sum = 0
+        self.rating_counts = {str(star): 0 for star in range(1, 6)}
 
     def to_dict(self):
         return {
@@ -21,13 +32,17 @@ class Restaurant:
             'address': self.address,
             'latitude': self.latitude,
             'longitude': self.longitude,
+            'location': geo_point(self.latitude, self.longitude),
             'style': self.style,
             'description': self.description,
             'phone': self.phone,
             'website': self.website,
             'created_at': self.created_at,
+            'updated_at': self.updated_at,
             'average_rating': self.average_rating,
-            'total_reviews': self.total_reviews
+            'total_reviews': self.total_reviews,
+            'rating_sum': self.rating_sum,
+            'rating_counts': self.rating_counts
         }
 
 class Review:
@@ -0,0 +1,57 @@
+from starlette.responses import StreamingResponse
+from starlette.routing import Route
+from routes.async_restaurants import JSONResponse, state, error_response
+from routes.export import EXPORT_BATCH_SIZE, EXPORT_FLUSH_DOCS, parse_since, restaurants_query, reviews_query
+from services.json_provider import dumps_bytes
+from services.purge import TOMBSTONED
+
+async def deleted_restaurant_ids(db):
+    """deleted_restaurant_ids on a Motor database"""
+    return [str(doc['_id']) async for doc in db.restaurants.find(TOMBSTONED, {'_id': 1})]
+
+async def ndjson_stream(cursor):
+    """Yield newline-delimited JSON in small chunks straight off a Motor cursor"""
+    try:
+        chunk = []
+        async for doc in cursor:
+            chunk.append(dumps_bytes(doc, JSONResponse.use_orjson))
+            if len(chunk) >= EXPORT_FLUSH_DOCS:
+                yield b'\n'.join(chunk) + b'\n'
+                chunk = []
+        if chunk:
+            yield b'\n'.join(chunk) + b'\n'
+    finally:
+        await cursor.close()
+
+def ndjson_response(collection, query):
+    return StreamingResponse(
+        ndjson_stream(collection.find(query).batch_size(EXPORT_BATCH_SIZE)),
+        media_type='application/x-ndjson',
+        headers={'X-Accel-Buffering': 'no'}
+    )
+
+async def export_restaurants(request):
+    try:
+        try:
+            since = parse_since(request.query_params.get('updated_since'))
+        except ValueError as e:
+            return error_response(str(e), 400)
+        return ndjson_response(state(request).db.restaurants, restaurants_query(since))
+    except Exception as e:
+        return error_response(str(e), 500)
+
+async def export_reviews(request):
+    try:
+        try:
+            since = parse_since(request.query_params.get('updated_since'))
+        except ValueError as e:
+            return error_response(str(e), 400)
+        db = state(request).db
+        return ndjson_response(db.reviews, reviews_query(since, await deleted_restaurant_ids(db)))
+    except Exception as e:
+        return error_response(str(e), 500)
+
+routes = [
+    Route('/api/export/restaurants', export_restaurants, methods=['GET'], name='export.export_restaurants'),
+    Route('/api/export/reviews', export_reviews, methods=['GET'], name='export.export_reviews'),
+]
@@ -0,0 +1,31 @@
+from starlette.routing import Route
+from routes.async_restaurants import JSONResponse, state, error_response, not_modified
+from routes.restaurants import allowed_cuisines, normalize_style, validators
+from services.pagination import parse_limit
+from services.versions import make_etag
+
+async def get_leaderboard(request):
+    try:
+        leaderboards = state(request).leaderboards
+
+        style = normalize_style(request.path_params['style'])
+        if style not in allowed_cuisines:
+            return error_response(f'Invalid cuisine type. Must be one of: {", ".join(allowed_cuisines)}', 400)
+        try:
+            limit = parse_limit(request.query_params.get('limit'), leaderboards.size, leaderboards.size)
+        except ValueError as e:
+            return error_response(str(e), 400)
+
+        entries, version = await leaderboards.top(state(request).db, style, limit)
+
+        etag = make_etag(f'leaderboard-{style}', version, (limit,))
+        response = not_modified(request, etag)
+        if response is not None:
+            return response
+        return JSONResponse(entries, headers=validators(etag))
+    except Exception as e:
+        return error_response(str(e), 500)
+
+routes = [
+    Route('/api/leaderboards/{style}', get_leaderboard, methods=['GET'], name='leaderboards.get_leaderboard'),
+]
@@ -0,0 +1,433 @@
+import asyncio
+from bson import ObjectId
+from datetime import datetime
+from pymongo.errors import BulkWriteError
+from starlette.responses import Response
+from starlette.routing import Route
+from werkzeug.http import parse_etags
+from models.restaurant import NOT_DELETED
+from routes.restaurants import (
+    BULK_INSERT_CHUNK, REVIEW_ORDER, REVIEW_PAGE_SIZE, MAX_REVIEW_PAGE_SIZE, REVIEW_QUEUE_FULL,
+    validators, list_args, search_args, restaurant_filter, list_page, round_distances,
+    styles_pipeline, search_cursor_key, review_page, review_cursor_key, restaurant_error, restaurant_from_payload,
+    review_error, review_from_payload, bulk_items, chunk_failures, record_chunk, restaurant_docs,
+    review_candidates, referenced_restaurants, review_docs, ratings_by_restaurant, bulk_report,
+    DETAIL_PROJECTION, detail_key, detail_etag
+)
+from services.geo import near_pipeline, split_near_page, within_radius
+from services.json_provider import dumps_bytes
+from services.pagination import parse_limit, decode_cursor, split_page
+from services.ratings import apply_ratings_async, apply_rating_batches_async
+from services.search import search_pipeline
+from services.versions import get_version_async, bump_version_async, make_etag
+
+# Async counterparts of the routes in routes/restaurants.py: same paths,
+# status codes, headers and bodies, with every Mongo call awaited on Motor.
+# Validation, query building and paging are shared with the sync routes.
+
+class JSONResponse(Response):
+    """JSON encoded like the Flask app's provider (ObjectId/datetime aware, orjson when enabled)"""
+
+    media_type = 'application/json'
+    use_orjson = False
+
+    def render(self, content):
+        return dumps_bytes(content, self.use_orjson) + b'\n'
+
+def state(request):
+    """Per-app resources (db, response_cache, leaderboards, config) set up by create_asgi_app"""
+    return request.app.state
+
+def error_response(message, status_code):
+    return JSONResponse({'error': message}, status_code)
+
+def not_modified(request, etag):
+    """304 response if the client already holds `etag`, or None"""
+    if not parse_etags(request.headers.get('if-none-match')).contains(etag):
+        return None
+    return Response(status_code=304, headers=validators(etag))
+
+def cached_response(request, key):
+    """Rebuild a 200 response from the cache, or None on a miss"""
+    entry = state(request).response_cache.get(key)
+    if entry is None:
+        return None
+    body, headers = entry
+    return Response(body, 200, headers, media_type='application/json')
+
+def json_response(request, key, payload, headers=None):
+    """Encode `payload` once, store the bytes under `key` and return the response"""
+    headers = headers or {}
+    body = dumps_bytes(payload, JSONResponse.use_orjson) + b'\n'
+    state(request).response_cache.set(key, (body, headers))
+    return Response(body, 200, headers, media_type='application/json')
+
+def invalidate_restaurant(request, restaurant_id=None, styles=False):
+    """Drop cached responses made stale by a write to a restaurant; `styles` when one was added or removed"""
+    invalidate_cache(state(request).response_cache, restaurant_id, styles)
+
+def invalidate_cache(cache, restaurant_id=None, styles=False):
+    """invalidate_restaurant outside a request, e.g. from the review flusher thread"""
+    cache.invalidate_namespace('list')
+    cache.invalidate_namespace('search')
+    if styles:
+        cache.invalidate_namespace('styles')
+    if restaurant_id:
+        cache.invalidate_prefix(('detail', restaurant_id))
+
+async def request_json(request):
+    """Decoded JSON body; ValueError if it is missing or malformed"""
+    try:
+        return await request.json()
+    except ValueError:
+        raise ValueError('Request body must be valid JSON')
+
+async def insert_in_chunks(collection, docs, indexes, results, on_chunk):
+    """insert_in_chunks of routes/restaurants.py on a Motor collection; `on_chunk` is awaited"""
+    for start in range(0, len(docs), BULK_INSERT_CHUNK):
+        chunk = docs[start:start + BULK_INSERT_CHUNK]
+        failed = {}
+        try:
+            await collection.insert_many(chunk, ordered=False)
+        except BulkWriteError as e:
+            failed = chunk_failures(e)
+        inserted = record_chunk(chunk, start, failed, indexes, results)
+        if inserted:
+            await on_chunk(inserted)
+
+def discard(task, response):
+    """Return `response`, dropping a speculative query it made unnecessary"""
+    if not task.cancel() and not task.cancelled():
+        # Already finished: retrieve a failure so it is not reported as unhandled
+        task.exception()
+    return response
+
+async def get_restaurants(request):
+    try:
+        db = state(request).db
+
+        try:
+            styles, location, sort, limit, cursor, after = list_args(request.query_params)
+        except ValueError as e:
+            return error_response(str(e), 400)
+
+        version = await get_version_async(db, 'restaurants')
+        cache_key = ('list', version, styles, location, sort, limit, cursor)
+        etag = make_etag('restaurants', version, cache_key[2:])
+        response = not_modified(request, etag) or cached_response(request, cache_key)
+        if response is not None:
+            return response
+
+        query = restaurant_filter(styles)
+        if location:
+            docs = await db.restaurants.aggregate(near_pipeline(query, *location, limit + 1, after)).to_list(None)
+            restaurants, next_cursor = split_near_page(docs, limit, after)
+            round_distances(restaurants)
+        else:
+            query, order, cursor_key = list_page(query, sort, after)
+            docs = await db.restaurants.find(query).sort(order).limit(limit + 1).to_list(None)
+            restaurants, next_cursor = split_page(docs, limit, cursor_key)
+
+        headers = validators(etag)
+        if next_cursor:
+            headers['X-Next-Cursor'] = next_cursor
+        return json_response(request, cache_key, restaurants, headers)
+    except Exception as e:
+        return error_response(str(e), 500)
+
+async def search_restaurants(request):
+    try:
+        db = state(request).db
+
+        try:
+            text, styles, location, limit, cursor, after = search_args(request.query_params)
+        except ValueError as e:
+            return error_response(str(e), 400)
+
+        version = await get_version_async(db, 'restaurants')
+        cache_key = ('search', version, text.lower(), styles, location, limit, cursor)
+        etag = make_etag('restaurants-search', version, cache_key[2:])
+        response = not_modified(request, etag) or cached_response(request, cache_key)
+        if response is not None:
+            return response
+
+        query = restaurant_filter(styles)
+        if location:
+            query['location'] = within_radius(*location)
+
+        docs = await db.restaurants.aggregate(search_pipeline(text, query, limit + 1, after)).to_list(None)
+        restaurants, next_cursor = split_page(docs, limit, search_cursor_key)
+
+        headers = validators(etag)
+        if next_cursor:
+            headers['X-Next-Cursor'] = next_cursor
+        return json_response(request, cache_key, restaurants, headers)
+    except Exception as e:
+        return error_response(str(e), 500)
+
+async def get_styles(request):
+    try:
+        db = state(request).db
+        version = await get_version_async(db, 'styles')
+        cache_key = ('styles', version)
+        etag = make_etag('restaurants-styles', version, ())
+        response = not_modified(request, etag) or cached_response(request, cache_key)
+        if response is not None:
+            return response
+
+        styles = await db.restaurants.aggregate(styles_pipeline()).to_list(None)
+        return json_response(request, cache_key, styles, validators(etag))
+    except Exception as e:
+        return error_response(str(e), 500)
+
+async def add_restaurant(request):
+    try:
+        db = state(request).db
+        try:
+            data = await request_json(request)
+        except ValueError as e:
+            return error_response(str(e), 400)
+
+        error = restaurant_error(data)
+        if error:
+            return error_response(error, 400)
+
+        doc = restaurant_from_payload(data).to_dict()
+        result = await db.restaurants.insert_one(doc)
+        await asyncio.gather(
+            state(request).leaderboards.record(db, doc),
+            bump_version_async(db, 'restaurants'),
+            bump_version_async(db, 'styles')
+        )
+        invalidate_restaurant(request, styles=True)
+        return JSONResponse({'id': str(result.inserted_id), 'message': 'Restaurant added successfully'}, 201)
+    except Exception as e:
+        return error_response(str(e), 500)
+
+async def add_restaurants_bulk(request):
+    try:
+        db = state(request).db
+
+        try:
+            items = bulk_items(await request_json(request), 'restaurants')
+        except ValueError as e:
+            return error_response(str(e), 400)
+
+        results = [None] * len(items)
+        docs, indexes = restaurant_docs(items, results)
+
+        async def record_restaurants(inserted):
+            await asyncio.gather(
+                state(request).leaderboards.record_many(db, [doc['_id'] for doc in inserted]),
+                bump_version_async(db, 'restaurants'),
+                bump_version_async(db, 'styles')
+            )
+            invalidate_restaurant(request, styles=True)
+
+        await insert_in_chunks(db.restaurants, docs, indexes, results, record_restaurants)
+
+        return JSONResponse(bulk_report(results))
+    except Exception as e:
+        return error_response(str(e), 500)
+
+async def get_restaurant(request):
+    try:
+        db = state(request).db
+        restaurant_id = request.path_params['restaurant_id']
+
+        if not ObjectId.is_valid(restaurant_id):
+            return error_response('Invalid restaurant ID format', 400)
+
+        # Revalidations and cache hits only need reviews_version
+        query = dict(NOT_DELETED, _id=ObjectId(restaurant_id))
+        restaurant = await db.restaurants.find_one(query, {'reviews_version': 1})
+        if not restaurant:
+            return error_response('Restaurant not found', 404)
+
+        version = restaurant.get('reviews_version', 0)
+        response = not_modified(request, detail_etag(restaurant_id, version)) or cached_response(request, detail_key(restaurant_id, version))
+        if response is not None:
+            return response
+
+        # On a miss the document and its latest reviews are read concurrently
+        restaurant, reviews = await asyncio.gather(
+            db.restaurants.find_one(query, DETAIL_PROJECTION),
+            db.reviews.find({'restaurant_id': restaurant_id})
+            .sort(REVIEW_ORDER)
+            .limit(state(request).config['REVIEW_EMBED_LIMIT'])
+            .to_list(None)
+        )
+        if not restaurant:
+            return error_response('Restaurant not found', 404)
+
+        version = restaurant.get('reviews_version', 0)
+        restaurant['reviews'] = reviews
+        return json_response(request, detail_key(restaurant_id, version), restaurant, validators(detail_etag(restaurant_id, version)))
+    except Exception as e:
+        return error_response(str(e), 500)
+
+async def delete_restaurant(request):
+    try:
+        db = state(request).db
+        restaurant_id = request.path_params['restaurant_id']
+
+        if not ObjectId.is_valid(restaurant_id):
+            return error_response('Invalid restaurant ID format', 400)
+        object_id = ObjectId(restaurant_id)
+
+        # Tombstone only; the purge worker removes the reviews and the document
+        deleted = await db.restaurants.find_one_and_update(
+            dict(NOT_DELETED, _id=object_id),
+            {'$set': {'deleted_at': datetime.utcnow()}, '$currentDate': {'updated_at': True}},
+            projection={'style': 1}
+        )
+        if deleted is None:
+            return error_response('Restaurant not found', 404)
+
+        await asyncio.gather(
+            state(request).leaderboards.remove(db, deleted.get('style'), object_id),
+            bump_version_async(db, 'restaurants'),
+            bump_version_async(db, 'styles')
+        )
+        invalidate_restaurant(request, restaurant_id, styles=True)
+
+        return JSONResponse({
+            'message': 'Restaurant deleted successfully',
+            'deleted_id': restaurant_id
+        })
+    except Exception as e:
+        return error_response(str(e), 500)
+
+async def add_review(request):
+    try:
+        db = state(request).db
+        restaurant_id = request.path_params['restaurant_id']
+
+        if not ObjectId.is_valid(restaurant_id):
+            return error_response('Invalid restaurant ID format', 400)
+
+        try:
+            data = await request_json(request)
+        except ValueError as e:
+            return error_response(str(e), 400)
+
+        error = review_error(data)
+        if error:
+            return error_response(error, 400)
+
+        review = review_from_payload(restaurant_id, data)
+
+        # Write-behind mode: the flusher thread inserts the review and folds its rating later
+        review_queue = state(request).review_queue
+        if review_queue is not None:
+            # An _id-only lookup, so a review the flusher would discard is refused now
+            if not await db.restaurants.find_one(dict(NOT_DELETED, _id=ObjectId(restaurant_id)), {'_id': 1}):
+                return error_response('Restaurant not found', 404)
+            doc = review.to_dict()
+            if not review_queue.submit(doc):
+                response = error_response(REVIEW_QUEUE_FULL, 503)
+                response.headers['Retry-After'] = str(review_queue.retry_after)
+                return response
+            return JSONResponse({'message': 'Review accepted', 'id': str(doc['_id'])}, 202)
+
+        # Insert first, as the Flask app does: if the insert fails the aggregate
+        # was never touched, and a missing restaurant only costs a compensating delete
+        result = await db.reviews.insert_one(review.to_dict())
+        
+        # Update the restaurant's running aggregate; this doubles as the existence check
+        aggregate = await apply_ratings_async(db, restaurant_id, [review.rating])
+        if aggregate is None:
+            await db.reviews.delete_one({'_id': result.inserted_id})
+            return error_response('Restaurant not found', 404)
+
+        await asyncio.gather(
+            state(request).leaderboards.record(db, aggregate),
+            bump_version_async(db, 'restaurants')
+        )
+        invalidate_restaurant(request, restaurant_id)
+
+        return JSONResponse({'message': 'Review added successfully'}, 201)
+    except Exception as e:
+        return error_response(str(e), 500)
+
+async def add_reviews_bulk(request):
+    try:
+        db = state(request).db
+
+        try:
+            items = bulk_items(await request_json(request), 'reviews')
+        except ValueError as e:
+            return error_response(str(e), 400)
+
+        results = [None] * len(items)
+        candidates = review_candidates(items, results)
+
+        existing = {str(doc['_id']) async for doc in db.restaurants.find(referenced_restaurants(candidates), {'_id': 1})}
+        docs, indexes = review_docs(candidates, existing, results)
+
+
+        async def record_reviews(inserted):
+            updated = await apply_rating_batches_async(db, ratings_by_restaurant(inserted))
+            if updated:
+                await asyncio.gather(
+                    state(request).leaderboards.record_many(db, [ObjectId(restaurant_id) for restaurant_id in updated]),
+                    bump_version_async(db, 'restaurants')
+                )
+                for restaurant_id in updated:
+                    invalidate_restaurant(request, restaurant_id)
+
+        await insert_in_chunks(db.reviews, docs, indexes, results, record_reviews)
+
+        return JSONResponse(bulk_report(results))
+    except Exception as e:
+        return error_response(str(e), 500)
+
+async def get_reviews(request):
+    try:
+        db = state(request).db
+        restaurant_id = request.path_params['restaurant_id']
+
+        if not ObjectId.is_valid(restaurant_id):
+            return error_response('Invalid restaurant ID format', 400)
+
+        cursor = request.query_params.get('cursor')
+        try:
+            limit = parse_limit(request.query_params.get('limit'), REVIEW_PAGE_SIZE, MAX_REVIEW_PAGE_SIZE)
+            after = decode_cursor(cursor, 2) if cursor else None
+        except ValueError as e:
+            return error_response(str(e), 400)
+
+        # The page is read alongside the restaurant's version lookup
+        page = asyncio.ensure_future(
+            db.reviews.find(review_page(restaurant_id, after)).sort(REVIEW_ORDER).limit(limit + 1).to_list(None)
+        )
+        restaurant = await db.restaurants.find_one(dict(NOT_DELETED, _id=ObjectId(restaurant_id)), {'reviews_version': 1})
+        if not restaurant:
+            return discard(page, error_response('Restaurant not found', 404))
+
+        etag = make_etag(f'reviews-{restaurant_id}', restaurant.get('reviews_version', 0), (limit, cursor))
+        response = not_modified(request, etag)
+        if response is not None:
+            return discard(page, response)
+
+        reviews, next_cursor = split_page(await page, limit, review_cursor_key)
+        headers = validators(etag)
+        if next_cursor:
+            headers['X-Next-Cursor'] = next_cursor
+        return JSONResponse(reviews, headers=headers)
+    except Exception as e:
+        return error_response(str(e), 500)
+
+# Route names match the Flask endpoints so metrics carry the same labels in both modes
+routes = [
+    Route('/api/restaurants', get_restaurants, methods=['GET'], name='restaurants.get_restaurants'),
+    Route('/api/restaurants', add_restaurant, methods=['POST'], name='restaurants.add_restaurant'),
+    Route('/api/restaurants/search', search_restaurants, methods=['GET'], name='restaurants.search_restaurants'),
+    Route('/api/restaurants/styles', get_styles, methods=['GET'], name='restaurants.get_styles'),
+    Route('/api/restaurants/bulk', add_restaurants_bulk, methods=['POST'], name='restaurants.add_restaurants_bulk'),
+    Route('/api/restaurants/{restaurant_id}', get_restaurant, methods=['GET'], name='restaurants.get_restaurant'),
+    Route('/api/restaurants/{restaurant_id}', delete_restaurant, methods=['DELETE'], name='restaurants.delete_restaurant'),
+    Route('/api/restaurants/{restaurant_id}/reviews', add_review, methods=['POST'], name='restaurants.add_review'),
+    Route('/api/restaurants/{restaurant_id}/reviews', get_reviews, methods=['GET'], name='restaurants.get_reviews'),
+    Route('/api/reviews/bulk', add_reviews_bulk, methods=['POST'], name='restaurants.add_reviews_bulk'),
+]
@@ -0,0 +1,105 @@
+from flask import Blueprint, request, jsonify, current_app, Response
+from datetime import datetime, timezone
+from models.restaurant import NOT_DELETED
+from services.purge import TOMBSTONED
+
+export_bp = Blueprint('export', __name__)
+
+# Documents fetched per getMore and documents written per chunk of output
+EXPORT_BATCH_SIZE = 1000
+EXPORT_FLUSH_DOCS = 100
+
+def get_mongo():
+    """Get mongo instance from current app"""
+    return current_app.mongo
+
+def parse_since(value):
+    """Parse an ISO 8601 `updated_since` value into a naive UTC datetime"""
+    if not value:
+        return None
+    try:
+        since = datetime.fromisoformat(value.replace('Z', '+00:00'))
+    except ValueError:
+        raise ValueError('updated_since must be an ISO 8601 timestamp')
+    if since.tzinfo is not None:
+        since = since.astimezone(timezone.utc).replace(tzinfo=None)
+    return since
+
+def restaurants_query(since):
+    # Deleted restaurants are left out while their tombstones await purge
+    query = dict(NOT_DELETED)
+    if since:
+        # Documents written before updated_at existed fall back to created_at
+        query['$or'] = [
+            {'updated_at': {'$gte': since}},
+            {'updated_at': {'$exists': False}, 'created_at': {'$gte': since}}
+        ]
+    return query
+
+def reviews_query(since, deleted_ids):
+    # Reviews are immutable, so created_at is their last update
+    query = {'created_at': {'$gte': since}} if since else {}
+    # Reviews of deleted restaurants are left out with them until the purge removes both
+    if deleted_ids:
+        query['restaurant_id'] = {'$nin': deleted_ids}
+    return query
+
+def deleted_restaurant_ids(db):
+    """Ids of the tombstones awaiting purge; few, and read off the partial deleted_at index"""
+    return [str(doc['_id']) for doc in db.restaurants.find(TOMBSTONED, {'_id': 1})]
+
+def ndjson_stream(cursor, encode):
+    """Yield newline-delimited JSON in small chunks straight off a Mongo cursor"""
+    try:
+        chunk = []
+        for doc in cursor:
+            chunk.append(encode(doc))
+            if len(chunk) >= EXPORT_FLUSH_DOCS:
+                yield b'\n'.join(chunk) + b'\n'
+                chunk = []
+        if chunk:
+            yield b'\n'.join(chunk) + b'\n'
+    finally:
+        cursor.close()
+
+def ndjson_response(collection, query, event):
+    cursor = collection.find(query).batch_size(EXPORT_BATCH_SIZE)
+    current_app.logger.info(
+        f'Streaming {collection.name} export',
+        extra={'event': event, 'collection': collection.name, 'operation': 'find'}
+    )
+    return Response(
+        ndjson_stream(cursor, current_app.json.dumps_bytes),
+        mimetype='application/x-ndjson',
+        # Let nginx pass chunks through instead of buffering the whole export
+        headers={'X-Accel-Buffering': 'no'}
+    )
+
+@export_bp.route('/api/export/restaurants', methods=['GET'])
+def export_restaurants():
+    try:
+        mongo = get_mongo()
+        
+        try:
+            since = parse_since(request.args.get('updated_since'))
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        
+        return ndjson_response(mongo.db.restaurants, restaurants_query(since), 'restaurants_export')
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@export_bp.route('/api/export/reviews', methods=['GET'])
+def export_reviews():
+    try:
+        mongo = get_mongo()
+        
+        try:
+            since = parse_since(request.args.get('updated_since'))
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        
+        query = reviews_query(since, deleted_restaurant_ids(mongo.db))
+        return ndjson_response(mongo.db.reviews, query, 'reviews_export')
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
@@ -0,0 +1,42 @@
+from flask import Blueprint, request, jsonify, current_app
+from routes.restaurants import allowed_cuisines, normalize_style, validators, not_modified
+from services.pagination import parse_limit
+from services.versions import make_etag
+
+leaderboards_bp = Blueprint('leaderboards', __name__)
+
+def get_mongo():
+    """Get mongo instance from current app"""
+    return current_app.mongo
+
+def get_leaderboards():
+    """Get leaderboards from current app"""
+    return current_app.leaderboards
+
+@leaderboards_bp.route('/api/leaderboards/<style>', methods=['GET'])
+def get_leaderboard(style):
+    try:
+        mongo = get_mongo()
+        leaderboards = get_leaderboards()
+
+        style = normalize_style(style)
+        if style not in allowed_cuisines:
+            return jsonify({'error': f'Invalid cuisine type. Must be one of: {", ".join(allowed_cuisines)}'}), 400
+        try:
+            limit = parse_limit(request.args.get('limit'), leaderboards.size, leaderboards.size)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+
+        # One document read, sliced to `limit` entries by the server
+        entries, version = leaderboards.top(mongo.db, style, limit)
+
+        etag = make_etag(f'leaderboard-{style}', version, (limit,))
+        response = not_modified(etag)
+        if response is not None:
+            return response
+
+        response = jsonify(entries)
+        response.headers.update(validators(etag))
+        return response, 200
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
@@ -1,39 +1,392 @@
 from flask import Blueprint, request, jsonify, current_app
 from bson import ObjectId
 from datetime import datetime
-from models.restaurant import Restaurant, Review
+from models.restaurant import Restaurant, Review, NOT_DELETED
+from pymongo.errors import BulkWriteError
+from services.ratings import apply_ratings, apply_rating_batches
+from services.pagination import parse_limit, decode_cursor, split_page
+from services.geo import DEFAULT_RADIUS_KM, MAX_RADIUS_KM, validate_coordinates, near_pipeline, split_near_page, within_radius
+from services.search import normalize_query, search_pipeline
+from services.versions import get_version, bump_version, make_etag
 
 restaurants_bp = Blueprint('restaurants', __name__)
 allowed_cuisines = ['pizza', 'burger', 'israeli', 'cafe', 'pita', 'high_cuisine', 'italian', 'asian', 'vegetarian', 'bakery']
 
+# List orderings: by _id (insertion order) or by average rating, best first
+LIST_SORTS = ('id', 'rating')
+
+# Bulk ingest: max items per request and documents per insert_many call
+MAX_BULK_ITEMS = 10000
+BULK_INSERT_CHUNK = 1000
+
+# Reviews are listed newest first; ties on created_at are broken by _id
+REVIEW_ORDER = [('created_at', -1), ('_id', -1)]
+REVIEW_PAGE_SIZE = 20
+MAX_REVIEW_PAGE_SIZE = 100
+
+# Clients may store responses but must revalidate them with If-None-Match
+CACHE_CONTROL = 'no-cache'
+
+# Write-behind mode (REVIEW_WRITE_BEHIND): 503 body when the review queue is full
+REVIEW_QUEUE_FULL = 'Too many reviews waiting to be written, please retry later'
+
 def get_mongo():
     """Get mongo instance from current app"""
     return current_app.mongo
 
-def serialize_doc(doc):
-    """Convert MongoDB document to JSON serializable format"""
-    if doc is None:
+def get_cache():
+    """Get response cache from current app"""
+    return current_app.response_cache
+
+def get_leaderboards():
+    """Get leaderboards from current app"""
+    return current_app.leaderboards
+
+def validators(etag):
+    """Headers that let clients revalidate a representation"""
+    return {'ETag': f'"{etag}"', 'Cache-Control': CACHE_CONTROL}
+
+def not_modified(etag):
+    """304 response if the client already holds `etag`, or None"""
+    if not request.if_none_match.contains(etag):
         return None
+    return current_app.response_class(status=304, headers=validators(etag))
+
+def cached_response(key):
+    """Rebuild a 200 response from the cache, or None on a miss"""
+    entry = get_cache().get(key)
+    if entry is None:
+        return None
+    body, headers = entry
+    return current_app.response_class(body, status=200, mimetype='application/json', headers=headers)
+
+def json_response(key, payload, headers=None):
+    """Encode `payload` once, store the bytes under `key` and return the response"""
+    headers = headers or {}
+    response = jsonify(payload)
+    response.headers.update(headers)
+    get_cache().set(key, (response.get_data(), headers))
+    return response
+
+def invalidate_restaurant(restaurant_id=None, styles=False):
+    """Drop cached responses made stale by a write to a restaurant; `styles` when one was added or removed"""
+    cache = get_cache()
+    cache.invalidate_namespace('list')
+    cache.invalidate_namespace('search')
+    if styles:
+        cache.invalidate_namespace('styles')
+    if restaurant_id:
+        # Detail entries are keyed ('detail', id, reviews_version); drop every version
+        cache.invalidate_prefix(('detail', restaurant_id))
+
+# The detail response is keyed on reviews_version, which moves in the same write as the
+# rating aggregate; weighted_rating is written after it by the leaderboards, so it is left out
+DETAIL_PROJECTION = {'weighted_rating': 0}
+
+def detail_key(restaurant_id, version):
+    return ('detail', restaurant_id, version)
+
+def detail_etag(restaurant_id, version):
+    return make_etag(f'restaurant-{restaurant_id}', version)
+
+def detail_hit(restaurant_id, version):
+    """304 or cached detail response for `version` of a restaurant, or None"""
+    response = not_modified(detail_etag(restaurant_id, version))
+    if response is None:
+        response = cached_response(detail_key(restaurant_id, version))
+    return response
+
+def record_review_writes(db, updated):
+    """Leaderboards, list version and cache after new reviews changed the `updated` restaurants"""
+    get_leaderboards().record_many(db, [ObjectId(restaurant_id) for restaurant_id in updated])
+    bump_version(db, 'restaurants')
+    for restaurant_id in updated:
+        invalidate_restaurant(restaurant_id)
+
+def normalize_style(style):
+    """Canonical stored form of a cuisine: exactly one of allowed_cuisines"""
+    return style.strip().lower()
+
+def parse_styles(value):
+    """
+    Parse the `style` query argument ('pizza' or 'pizza,burger') into a
+    sorted tuple of normalized cuisines; raises ValueError on unknown ones.
+    """
+    if not value:
+        return ()
+    styles = {normalize_style(style) for style in value.split(',') if style.strip()}
+    unknown = styles.difference(allowed_cuisines)
+    if unknown:
+        raise ValueError(f'Invalid cuisine type: {", ".join(sorted(unknown))}. Must be one of: {", ".join(allowed_cuisines)}')
+    return tuple(sorted(styles))
+
+def float_arg(args, name, default=None):
+    """Query argument `name` as a float; `default` when absent or not a number"""
+    try:
+        return float(args[name])
+    except (KeyError, TypeError, ValueError):
+        return default
+
+def parse_location(args):
+    """
+    (lat, lng, radius_km) from the query arguments, or None when lat/lng are
+    absent; raises ValueError on invalid values
+    """
+    lat = float_arg(args, 'lat')
+    lng = float_arg(args, 'lng')
+    if lat is None or lng is None:
+        return None
+    radius = float_arg(args, 'radius', DEFAULT_RADIUS_KM)
+    validate_coordinates(lat, lng)
+    if radius <= 0:
+        raise ValueError('radius must be positive')
+    return lat, lng, min(radius, MAX_RADIUS_KM)
+
+def style_filter(styles):
+    """Exact-match condition on the stored style, served by the style indexes"""
+    if len(styles) == 1:
+        return styles[0]
+    return {'$in': list(styles)}
+
+def list_args(args):
+    """(styles, location, sort, limit, cursor, after) of a list request; raises ValueError"""
+    sort = args.get('sort', 'id')
+    cursor = args.get('cursor')
+    styles = parse_styles(args.get('style'))
+    location = parse_location(args)
+    limit = parse_limit(args.get('limit'))
+    if sort not in LIST_SORTS:
+        raise ValueError(f'sort must be one of: {", ".join(LIST_SORTS)}')
+    if location and sort != 'id':
+        raise ValueError('Nearby results are ordered by distance; sort is not supported with lat/lng')
+    after = decode_cursor(cursor, 2 if location or sort == 'rating' else 1) if cursor else None
+    return styles, location, sort, limit, cursor, after
+
+def search_args(args):
+    """(text, styles, location, limit, cursor, after) of a search request; raises ValueError"""
+    cursor = args.get('cursor')
+    text = normalize_query(args.get('q'))
+    styles = parse_styles(args.get('style'))
+    location = parse_location(args)
+    limit = parse_limit(args.get('limit'))
+    after = decode_cursor(cursor, 2) if cursor else None
+    return text, styles, location, limit, cursor, after
+
+def restaurant_filter(styles):
+    """Live restaurants of `styles`; styles are stored normalized, so this is an index range scan"""
+    query = dict(NOT_DELETED)
+    if styles:
+        query['style'] = style_filter(styles)
+    return query
+
+def styles_pipeline():
+    """One row per cuisine style of the live restaurants: count and mean coordinates"""
+    return [
+        {'$match': dict(NOT_DELETED)},
+        {'$group': {
+            '_id': '$style',
+            'count': {'$sum': 1},
+            'latitude': {'$avg': '$latitude'},
+            'longitude': {'$avg': '$longitude'}
+        }},
+        {'$sort': {'_id': 1}},
+        {'$project': {'_id': 0, 'style': '$_id', 'count': 1, 'latitude': 1, 'longitude': 1}}
+    ]
+
+def list_page(query, sort, after):
+    """(query, order, cursor_key) of the keyset page after `after` in `sort` order"""
+    if sort == 'rating':
+        # Keyset on (average_rating desc, _id asc), served by
+        # {style: 1, average_rating: -1, _id: 1} / {average_rating: -1, _id: 1}
+        if after is not None:
+            query['$or'] = [
+                {'average_rating': {'$lt': after[0]}},
+                {'average_rating': after[0], '_id': {'$gt': after[1]}}
+            ]
+        return query, [('average_rating', -1), ('_id', 1)], lambda doc: (doc.get('average_rating', 0.0), doc['_id'])
     
-    if isinstance(doc, list):
-        return [serialize_doc(item) for item in doc]
+    # Resume after the last _id of the previous page
+    if after is not None:
+        query['_id'] = {'$gt': after[0]}
+    return query, [('_id', 1)], lambda doc: (doc['_id'],)
+
+def round_distances(restaurants):
+    for restaurant in restaurants:
+        restaurant['distance_m'] = round(restaurant['distance_m'], 1)
+
+def search_cursor_key(doc):
+    return doc['score'], doc['_id']
+
+def review_page(restaurant_id, after):
+    """Query for the reviews of a restaurant after (created_at, _id) of the previous page, newest first"""
+    query = {'restaurant_id': restaurant_id}
+    if after is not None:
+        created_at, last_id = after
+        query['$or'] = [
+            {'created_at': {'$lt': created_at}},
+            {'created_at': created_at, '_id': {'$lt': last_id}}
+        ]
+    return query
+
+def review_cursor_key(doc):
+    return doc['created_at'], doc['_id']
+
+def restaurant_error(data):
+    """Validation error for a restaurant payload, or None if it is valid"""
+    if not isinstance(data, dict):
+        return 'Restaurant must be a JSON object'
+    
+    # Validate required fields
+    required_fields = ['name', 'address', 'latitude', 'longitude', 'style']
+    for field in required_fields:
+        if field not in data:
+            return f'Missing required field: {field}'
+    
+    try:
+        validate_coordinates(data['latitude'], data['longitude'])
+    except ValueError as e:
+        return str(e)
     
-    if isinstance(doc, dict):
-        result = {}
-        for key, value in doc.items():
-            if isinstance(value, ObjectId):
-                result[key] = str(value)
-            elif isinstance(value, datetime):
-                result[key] = value.isoformat()
-            elif isinstance(value, dict):
-                result[key] = serialize_doc(value)
-            elif isinstance(value, list):
-                result[key] = serialize_doc(value)
-            else:
-                result[key] = value
-        return result
+    # Validate cuisine type before creating the Restaurant object
+    if not isinstance(data['style'], str) or normalize_style(data['style']) not in allowed_cuisines:
+        return f'Invalid cuisine type. Must be one of: {", ".join(allowed_cuisines)}'
     
-    return doc
+    return None
+
+def restaurant_from_payload(data):
+    return Restaurant(
+        name=data['name'],
+        address=data['address'],
+        latitude=data['latitude'],
+        longitude=data['longitude'],
+        style=normalize_style(data['style']),
+        description=data.get('description', ''),
+        phone=data.get('phone', ''),
+        website=data.get('website', '')
+    )
+
+def review_error(data):
+    """Validation error for a review payload, or None if it is valid"""
+    if not isinstance(data, dict):
+        return 'Review must be a JSON object'
+    
+    # Validate required fields
+    required_fields = ['user_name', 'rating']
+    for field in required_fields:
+        if field not in data:
+            return f'Missing required field: {field}'
+    
+    # Validate rating
+    rating = data['rating']
+    if isinstance(rating, bool) or not isinstance(rating, (int, float)) or not 1 <= rating <= 5:
+        return 'Rating must be between 1 and 5'
+    
+    return None
+
+def review_from_payload(restaurant_id, data):
+    return Review(
+        restaurant_id=restaurant_id,
+        user_name=data['user_name'],
+        rating=data['rating'],
+        comment=data.get('comment', '')
+    )
+
+def bulk_items(data, key):
+    """Items of a bulk request: a JSON array or an object holding one under `key`"""
+    if isinstance(data, dict):
+        data = data.get(key)
+    if not isinstance(data, list):
+        raise ValueError(f'Request body must be a JSON array of {key}')
+    if len(data) > MAX_BULK_ITEMS:
+        raise ValueError(f'At most {MAX_BULK_ITEMS} {key} per request')
+    return data
+
+def chunk_failures(error):
+    """{offset in chunk: message} from an unordered insert_many's BulkWriteError"""
+    return {failure['index']: failure.get('errmsg', 'Write failed') for failure in error.details['writeErrors']}
+
+def record_chunk(chunk, start, failed, indexes, results):
+    """Record the outcome of one inserted chunk in `results`; returns its inserted documents"""
+    inserted = []
+    for offset, doc in enumerate(chunk):
+        index = indexes[start + offset]
+        if offset in failed:
+            results[index] = {'index': index, 'status': 'error', 'error': failed[offset]}
+        else:
+            results[index] = {'index': index, 'status': 'created', 'id': str(doc['_id'])}
+            inserted.append(doc)
+    return inserted
+
+def insert_in_chunks(collection, docs, indexes, results, on_chunk):
+    """
+    Insert `docs` with unordered insert_many calls and record the outcome of
+    each one in `results[indexes[i]]`. `on_chunk(inserted)` runs after each
+    chunk that wrote anything, so aggregates and versions already cover the
+    earlier chunks if a later one fails.
+    """
+    for start in range(0, len(docs), BULK_INSERT_CHUNK):
+        chunk = docs[start:start + BULK_INSERT_CHUNK]
+        failed = {}
+        try:
+            collection.insert_many(chunk, ordered=False)
+        except BulkWriteError as e:
+            failed = chunk_failures(e)
+        inserted = record_chunk(chunk, start, failed, indexes, results)
+        if inserted:
+            on_chunk(inserted)
+
+def restaurant_docs(items, results):
+    """Documents of the valid restaurants in a bulk request; invalid ones are recorded in `results`"""
+    docs, indexes = [], []
+    for index, data in enumerate(items):
+        error = restaurant_error(data)
+        if error:
+            results[index] = {'index': index, 'status': 'error', 'error': error}
+        else:
+            docs.append(restaurant_from_payload(data).to_dict())
+            indexes.append(index)
+    return docs, indexes
+
+def review_candidates(items, results):
+    """(index, payload) of the valid reviews in a bulk request; invalid ones are recorded in `results`"""
+    candidates = []
+    for index, data in enumerate(items):
+        error = review_error(data)
+        if not error and not ObjectId.is_valid(data.get('restaurant_id')):
+            error = 'Invalid restaurant ID format'
+        if error:
+            results[index] = {'index': index, 'status': 'error', 'error': error}
+        else:
+            candidates.append((index, data))
+    return candidates
+
+def referenced_restaurants(candidates):
+    """Query for the live restaurants a batch of reviews refers to"""
+    referenced = {ObjectId(data['restaurant_id']) for _, data in candidates}
+    return dict(NOT_DELETED, _id={'$in': list(referenced)})
+
+def review_docs(candidates, existing, results):
+    """Documents of the candidate reviews whose restaurant is in `existing`"""
+    docs, indexes = [], []
+    for index, data in candidates:
+        restaurant_id = str(ObjectId(data['restaurant_id']))
+        if restaurant_id not in existing:
+            results[index] = {'index': index, 'status': 'error', 'error': 'Restaurant not found'}
+        else:
+            docs.append(review_from_payload(restaurant_id, data).to_dict())
+            indexes.append(index)
+    return docs, indexes
+
+def ratings_by_restaurant(reviews):
+    """{restaurant_id: [ratings]} of inserted reviews, so each restaurant is updated once"""
+    ratings = {}
+    for doc in reviews:
+        ratings.setdefault(doc['restaurant_id'], []).append(doc['rating'])
+    return ratings
+
+def bulk_report(results):
+    created = sum(1 for result in results if result['status'] == 'created')
+    return {'created': created, 'failed': len(results) - created, 'results': results}
 
 @restaurants_bp.route('/api/restaurants', methods=['GET'])
 def get_restaurants():
@@ -41,44 +394,52 @@ def get_restaurants():
         mongo = get_mongo()
         
         # Get query parameters
-        style = request.args.get('style')
-        lat = request.args.get('lat', type=float)
-        lng = request.args.get('lng', type=float)
-        radius = request.args.get('radius', default=10, type=float)
-        
-        # Build query
-        query = {}
-        if style:
-            query['style'] = {'$regex': style, '$options': 'i'}
-        
-        # If location provided, add geographic filtering
-        if lat and lng:
-            query['latitude'] = {
-                '$gte': lat - radius/111,  # Rough km to degree conversion
-                '$lte': lat + radius/111
-            }
-            query['longitude'] = {
-                '$gte': lng - radius/111,
-                '$lte': lng + radius/111
-            }
-        
-        restaurants = list(mongo.db.restaurants.find(query))
-        # Serialize the documents
-        serialized_restaurants = serialize_doc(restaurants)
-        
-        # Log structured data for EFK
-        current_app.logger.info(
+        try:
+            styles, location, sort, limit, cursor, after = list_args(request.args)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        
+        # The version counter moves on every restaurant write, so it identifies
+        # the current data without reading it
+        version = get_version(mongo.db, 'restaurants')
+        cache_key = ('list', version, styles, location, sort, limit, cursor)
+        etag = make_etag('restaurants', version, cache_key[2:])
+        response = not_modified(etag)
+        if response is None:
+            response = cached_response(cache_key)
+        if response is not None:
+            return response
+        
+        query = restaurant_filter(styles)
+        if location:
+            # Distance-ordered search served by the 2dsphere index on `location`
+            docs = list(mongo.db.restaurants.aggregate(
+                near_pipeline(query, *location, limit + 1, after)
+            ))
+            restaurants, next_cursor = split_near_page(docs, limit, after)
+            round_distances(restaurants)
+        else:
+            # Keyset pagination in _id or rating order
+            query, order, cursor_key = list_page(query, sort, after)
+            docs = list(mongo.db.restaurants.find(query).sort(order).limit(limit + 1))
+            restaurants, next_cursor = split_page(docs, limit, cursor_key)
+        
+        # Per-query detail is debug-only; the request itself is logged in after_request
+        current_app.logger.debug(
             f'Retrieved {len(restaurants)} restaurants',
             extra={
                 'event': 'database_query',
                 'collection': 'restaurants',
-                'operation': 'find',
+                'operation': 'geoNear' if location else 'find',
                 'result_count': len(restaurants),
-                'query_params': {'style': style, 'lat': lat, 'lng': lng, 'radius': radius}
+                'query_params': {'style': list(styles), 'location': location, 'sort': sort, 'limit': limit}
             }
         )
         
-        return jsonify(serialized_restaurants), 200
+        headers = validators(etag)
+        if next_cursor:
+            headers['X-Next-Cursor'] = next_cursor
+        return json_response(cache_key, restaurants, headers), 200
     except Exception as e:
         current_app.logger.error(
             f'Error retrieving restaurants: {str(e)}',
@@ -86,41 +447,126 @@ def get_restaurants():
         )
         return jsonify({'error': str(e)}), 500
 
+@restaurants_bp.route('/api/restaurants/search', methods=['GET'])
+def search_restaurants():
+    try:
+        mongo = get_mongo()
+        
+        try:
+            text, styles, location, limit, cursor, after = search_args(request.args)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        
+        # Same versioned key/ETag scheme as the list endpoint, so hot queries
+        # are answered from the cache until the next restaurant write
+        version = get_version(mongo.db, 'restaurants')
+        cache_key = ('search', version, text.lower(), styles, location, limit, cursor)
+        etag = make_etag('restaurants-search', version, cache_key[2:])
+        response = not_modified(etag)
+        if response is None:
+            response = cached_response(cache_key)
+        if response is not None:
+            return response
+        
+        # $text uses the text index on name/description; style and area narrow it.
+        # $geoNear cannot be combined with $text, so the area is a $geoWithin filter.
+        query = restaurant_filter(styles)
+        if location:
+            query['location'] = within_radius(*location)
+        
+        docs = list(mongo.db.restaurants.aggregate(search_pipeline(text, query, limit + 1, after)))
+        restaurants, next_cursor = split_page(docs, limit, search_cursor_key)
+        
+        current_app.logger.debug(
+            f'Search returned {len(restaurants)} restaurants',
+            extra={
+                'event': 'database_query',
+                'collection': 'restaurants',
+                'operation': 'text_search',
+                'result_count': len(restaurants),
+                'query_params': {'q': text, 'style': list(styles), 'location': location, 'limit': limit}
+            }
+        )
+        
+        headers = validators(etag)
+        if next_cursor:
+            headers['X-Next-Cursor'] = next_cursor
+        return json_response(cache_key, restaurants, headers), 200
+    except Exception as e:
+        current_app.logger.error(
+            f'Error searching restaurants: {str(e)}',
+            extra={'event': 'database_error', 'collection': 'restaurants', 'operation': 'text_search'}
+        )
+        return jsonify({'error': str(e)}), 500
+
+@restaurants_bp.route('/api/restaurants/styles', methods=['GET'])
+def get_styles():
+    try:
+        mongo = get_mongo()
+        
+        # A handful of rows, so clients can show every category without paging the whole list.
+        # Reviews do not change them: the styles version only moves when restaurants come and go
+        version = get_version(mongo.db, 'styles')
+        cache_key = ('styles', version)
+        etag = make_etag('restaurants-styles', version, ())
+        response = not_modified(etag)
+        if response is None:
+            response = cached_response(cache_key)
+        if response is not None:
+            return response
+        
+        styles = list(mongo.db.restaurants.aggregate(styles_pipeline()))
+        return json_response(cache_key, styles, validators(etag)), 200
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
 @restaurants_bp.route('/api/restaurants', methods=['POST'])
 def add_restaurant():
     try:
         mongo = get_mongo()
         data = request.get_json()
         
-        # Validate required fields
-        required_fields = ['name', 'address', 'latitude', 'longitude', 'style']
-        for field in required_fields:
-            if field not in data:
-                return jsonify({'error': f'Missing required field: {field}'}), 400
-        
-        # Validate cuisine type (MOVED HERE - BEFORE creating the Restaurant object)
-        if data['style'].lower() not in allowed_cuisines:
-            return jsonify({
-                'error': f'Invalid cuisine type. Must be one of: {", ".join(allowed_cuisines)}'
-            }), 400
-        
-        # Create restaurant object (AFTER validation)
-        restaurant = Restaurant(
-            name=data['name'],
-            address=data['address'],
-            latitude=data['latitude'],
-            longitude=data['longitude'],
-            style=data['style'],
-            description=data.get('description', ''),
-            phone=data.get('phone', ''),
-            website=data.get('website', '')
-        )
+        error = restaurant_error(data)
+        if error:
+            return jsonify({'error': error}), 400
+        
+        restaurant = restaurant_from_payload(data)
         
-        result = mongo.db.restaurants.insert_one(restaurant.to_dict())
+        doc = restaurant.to_dict()
+        result = mongo.db.restaurants.insert_one(doc)
+        get_leaderboards().record(mongo.db, doc)
+        bump_version(mongo.db, 'restaurants')
+        bump_version(mongo.db, 'styles')
+        invalidate_restaurant(styles=True)
         return jsonify({'id': str(result.inserted_id), 'message': 'Restaurant added successfully'}), 201
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+@restaurants_bp.route('/api/restaurants/bulk', methods=['POST'])
+def add_restaurants_bulk():
+    try:
+        mongo = get_mongo()
+        
+        try:
+            items = bulk_items(request.get_json(), 'restaurants')
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        
+        results = [None] * len(items)
+        docs, indexes = restaurant_docs(items, results)
+        
+        def record_restaurants(inserted):
+            get_leaderboards().record_many(mongo.db, [doc['_id'] for doc in inserted])
+            bump_version(mongo.db, 'restaurants')
+            bump_version(mongo.db, 'styles')
+            invalidate_restaurant(styles=True)
+        
+        insert_in_chunks(mongo.db.restaurants, docs, indexes, results, record_restaurants)
+        
+        return jsonify(bulk_report(results)), 200
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
 @restaurants_bp.route('/api/restaurants/<restaurant_id>', methods=['GET'])
 def get_restaurant(restaurant_id):
     try:
@@ -130,18 +576,32 @@ def get_restaurant(restaurant_id):
         if not ObjectId.is_valid(restaurant_id):
             return jsonify({"error": "Invalid restaurant ID format"}), 400
         
-        restaurant = mongo.db.restaurants.find_one({'_id': ObjectId(restaurant_id)})
+        # reviews_version moves whenever a review is added to this restaurant,
+        # so revalidations and cache hits only need this projection
+        query = dict(NOT_DELETED, _id=ObjectId(restaurant_id))
+        restaurant = mongo.db.restaurants.find_one(query, {'reviews_version': 1})
+        if not restaurant:
+            return jsonify({'error': 'Restaurant not found'}), 404
+        
+        response = detail_hit(restaurant_id, restaurant.get('reviews_version', 0))
+        if response is not None:
+            return response
+        
+        restaurant = mongo.db.restaurants.find_one(query, DETAIL_PROJECTION)
         if not restaurant:
             return jsonify({'error': 'Restaurant not found'}), 404
         
-        # Get reviews for this restaurant
-        reviews = list(mongo.db.reviews.find({'restaurant_id': restaurant_id}))
-        restaurant['reviews'] = reviews
+        # Keyed on the version of the document actually read, in case a review landed in between
+        version = restaurant.get('reviews_version', 0)
         
-        # Serialize the document
-        serialized_restaurant = serialize_doc(restaurant)
+        # Embed only the latest reviews; the rest are paged through get_reviews.
+        # Served by the {restaurant_id, created_at, _id} index, so the cost
+        # does not grow with the number of reviews.
+        reviews = mongo.db.reviews.find({'restaurant_id': restaurant_id}).sort(REVIEW_ORDER)
+        restaurant['reviews'] = list(reviews.limit(current_app.config['REVIEW_EMBED_LIMIT']))
         
-        return jsonify(serialized_restaurant), 200
+        # ObjectId/datetime values are encoded by the app's JSON provider
+        return json_response(detail_key(restaurant_id, version), restaurant, validators(detail_etag(restaurant_id, version))), 200
     except Exception as e:
         return jsonify({'error': str(e)}), 500
     
@@ -157,14 +617,21 @@ def delete_restaurant(restaurant_id):
         # Convert string to ObjectId
         object_id = ObjectId(restaurant_id)
         
-        # Find and delete the restaurant
-        result = mongo.db.restaurants.delete_one({"_id": object_id})
+        # Tombstone the restaurant; reads skip it from now on and the purge
+        # worker removes its reviews and then the document itself
+        deleted = mongo.db.restaurants.find_one_and_update(
+            dict(NOT_DELETED, _id=object_id),
+            {'$set': {'deleted_at': datetime.utcnow()}, '$currentDate': {'updated_at': True}},
+            projection={'style': 1}
+        )
         
-        if result.deleted_count == 0:
+        if deleted is None:
             return jsonify({"error": "Restaurant not found"}), 404
         
-        # Optional: Also delete all reviews for this restaurant
-        mongo.db.reviews.delete_many({"restaurant_id": restaurant_id})
+        get_leaderboards().remove(mongo.db, deleted.get('style'), object_id)
+        bump_version(mongo.db, 'restaurants')
+        bump_version(mongo.db, 'styles')
+        invalidate_restaurant(restaurant_id, styles=True)
         
         return jsonify({
             "message": "Restaurant deleted successfully",
@@ -185,49 +652,72 @@ def add_review(restaurant_id):
         
         data = request.get_json()
         
-        # Validate required fields
-        required_fields = ['user_name', 'rating']
-        for field in required_fields:
-            if field not in data:
-                return jsonify({'error': f'Missing required field: {field}'}), 400
+        error = review_error(data)
+        if error:
+            return jsonify({'error': error}), 400
+        
+        review = review_from_payload(restaurant_id, data)
+        
+        # Write-behind mode: the flusher inserts the review and folds its rating later
+        review_queue = current_app.review_queue
+        if review_queue is not None:
+            # An _id-only lookup, so a review the flusher would discard is refused now
+            if not mongo.db.restaurants.find_one(dict(NOT_DELETED, _id=ObjectId(restaurant_id)), {'_id': 1}):
+                return jsonify({'error': 'Restaurant not found'}), 404
+            doc = review.to_dict()
+            if not review_queue.submit(doc):
+                response = jsonify({'error': REVIEW_QUEUE_FULL})
+                response.headers['Retry-After'] = str(review_queue.retry_after)
+                return response, 503
+            return jsonify({'message': 'Review accepted', 'id': str(doc['_id'])}), 202
         
-        # Validate rating
-        if not 1 <= data['rating'] <= 5:
-            return jsonify({'error': 'Rating must be between 1 and 5'}), 400
+        # Insert review
+        result = mongo.db.reviews.insert_one(review.to_dict())
         
-        # Check if restaurant exists
-        if not mongo.db.restaurants.find_one({'_id': ObjectId(restaurant_id)}):
+        # Update the restaurant's running aggregate; this doubles as the existence check
+        aggregate = apply_ratings(mongo.db, restaurant_id, [review.rating])
+        if aggregate is None:
+            mongo.db.reviews.delete_one({'_id': result.inserted_id})
             return jsonify({'error': 'Restaurant not found'}), 404
         
-        review = Review(
-            restaurant_id=restaurant_id,
-            user_name=data['user_name'],
-            rating=data['rating'],
-            comment=data.get('comment', '')
-        )
-        
-        # Insert review
-        mongo.db.reviews.insert_one(review.to_dict())
-        
-        # Update restaurant average rating
-        reviews = list(mongo.db.reviews.find({'restaurant_id': restaurant_id}))
-        total_rating = sum(review['rating'] for review in reviews)
-        average_rating = total_rating / len(reviews)
-        
-        mongo.db.restaurants.update_one(
-            {'_id': ObjectId(restaurant_id)},
-            {
-                '$set': {
-                    'average_rating': round(average_rating, 1),
-                    'total_reviews': len(reviews)
-                }
-            }
-        )
+        get_leaderboards().record(mongo.db, aggregate)
+        bump_version(mongo.db, 'restaurants')
+        invalidate_restaurant(restaurant_id)
         
         return jsonify({'message': 'Review added successfully'}), 201
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+@restaurants_bp.route('/api/reviews/bulk', methods=['POST'])
+def add_reviews_bulk():
+    try:
+        mongo = get_mongo()
+        
+        try:
+            items = bulk_items(request.get_json(), 'reviews')
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        
+        results = [None] * len(items)
+        candidates = review_candidates(items, results)
+        
+        # One existence check for every restaurant referenced by the batch
+        existing = {str(doc['_id']) for doc in mongo.db.restaurants.find(referenced_restaurants(candidates), {'_id': 1})}
+        docs, indexes = review_docs(candidates, existing, results)
+        
+        
+        def record_reviews(inserted):
+            # Fold the chunk's ratings into each affected restaurant once
+            updated = apply_rating_batches(mongo.db, ratings_by_restaurant(inserted))
+            if updated:
+                record_review_writes(mongo.db, updated)
+        
+        insert_in_chunks(mongo.db.reviews, docs, indexes, results, record_reviews)
+        
+        return jsonify(bulk_report(results)), 200
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
 @restaurants_bp.route('/api/restaurants/<restaurant_id>/reviews', methods=['GET'])
 def get_reviews(restaurant_id):
     try:
@@ -237,11 +727,30 @@ def get_reviews(restaurant_id):
         if not ObjectId.is_valid(restaurant_id):
             return jsonify({"error": "Invalid restaurant ID format"}), 400
         
-        reviews = list(mongo.db.reviews.find({'restaurant_id': restaurant_id}).sort('created_at', -1))
-        
-        # Serialize the documents
-        serialized_reviews = serialize_doc(reviews)
+        restaurant = mongo.db.restaurants.find_one(dict(NOT_DELETED, _id=ObjectId(restaurant_id)), {'reviews_version': 1})
+        if not restaurant:
+            return jsonify({'error': 'Restaurant not found'}), 404
         
-        return jsonify(serialized_reviews), 200
+        cursor = request.args.get('cursor')
+        try:
+            limit = parse_limit(request.args.get('limit'), REVIEW_PAGE_SIZE, MAX_REVIEW_PAGE_SIZE)
+            after = decode_cursor(cursor, 2) if cursor else None
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        
+        etag = make_etag(f'reviews-{restaurant_id}', restaurant.get('reviews_version', 0), (limit, cursor))
+        response = not_modified(etag)
+        if response is not None:
+            return response
+        
+        # Keyset pagination, newest first: resume after (created_at, _id) of the previous page
+        docs = list(mongo.db.reviews.find(review_page(restaurant_id, after)).sort(REVIEW_ORDER).limit(limit + 1))
+        reviews, next_cursor = split_page(docs, limit, review_cursor_key)
+        
+        response = jsonify(reviews)
+        response.headers.update(validators(etag))
+        if next_cursor:
+            response.headers['X-Next-Cursor'] = next_cursor
+        return response, 200
     except Exception as e:
         return jsonify({'error': str(e)}), 500
\ No newline at end of file
@@ -1,10 +1,24 @@
+import argparse
+import bisect
+import hashlib
+import itertools
+import json
+import math
+import random
+import struct
 import time
-from pymongo import MongoClient
-from datetime import datetime
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pymongo import MongoClient, UpdateOne
+from pymongo.errors import BulkWriteError
+from datetime import datetime, timedelta
 import os
+from bson import ObjectId
+from models.restaurant import Restaurant, Review, geo_point
+from services.indexes import ensure_indexes
+from services.ratings import rating_aggregate, rebuild_rating_aggregates
+from services.versions import bump_version
 
 MONGO_URI = os.getenv("MONGODB_URI") 
-client = MongoClient(MONGO_URI, serverSelectionTimeoutMS=5000)
 
 # Wait for MongoDB to be ready
 def wait_for_mongo():
@@ -21,10 +35,6 @@ def wait_for_mongo():
     raise RuntimeError("MongoDB is not ready after 30 retries")
 
 
-# Connect to MongoDB
-client = wait_for_mongo()
-db = client.get_default_database()  
-
 # Israeli restaurants with expanded cuisine types
 israeli_restaurants = [
     # Pizza restaurants
@@ -37,9 +47,7 @@ israeli_restaurants = [
         "description": "Authentic Italian pizza with Israeli twist",
         "phone": "+972-3-525-1234",
         "website": "https://www.tonyspizza.co.il",
-        "created_at": datetime.utcnow(),
-        "average_rating": 4.5,
-        "total_reviews": 28
+        "created_at": datetime.utcnow()
     },
     {
         "name": "Pizza Sababa",
@@ -50,9 +58,7 @@ israeli_restaurants = [
         "description": "Best pizza in Jerusalem with fresh ingredients",
         "phone": "+972-2-625-7890",
         "website": "",
-        "created_at": datetime.utcnow(),
-        "average_rating": 4.3,
-        "total_reviews": 22
+        "created_at": datetime.utcnow()
     },
     
     # Burger restaurants
@@ -65,9 +71,7 @@ israeli_restaurants = [
         "description": "Gourmet burgers with Israeli flavors",
         "phone": "+972-3-566-1122",
         "website": "https://www.mosesburger.com",
-        "created_at": datetime.utcnow(),
-        "average_rating": 4.6,
-        "total_reviews": 35
+        "created_at": datetime.utcnow()
     },
     {
         "name": "HaBurger",
@@ -78,9 +82,7 @@ israeli_restaurants = [
         "description": "Classic American-style burgers in the heart of Tel Aviv",
         "phone": "+972-3-510-3344",
         "website": "",
-        "created_at": datetime.utcnow(),
-        "average_rating": 4.4,
-        "total_reviews": 31
+        "created_at": datetime.utcnow()
     },
     
     # Israeli cuisine
@@ -93,9 +95,7 @@ israeli_restaurants = [
         "description": "Modern Israeli cuisine in vibrant atmosphere",
         "phone": "+972-2-533-3442",
         "website": "https://www.machneyuda.co.il",
-        "created_at": datetime.utcnow(),
-        "average_rating": 4.8,
-        "total_reviews": 42
+        "created_at": datetime.utcnow()
     },
     {
         "name": "Shakshukia",
@@ -106,9 +106,7 @@ israeli_restaurants = [
         "description": "Famous for authentic shakshuka and Israeli breakfast",
         "phone": "+972-3-681-8842",
         "website": "",
-        "created_at": datetime.utcnow(),
-        "average_rating": 4.5,
-        "total_reviews": 29
+        "created_at": datetime.utcnow()
     },
     
     # Cafes
@@ -121,9 +119,7 @@ israeli_restaurants = [
         "description": "Cozy Jerusalem cafe with excellent coffee and pastries",
         "phone": "+972-2-625-2114",
         "website": "",
-        "created_at": datetime.utcnow(),
-        "average_rating": 4.2,
-        "total_reviews": 25
+        "created_at": datetime.utcnow()
     },
     {
         "name": "Aroma Espresso Bar",
@@ -134,9 +130,7 @@ israeli_restaurants = [
         "description": "Israeli coffee chain with excellent espresso and sandwiches",
         "phone": "+972-3-522-7788",
         "website": "https://www.aroma.co.il",
-        "created_at": datetime.utcnow(),
-        "average_rating": 4.0,
-        "total_reviews": 40
+        "created_at": datetime.utcnow()
     },
     
     # Pita restaurants
@@ -149,9 +143,7 @@ israeli_restaurants = [
         "description": "Famous pita bar with creative Mediterranean dishes",
         "phone": "+972-3-611-1196",
         "website": "https://www.miznon.com",
-        "created_at": datetime.utcnow(),
-        "average_rating": 4.7,
-        "total_reviews": 45
+        "created_at": datetime.utcnow()
     },
     {
         "name": "Falafel Hakosem",
@@ -162,9 +154,7 @@ israeli_restaurants = [
         "description": "Best falafel in pita in Tel Aviv",
         "phone": "+972-3-525-2033",
         "website": "",
-        "created_at": datetime.utcnow(),
-        "average_rating": 4.6,
-        "total_reviews": 52
+        "created_at": datetime.utcnow()
     },
     
     # High Cuisine
@@ -177,9 +167,7 @@ israeli_restaurants = [
         "description": "Chef Eyal Shani's innovative fine dining experience",
         "phone": "+972-3-691-4251",
         "website": "https://www.hasalon.co.il",
-        "created_at": datetime.utcnow(),
-        "average_rating": 4.9,
-        "total_reviews": 38
+        "created_at": datetime.utcnow()
     },
     {
         "name": "Eucalyptus",
@@ -190,9 +178,7 @@ israeli_restaurants = [
         "description": "Biblical cuisine with modern twist, kosher fine dining",
         "phone": "+972-2-624-4331",
         "website": "https://www.eucalyptus-rest.com",
-        "created_at": datetime.utcnow(),
-        "average_rating": 4.8,
-        "total_reviews": 25
+        "created_at": datetime.utcnow()
     },
     
     # Italian
@@ -205,9 +191,7 @@ israeli_restaurants = [
         "description": "Authentic Italian pasta and risotto restaurant",
         "phone": "+972-3-566-7788",
         "website": "https://www.pastabasta.co.il",
-        "created_at": datetime.utcnow(),
-        "average_rating": 4.4,
-        "total_reviews": 33
+        "created_at": datetime.utcnow()
     },
     {
         "name": "Pronto",
@@ -218,9 +202,7 @@ israeli_restaurants = [
         "description": "Classic Italian trattoria with homemade pasta",
         "phone": "+972-3-566-9911",
         "website": "",
-        "created_at": datetime.utcnow(),
-        "average_rating": 4.3,
-        "total_reviews": 28
+        "created_at": datetime.utcnow()
     },
     
     # Asian
@@ -233,9 +215,7 @@ israeli_restaurants = [
         "description": "Modern Asian fusion with Israeli influences",
         "phone": "+972-3-522-5005",
         "website": "https://www.taizu.co.il",
-        "created_at": datetime.utcnow(),
-        "average_rating": 4.6,
-        "total_reviews": 41
+        "created_at": datetime.utcnow()
     },
     {
         "name": "Yakimono",
@@ -246,9 +226,7 @@ israeli_restaurants = [
         "description": "Japanese sushi and Asian street food",
         "phone": "+972-3-544-9988",
         "website": "",
-        "created_at": datetime.utcnow(),
-        "average_rating": 4.5,
-        "total_reviews": 37
+        "created_at": datetime.utcnow()
     },
     
     # Vegetarian
@@ -261,9 +239,7 @@ israeli_restaurants = [
         "description": "Farm-to-table vegetarian restaurant with organic ingredients",
         "phone": "+972-3-516-6329",
         "website": "https://www.meshekbarzilay.co.il",
-        "created_at": datetime.utcnow(),
-        "average_rating": 4.5,
-        "total_reviews": 31
+        "created_at": datetime.utcnow()
     },
     {
         "name": "Zakaim",
@@ -274,9 +250,7 @@ israeli_restaurants = [
         "description": "Innovative vegetarian cuisine with global influences",
         "phone": "+972-3-525-7766",
         "website": "",
-        "created_at": datetime.utcnow(),
-        "average_rating": 4.4,
-        "total_reviews": 26
+        "created_at": datetime.utcnow()
     },
     
     # Bakery
@@ -289,9 +263,7 @@ israeli_restaurants = [
         "description": "Artisan bakery with fresh breads and pastries",
         "phone": "+972-3-522-3344",
         "website": "https://www.lehamim.co.il",
-        "created_at": datetime.utcnow(),
-        "average_rating": 4.3,
-        "total_reviews": 29
+        "created_at": datetime.utcnow()
     },
     {
         "name": "Roladin",
@@ -302,60 +274,377 @@ israeli_restaurants = [
         "description": "Popular bakery chain with cakes, pastries and coffee",
         "phone": "+972-3-544-5577",
         "website": "https://www.roladin.co.il",
-        "created_at": datetime.utcnow(),
-        "average_rating": 4.1,
-        "total_reviews": 35
+        "created_at": datetime.utcnow()
+    }
+]
+
+# Sample reviews; "restaurant" is an index into israeli_restaurants
+israeli_reviews = [
+    {
+        "restaurant": 0,
+        "user_name": "Sarah Cohen",
+        "rating": 5,
+        "comment": "הפיצה הכי טובה בתל אביב! חובה לטעום"
+    },
+    {
+        "restaurant": 10,
+        "user_name": "David Levi",
+        "rating": 5,
+        "comment": "Fine dining at its best! Incredible experience"
+    },
+    {
+        "restaurant": 14,
+        "user_name": "Rachel Green",
+        "rating": 5,
+        "comment": "Amazing Asian fusion! Creative and delicious"
+    },
+    {
+        "restaurant": 16,
+        "user_name": "Amit Israeli",
+        "rating": 4,
+        "comment": "Great vegetarian options! Fresh and healthy"
     }
 ]
 
-try:
-    # Clear existing data first
-    db.restaurants.delete_many({})
-    db.reviews.delete_many({})
-    print("Cleared existing restaurant and review data")
+# Seeded fields that are kept in sync on every run; everything else
+# (created_at, rating aggregates) is only written when a document is created
+RESTAURANT_CONTENT_FIELDS = ("name", "address", "latitude", "longitude", "style", "description", "phone", "website")
+REVIEW_CONTENT_FIELDS = ("user_name", "rating", "comment")
+
+def restaurant_seed_key(restaurant):
+    """Stable natural key of a seeded restaurant"""
+    return f"{restaurant['name']}|{restaurant['address']}"
+
+def sample_ratings():
+    """{restaurant seed_key: [ratings]} of the sample reviews"""
+    ratings = {restaurant_seed_key(restaurant): [] for restaurant in israeli_restaurants}
+    for review in israeli_reviews:
+        ratings[restaurant_seed_key(israeli_restaurants[review["restaurant"]])].append(review["rating"])
+    return ratings
+
+def content_hash(doc, fields):
+    payload = json.dumps([doc.get(field) for field in fields], ensure_ascii=False, separators=(",", ":"))
+    return hashlib.sha1(payload.encode()).hexdigest()
+
+def adopt_legacy(collection, items, legacy_filter):
+    """
+    Attach seed keys to documents written by the old wipe-and-reload seeder,
+    so the first idempotent run updates them instead of adding duplicates.
+    `items` maps seed_key -> document; `legacy_filter(doc)` matches its old copy.
+    """
+    known = {doc["seed_key"] for doc in collection.find({"seed_key": {"$in": list(items)}}, {"seed_key": 1})}
+    for key, doc in items.items():
+        if key not in known:
+            collection.update_one(dict(legacy_filter(doc), seed_key={"$exists": False}), {"$set": {"seed_key": key}})
+
+def sync(collection, items, fields, on_insert):
+    """
+    Upsert `items` (seed_key -> document) with one bulk_write, skipping
+    documents whose stored content hash is unchanged. `on_insert(doc)` gives
+    the fields written only when a document is created.
+    Returns (inserted, updated, unchanged).
+    """
+    stored = {
+        doc["seed_key"]: doc.get("seed_hash")
+        for doc in collection.find({"seed_key": {"$in": list(items)}}, {"seed_key": 1, "seed_hash": 1})
+    }
+    now = datetime.utcnow()
+    operations = []
+    for key, doc in items.items():
+        digest = content_hash(doc, fields)
+        if stored.get(key) == digest:
+            continue
+        content = {field: doc.get(field) for field in fields}
+        content.update(seed_hash=digest, updated_at=now)
+        operations.append(UpdateOne(
+            {"seed_key": key},
+            {"$set": content, "$setOnInsert": on_insert(doc)},
+            upsert=True
+        ))
+
+    if not operations:
+        return 0, 0, len(items)
+    result = collection.bulk_write(operations, ordered=False)
+    return result.upserted_count, result.modified_count, len(items) - len(operations)
+
+def seed_sample(db, prune=False):
+    """
+    Bring the curated Israeli restaurants and sample reviews up to date.
+
+    Documents are keyed on a stable seed_key, so re-running only writes
+    what changed; restaurants created through the API are never touched.
+    With `prune`, seeded documents no longer in the lists are deleted.
+    Returns True if anything was written.
+    """
+    # Includes the unique seed_key indexes the upserts are keyed on
+    ensure_indexes(db)
+    
+    for restaurant in israeli_restaurants:
+        restaurant["location"] = geo_point(restaurant["latitude"], restaurant["longitude"])
+    restaurants = {restaurant_seed_key(restaurant): restaurant for restaurant in israeli_restaurants}
+    # New restaurants start with the aggregate of the sample reviews seeded below
+    ratings = sample_ratings()
+    adopt_legacy(db.restaurants, restaurants, lambda doc: {"name": doc["name"], "address": doc["address"]})
+    inserted, updated, unchanged = sync(
+        db.restaurants,
+        restaurants,
+        RESTAURANT_CONTENT_FIELDS + ("location",),
+        lambda doc: dict(rating_aggregate(ratings[restaurant_seed_key(doc)]), created_at=doc["created_at"])
+    )
+    print(f"Restaurants: {inserted} inserted, {updated} updated, {unchanged} unchanged")
     
-    # Insert Israeli restaurants
-    result = db.restaurants.insert_many(israeli_restaurants)
-    print(f"Inserted {len(result.inserted_ids)} Israeli restaurants")
+    # Reviews point at their restaurant's _id, whichever run created it
+    keys = [restaurant_seed_key(restaurant) for restaurant in israeli_restaurants]
+    ids = {doc["seed_key"]: str(doc["_id"]) for doc in db.restaurants.find({"seed_key": {"$in": keys}}, {"seed_key": 1})}
+    reviews = {}
+    for review in israeli_reviews:
+        restaurant_key = keys[review["restaurant"]]
+        reviews[f"{restaurant_key}|{review['user_name']}"] = dict(review, restaurant_id=ids[restaurant_key])
+    adopt_legacy(db.reviews, reviews, lambda doc: {"restaurant_id": doc["restaurant_id"], "user_name": doc["user_name"]})
+    review_counts = sync(
+        db.reviews,
+        reviews,
+        REVIEW_CONTENT_FIELDS,
+        lambda doc: {"restaurant_id": doc["restaurant_id"], "created_at": datetime.utcnow()}
+    )
+    print(f"Reviews: {review_counts[0]} inserted, {review_counts[1]} updated, {review_counts[2]} unchanged")
     
-    # Add some sample reviews
-    restaurant_ids = result.inserted_ids
-    israeli_reviews = [
-        {
-            "restaurant_id": str(restaurant_ids[0]),
-            "user_name": "Sarah Cohen",
-            "rating": 5,
-            "comment": "הפיצה הכי טובה בתל אביב! חובה לטעום",
-            "created_at": datetime.utcnow()
-        },
-        {
-            "restaurant_id": str(restaurant_ids[10]),
-            "user_name": "David Levi",
-            "rating": 5,
-            "comment": "Fine dining at its best! Incredible experience",
-            "created_at": datetime.utcnow()
-        },
-        {
-            "restaurant_id": str(restaurant_ids[14]),
-            "user_name": "Rachel Green",
-            "rating": 5,
-            "comment": "Amazing Asian fusion! Creative and delicious",
-            "created_at": datetime.utcnow()
-        },
-        {
-            "restaurant_id": str(restaurant_ids[16]),
-            "user_name": "Amit Israeli",
-            "rating": 4,
-            "comment": "Great vegetarian options! Fresh and healthy",
-            "created_at": datetime.utcnow()
-        }
-    ]
+    # $setOnInsert only covers new restaurants: reviews added or edited on a
+    # later run, and restaurants adopted from the old seeder, are reconciled here
+    reconciled = rebuild_rating_aggregates(db, restaurant_ids=list(ids.values()))["updated"]
+    print(f"Rating aggregates: {reconciled} reconciled")
     
-    result = db.reviews.insert_many(israeli_reviews)
-    print(f"Inserted {len(result.inserted_ids)} reviews")
-    print("Israeli restaurant data with expanded cuisines inserted successfully!")
-
-except Exception as e:
-    print(f"Error inserting Israeli restaurant data: {e}")
-finally:
-    client.close()
\ No newline at end of file
+    pruned = 0
+    if prune:
+        stale = list(db.restaurants.find({"seed_key": {"$type": "string", "$nin": keys}}, {"_id": 1}))
+        pruned = db.restaurants.delete_many({"_id": {"$in": [doc["_id"] for doc in stale]}}).deleted_count
+        db.reviews.delete_many({"restaurant_id": {"$in": [str(doc["_id"]) for doc in stale]}})
+        db.reviews.delete_many({"seed_key": {"$type": "string", "$nin": list(reviews)}})
+        print(f"Pruned {pruned} restaurants no longer in the sample")
+    
+    return bool(inserted or updated or pruned or reconciled or review_counts[0] or review_counts[1])
+
+# ── Synthetic data generator ──────────────────────────────────────────────────
+# (name, latitude, longitude, spread in km, share of restaurants)
+CITIES = [
+    ("Tel Aviv", 32.0853, 34.7818, 3.0, 0.30),
+    ("Jerusalem", 31.7683, 35.2137, 4.0, 0.20),
+    ("Haifa", 32.7940, 34.9896, 3.5, 0.12),
+    ("Rishon LeZion", 31.9730, 34.7925, 2.5, 0.07),
+    ("Petah Tikva", 32.0840, 34.8878, 2.5, 0.07),
+    ("Netanya", 32.3215, 34.8532, 2.5, 0.06),
+    ("Beer Sheva", 31.2518, 34.7913, 3.0, 0.06),
+    ("Herzliya", 32.1624, 34.8447, 2.0, 0.05),
+    ("Eilat", 29.5577, 34.9519, 2.0, 0.04),
+    ("Tiberias", 32.7922, 35.5312, 1.5, 0.03),
+]
+
+# Share of each cuisine among generated restaurants
+CUISINE_MIX = {
+    "cafe": 0.18, "israeli": 0.16, "pizza": 0.12, "burger": 0.10, "pita": 0.10,
+    "asian": 0.10, "italian": 0.08, "bakery": 0.07, "vegetarian": 0.06, "high_cuisine": 0.03,
+}
+
+NAME_PREFIXES = ["Golden", "Little", "Old", "Blue", "Green", "Urban", "Sunny", "Royal", "Happy", "Hidden", "Lucky", "Salty"]
+CUISINE_NOUNS = {
+    "cafe": ["Cafe", "Espresso Bar", "Coffee House"], "israeli": ["Grill", "Kitchen", "Shuk Bistro"],
+    "pizza": ["Pizza", "Pizzeria", "Slice"], "burger": ["Burger", "Burger Bar", "Smash"],
+    "pita": ["Pita", "Falafel", "Shawarma"], "asian": ["Noodle Bar", "Sushi", "Wok"],
+    "italian": ["Trattoria", "Pasta Bar", "Osteria"], "bakery": ["Bakery", "Boulangerie", "Bagels"],
+    "vegetarian": ["Greens", "Vegan Kitchen", "Salad Bar"], "high_cuisine": ["Restaurant", "Brasserie", "Chef's Table"],
+}
+STREETS = ["Herzl", "Dizengoff", "Ben Yehuda", "Allenby", "Jaffa", "King George", "Rothschild", "Weizmann", "HaNassi", "Ibn Gabirol"]
+FIRST_NAMES = ["Noa", "Yossi", "Maya", "David", "Tamar", "Avi", "Shira", "Eitan", "Yael", "Omer", "Dana", "Amit"]
+LAST_NAMES = ["Cohen", "Levi", "Mizrahi", "Peretz", "Biton", "Friedman", "Avraham", "Katz", "Azoulay", "Shapiro"]
+
+# Review counts follow Zipf's law: the k-th most reviewed restaurant gets ~1/k^s of the reviews
+ZIPF_EXPONENT = 1.1
+KM_PER_DEGREE = 111.0
+GENERATED_SINCE = datetime(2022, 1, 1)
+GENERATED_SPAN_SECONDS = 3 * 365 * 24 * 3600
+# ObjectIds of generated restaurants and reviews are derived from the seed and index so reruns are identical
+OBJECT_ID_EPOCH = int(datetime(2024, 1, 1).timestamp())
+DUPLICATE_KEY = 11000
+
+_worker_db = None
+
+def cumulative(weights):
+    return list(itertools.accumulate(weights))
+
+def zipf_counts(ranks, total_reviews, total_restaurants):
+    """
+    Review count for each rank in `ranks` such that the counts of all ranks
+    1..total_restaurants sum to exactly `total_reviews`.
+    """
+    harmonic = sum(1 / rank ** ZIPF_EXPONENT for rank in range(1, total_restaurants + 1))
+    scale = total_reviews / harmonic
+    floored = sum(int(scale / rank ** ZIPF_EXPONENT) for rank in range(1, total_restaurants + 1))
+    leftover = total_reviews - floored
+    return [int(scale / rank ** ZIPF_EXPONENT) + (1 if rank <= leftover else 0) for rank in ranks]
+
+def generated_object_id(seed, index):
+    return ObjectId(struct.pack(">IQ", OBJECT_ID_EPOCH + index, seed & 0xFFFFFFFFFFFFFFFF))
+
+def generate_restaurant(rng, seed, index, city_weights, cuisine_weights):
+    city, latitude, longitude, spread_km, _ = CITIES[bisect.bisect(city_weights, rng.random() * city_weights[-1])]
+    style = list(CUISINE_MIX)[bisect.bisect(cuisine_weights, rng.random() * cuisine_weights[-1])]
+    latitude += rng.gauss(0, spread_km) / KM_PER_DEGREE
+    longitude += rng.gauss(0, spread_km) / (KM_PER_DEGREE * math.cos(math.radians(latitude)))
+    restaurant = Restaurant(
+        name=f"{rng.choice(NAME_PREFIXES)} {rng.choice(CUISINE_NOUNS[style])} {index}",
+        address=f"{rng.randint(1, 250)} {rng.choice(STREETS)} St, {city}, Israel",
+        latitude=round(latitude, 6),
+        longitude=round(longitude, 6),
+        style=style,
+        description=f"{style.replace('_', ' ').title()} in {city}",
+        phone=f"+972-{rng.randint(2, 9)}-{rng.randint(100, 999)}-{rng.randint(1000, 9999)}",
+        website=""
+    )
+    doc = restaurant.to_dict()
+    doc["_id"] = generated_object_id(seed, index)
+    doc["created_at"] = doc["updated_at"] = GENERATED_SINCE + timedelta(seconds=rng.randrange(GENERATED_SPAN_SECONDS // 2))
+    return doc
+
+def generate_reviews(rng, seed, restaurant, first_index, count):
+    """
+    `count` reviews around a per-restaurant quality, folded into the
+    restaurant's aggregate; numbered from `first_index` across the whole run
+    """
+    quality = min(5.0, max(1.0, rng.gauss(3.8, 0.6)))
+    opened = restaurant["created_at"]
+    window = max(1, int((GENERATED_SINCE + timedelta(seconds=GENERATED_SPAN_SECONDS) - opened).total_seconds()))
+    reviews = []
+    for _ in range(count):
+        rating = min(5, max(1, int(round(rng.gauss(quality, 1.0)))))
+        review = Review(
+            restaurant_id=str(restaurant["_id"]),
+            user_name=f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}",
+            rating=rating,
+            comment=""
+        ).to_dict()
+        review["_id"] = generated_object_id(seed, first_index + len(reviews))
+        review["created_at"] = opened + timedelta(seconds=rng.randrange(window))
+        reviews.append(review)
+
+    restaurant.update(rating_aggregate([review["rating"] for review in reviews]))
+    return reviews
+
+def init_worker(uri):
+    # Each process opens its own client after fork/spawn
+    global _worker_db
+    _worker_db = MongoClient(uri, serverSelectionTimeoutMS=5000).get_default_database()
+
+def insert_new(collection, docs):
+    """Insert `docs`, skipping those whose _id is already there; returns how many were inserted"""
+    try:
+        return len(collection.insert_many(docs, ordered=False).inserted_ids)
+    except BulkWriteError as e:
+        if any(error["code"] != DUPLICATE_KEY for error in e.details["writeErrors"]):
+            raise
+        return e.details["nInserted"]
+
+def generate_chunk(seed, chunk, start, first_review, review_counts, batch_size):
+    """
+    Generate and insert restaurants start..start+len(review_counts) and their
+    reviews, numbered from `first_review`. The chunk's RNG is seeded from
+    (seed, chunk), so the output does not depend on how chunks are spread
+    across processes. Documents already inserted by an earlier run with the
+    same seed (--append, or resuming an interrupted run) are skipped.
+    Returns (restaurants inserted, reviews inserted, documents skipped, seconds).
+    """
+    rng = random.Random(f"{seed}:{chunk}")
+    city_weights = cumulative(share for *_, share in CITIES)
+    cuisine_weights = cumulative(CUISINE_MIX.values())
+    restaurants, reviews = [], []
+    for offset, count in enumerate(review_counts):
+        restaurant = generate_restaurant(rng, seed, start + offset, city_weights, cuisine_weights)
+        reviews.extend(generate_reviews(rng, seed, restaurant, first_review + len(reviews), count))
+        restaurants.append(restaurant)
+
+    started = time.perf_counter()
+    inserted_restaurants = insert_new(_worker_db.restaurants, restaurants)
+    inserted_reviews = 0
+    for batch in range(0, len(reviews), batch_size):
+        inserted_reviews += insert_new(_worker_db.reviews, reviews[batch:batch + batch_size])
+    skipped = len(restaurants) + len(reviews) - inserted_restaurants - inserted_reviews
+    return inserted_restaurants, inserted_reviews, skipped, time.perf_counter() - started
+
+def generate(uri, db, restaurants, reviews, seed=42, workers=None, batch_size=1000, append=False):
+    """Generate `restaurants` restaurants and exactly `reviews` reviews with a process pool"""
+    if not append:
+        db.restaurants.delete_many({})
+        db.reviews.delete_many({})
+        print("Cleared existing restaurant and review data")
+
+    # Popularity ranks are shuffled once, globally, so the Zipf tail is spread over every chunk
+    ranks = list(range(1, restaurants + 1))
+    random.Random(seed).shuffle(ranks)
+    counts = zipf_counts(ranks, reviews, restaurants)
+    # Index of each restaurant's first review, so review ids do not depend on the chunking either
+    first_reviews = [0] + cumulative(counts)
+
+    started = time.perf_counter()
+    inserted_restaurants = inserted_reviews = skipped = 0
+    with ProcessPoolExecutor(max_workers=workers, initializer=init_worker, initargs=(uri,)) as pool:
+        futures = [
+            pool.submit(generate_chunk, seed, chunk, start, first_reviews[start], counts[start:start + batch_size], batch_size)
+            for chunk, start in enumerate(range(0, restaurants, batch_size))
+        ]
+        for future in as_completed(futures):
+            chunk_restaurants, chunk_reviews, chunk_skipped, _ = future.result()
+            inserted_restaurants += chunk_restaurants
+            inserted_reviews += chunk_reviews
+            skipped += chunk_skipped
+            elapsed = time.perf_counter() - started
+            print(f"\r{inserted_restaurants}/{restaurants} restaurants, {inserted_reviews}/{reviews} reviews, "
+                  f"{(inserted_restaurants + inserted_reviews) / elapsed:,.0f} docs/s", end="", flush=True)
+
+    elapsed = time.perf_counter() - started
+    print(f"\nInserted {inserted_restaurants} restaurants and {inserted_reviews} reviews in {elapsed:.1f}s "
+          f"({inserted_restaurants / elapsed:,.0f} restaurants/s, {inserted_reviews / elapsed:,.0f} reviews/s)")
+    if skipped:
+        print(f"Skipped {skipped} documents already generated with seed {seed}")
+    return inserted_restaurants, inserted_reviews, elapsed
+
+def refresh_derived(db):
+    """Rebuild leaderboards and move the list and styles versions after seeding changed data"""
+    from app import default_config
+    from migrations.rebuild_leaderboards import rebuild_leaderboards
+    from services.leaderboards import Leaderboards
+    rebuild_leaderboards(db, Leaderboards.from_config(default_config()))
+    bump_version(db, "restaurants")
+    bump_version(db, "styles")
+    print("Leaderboards rebuilt")
+
+def main():
+    parser = argparse.ArgumentParser(description="Seed the restaurant database")
+    parser.add_argument("--generate", action="store_true", help="generate synthetic data instead of the curated sample")
+    parser.add_argument("--restaurants", type=int, default=10000, help="restaurants to generate")
+    parser.add_argument("--reviews", type=int, default=100000, help="reviews to generate (Zipf-distributed)")
+    parser.add_argument("--seed", type=int, default=42, help="random seed; same seed, same data")
+    parser.add_argument("--workers", type=int, default=os.cpu_count(), help="generator processes")
+    parser.add_argument("--batch-size", type=int, default=1000, help="documents per insert_many")
+    parser.add_argument("--append", action="store_true", help="keep existing documents; those generated earlier with the same seed are skipped")
+    parser.add_argument("--prune", action="store_true", help="delete seeded sample documents no longer in this file")
+    args = parser.parse_args()
+
+    client = wait_for_mongo()
+    db = client.get_default_database()
+    try:
+        if not args.generate:
+            if seed_sample(db, prune=args.prune):
+                refresh_derived(db)
+            else:
+                print("Sample data already up to date")
+            return
+
+        generate(MONGO_URI, db, args.restaurants, args.reviews, seed=args.seed,
+                 workers=args.workers, batch_size=args.batch_size, append=args.append)
+        # Secondary indexes are built once the bulk load is done
+        ensure_indexes(db)
+        refresh_derived(db)
+    finally:
+        client.close()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,220 @@
+import asyncio
+import math
+import threading
+import time
+from prometheus_client import Counter, Gauge, Histogram
+
+# Priorities, highest first. Each may fill its share of the in-flight limit,
+# so low-priority work is shed while capacity is left for the rest.
+CRITICAL = 'critical'
+NORMAL = 'normal'
+LOW = 'low'
+PRIORITIES = (CRITICAL, NORMAL, LOW)
+SHARES = {CRITICAL: 1.0, NORMAL: 0.8, LOW: 0.5}
+
+# Never limited: probes and scrapes must answer while the server is saturated
+EXEMPT = 'exempt'
+
+# Limit when ADMISSION_LIMIT is unset, capped by the worker's concurrency
+DEFAULT_LIMIT = 100
+
+# Threads a thread worker keeps out of reach of waiting requests below CRITICAL,
+# so probes and writes still find a thread when reads pile up
+THREAD_RESERVE = 1
+
+# Priority of each endpoint (Flask endpoint names, shared by the ASGI app);
+# anything not listed, such as the SPA routes, is NORMAL
+ROUTE_PRIORITIES = {
+    'health_check': EXEMPT,
+    'metrics': EXEMPT,
+    'restaurants.add_restaurant': CRITICAL,
+    'restaurants.add_restaurants_bulk': CRITICAL,
+    'restaurants.delete_restaurant': CRITICAL,
+    'restaurants.add_review': CRITICAL,
+    'restaurants.add_reviews_bulk': CRITICAL,
+    'restaurants.get_restaurant': NORMAL,
+    'restaurants.get_reviews': NORMAL,
+    'leaderboards.get_leaderboard': NORMAL,
+    'restaurants.get_restaurants': LOW,
+    'restaurants.search_restaurants': LOW,
+    'restaurants.get_styles': LOW,
+    'export.export_restaurants': LOW,
+    'export.export_reviews': LOW,
+}
+
+ADMISSION_IN_FLIGHT = Gauge('admission_in_flight', 'Requests admitted and not yet finished', multiprocess_mode='livesum')
+ADMISSION_QUEUE_DEPTH = Gauge('admission_queue_depth', 'Requests waiting for admission', ['priority'], multiprocess_mode='livesum')
+ADMISSION_WAIT = Histogram(
+    'admission_wait_seconds',
+    'Time requests waited for admission',
+    ['priority'],
+    buckets=(.001, .005, .01, .025, .05, .1, .25, .5, 1, 2.5, 5)
+)
+ADMISSION_REJECTED = Counter('admission_rejected_total', 'Requests rejected with 503', ['priority', 'reason'])
+
+def route_priority(endpoint):
+    return ROUTE_PRIORITIES.get(endpoint, NORMAL)
+
+def admission_limit(limit, concurrency):
+    """
+    In-flight limit of a worker that runs at most `concurrency` requests at
+    once (0 when the worker does not cap it, as uvicorn's). None picks the
+    default. A limit so high that not even low priority requests could ever
+    be shed is rejected: overload would only queue in the accept backlog.
+    """
+    if limit is None:
+        return min(DEFAULT_LIMIT, concurrency) if concurrency else DEFAULT_LIMIT
+    if limit and concurrency and max(1, math.floor(limit * SHARES[LOW])) >= concurrency:
+        raise ValueError(
+            f'ADMISSION_LIMIT={limit} is never reached by a worker that runs at most {concurrency} requests '
+            f'at once; leave it unset or set it to at most {concurrency}'
+        )
+    return limit
+
+class Admission:
+    """
+    Bookkeeping shared by the thread and asyncio limiters: at most `limit`
+    requests in flight, a priority admitted only below its share of the
+    limit and while no higher priority waits, at most `queue_size` waiting
+    requests, each for at most `queue_timeout` seconds.
+    """
+
+    def __init__(self, limit=100, queue_size=100, queue_timeout=1.0, retry_after=1):
+        self.limit = limit
+        self.queue_size = queue_size
+        self.queue_timeout = queue_timeout
+        self.retry_after = retry_after
+        self.capacity = {priority: max(1, math.floor(limit * SHARES[priority])) for priority in PRIORITIES}
+        self.in_flight = 0
+        self.waiting = dict.fromkeys(PRIORITIES, 0)
+
+    @classmethod
+    def from_config(cls, config):
+        return cls(
+            limit=admission_limit(config['ADMISSION_LIMIT'], config['WORKER_CONCURRENCY']),
+            queue_size=config['ADMISSION_QUEUE_SIZE'],
+            queue_timeout=config['ADMISSION_QUEUE_TIMEOUT'],
+            retry_after=config['ADMISSION_RETRY_AFTER']
+        )
+
+    @property
+    def enabled(self):
+        return self.limit > 0
+
+    def _admissible(self, priority):
+        if self.in_flight >= self.capacity[priority]:
+            return False
+        higher = PRIORITIES[:PRIORITIES.index(priority)]
+        return not any(self.waiting[other] for other in higher)
+
+    def _admit(self):
+        self.in_flight += 1
+        ADMISSION_IN_FLIGHT.inc()
+
+    def _finish(self):
+        self.in_flight -= 1
+        ADMISSION_IN_FLIGHT.dec()
+
+    def _can_queue(self):
+        return self.queue_timeout > 0 and sum(self.waiting.values()) < self.queue_size
+
+    def _enqueue(self, priority):
+        self.waiting[priority] += 1
+        ADMISSION_QUEUE_DEPTH.labels(priority=priority).inc()
+
+    def _dequeue(self, priority, started):
+        self.waiting[priority] -= 1
+        ADMISSION_QUEUE_DEPTH.labels(priority=priority).dec()
+        ADMISSION_WAIT.labels(priority=priority).observe(time.perf_counter() - started)
+
+    def _reject(self, priority, reason):
+        ADMISSION_REJECTED.labels(priority=priority, reason=reason).inc()
+        return False
+
+class AdmissionController(Admission):
+    """
+    Limiter for thread (or gevent) workers: waiting requests block on a
+    condition, each holding one of the worker's `threads`. Requests below
+    CRITICAL only wait while that leaves THREAD_RESERVE threads unused;
+    otherwise they are rejected at once. 0 `threads` means unknown: no bound.
+    """
+
+    def __init__(self, *args, threads=0, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.threads = threads
+        self._condition = threading.Condition()
+
+    @classmethod
+    def from_config(cls, config):
+        admission = super().from_config(config)
+        admission.threads = config['WORKER_CONCURRENCY']
+        return admission
+
+    def _can_wait(self, priority):
+        if not self._can_queue():
+            return False
+        if not self.threads or priority == CRITICAL:
+            return True
+        return self.in_flight + sum(self.waiting.values()) + 1 <= self.threads - THREAD_RESERVE
+
+    def acquire(self, priority):
+        """True once the request may run; False if it must be rejected"""
+        with self._condition:
+            if self._admissible(priority):
+                self._admit()
+                return True
+            if not self._can_wait(priority):
+                return self._reject(priority, 'queue_full')
+
+            started = time.perf_counter()
+            self._enqueue(priority)
+            try:
+                admitted = self._condition.wait_for(lambda: self._admissible(priority), self.queue_timeout)
+            finally:
+                self._dequeue(priority, started)
+                # Lower priorities may have been held back by this waiter
+                self._condition.notify_all()
+            if not admitted:
+                return self._reject(priority, 'timeout')
+            self._admit()
+            return True
+
+    def release(self):
+        with self._condition:
+            self._finish()
+            self._condition.notify_all()
+
+class AsyncAdmissionController(Admission):
+    """Limiter for the ASGI app: waiting requests are suspended coroutines, not threads"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._condition = asyncio.Condition()
+
+    async def acquire(self, priority):
+        async with self._condition:
+            if self._admissible(priority):
+                self._admit()
+                return True
+            if not self._can_queue():
+                return self._reject(priority, 'queue_full')
+
+            started = time.perf_counter()
+            self._enqueue(priority)
+            try:
+                await asyncio.wait_for(self._condition.wait_for(lambda: self._admissible(priority)), self.queue_timeout)
+                admitted = True
+            except asyncio.TimeoutError:
+                admitted = False
+            finally:
+                self._dequeue(priority, started)
+                self._condition.notify_all()
+            if not admitted:
+                return self._reject(priority, 'timeout')
+            self._admit()
+            return True
+
+    async def release(self):
+        async with self._condition:
+            self._finish()
+            self._condition.notify_all()
@@ -0,0 +1,78 @@
+import threading
+import time
+from collections import OrderedDict
+from prometheus_client import Counter, Gauge
+
+CACHE_HITS = Counter('response_cache_hits_total', 'Response cache hits', ['cache'])
+CACHE_MISSES = Counter('response_cache_misses_total', 'Response cache misses', ['cache'])
+CACHE_EVICTIONS = Counter('response_cache_evictions_total', 'Response cache evictions', ['cache', 'reason'])
+CACHE_ENTRIES = Gauge('response_cache_entries', 'Entries currently held in the response cache', ['cache'], multiprocess_mode='livesum')
+
+class ResponseCache:
+    """
+    Bounded LRU cache with a per-entry TTL for encoded responses.
+
+    Keys are tuples whose first element is a namespace ('list', 'detail',
+    ...) so writes can drop every entry of a namespace at once. A
+    max_entries of 0 disables the cache.
+    """
+
+    def __init__(self, name, max_entries=1024, ttl=30, clock=time.monotonic):
+        self.name = name
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.clock = clock
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        if not self.max_entries:
+            return None
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] <= self.clock():
+                del self._entries[key]
+                self._evicted('expired')
+                entry = None
+            if entry is None:
+                CACHE_MISSES.labels(cache=self.name).inc()
+                return None
+            self._entries.move_to_end(key)
+        CACHE_HITS.labels(cache=self.name).inc()
+        return entry[1]
+
+    def set(self, key, value):
+        if not self.max_entries:
+            return
+        with self._lock:
+            self._entries[key] = (self.clock() + self.ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self._evicted('capacity')
+            CACHE_ENTRIES.labels(cache=self.name).set(len(self._entries))
+
+    def invalidate(self, key):
+        with self._lock:
+            if self._entries.pop(key, None) is not None:
+                self._evicted('invalidated')
+
+    def invalidate_prefix(self, prefix):
+        """Drop every entry whose key starts with the tuple `prefix`, e.g. all versions of one detail"""
+        with self._lock:
+            stale = [key for key in self._entries if key[:len(prefix)] == prefix]
+            for key in stale:
+                del self._entries[key]
+                self._evicted('invalidated')
+
+    def invalidate_namespace(self, namespace):
+        self.invalidate_prefix((namespace,))
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            CACHE_ENTRIES.labels(cache=self.name).set(0)
+
+    def _evicted(self, reason):
+        CACHE_EVICTIONS.labels(cache=self.name, reason=reason).inc()
+        CACHE_ENTRIES.labels(cache=self.name).set(len(self._entries))
@@ -0,0 +1,221 @@
+import zlib
+from prometheus_client import Counter
+from werkzeug.datastructures import Headers
+from werkzeug.http import parse_accept_header
+
+try:
+    import brotli
+except ImportError:  # optional; br is not offered without it
+    brotli = None
+
+try:
+    import zstandard
+except ImportError:  # optional; zstd is not offered without it
+    zstandard = None
+
+# Types worth compressing; images, fonts and archives are compressed already
+COMPRESSIBLE_TYPES = (
+    'text/', 'application/json', 'application/x-ndjson', 'application/javascript',
+    'application/manifest+json', 'image/svg+xml'
+)
+
+# No body (204, 304) or a byte range of the identity body (206)
+UNTOUCHED_STATUSES = (204, 206, 304)
+
+DEFAULT_LEVELS = {'gzip': 6, 'br': 4, 'zstd': 3}
+
+COMPRESSION_INPUT = Counter('http_compression_input_bytes_total', 'Response bytes before compression', ['encoding'])
+COMPRESSION_OUTPUT = Counter('http_compression_output_bytes_total', 'Response bytes after compression', ['encoding'])
+
+def installed(encoding):
+    return encoding == 'gzip' or (encoding == 'br' and brotli is not None) or (encoding == 'zstd' and zstandard is not None)
+
+class ResponseEncoder:
+    """Streaming compressor for one response body"""
+
+    def __init__(self, encoding, level):
+        self.encoding = encoding
+        if encoding == 'gzip':
+            compressor = zlib.compressobj(level, zlib.DEFLATED, 31)
+            self._compress = compressor.compress
+            self._flush = lambda: compressor.flush(zlib.Z_SYNC_FLUSH)
+            self._finish = compressor.flush
+        elif encoding == 'br':
+            compressor = brotli.Compressor(quality=level)
+            self._compress = compressor.process
+            self._flush = compressor.flush
+            self._finish = compressor.finish
+        elif encoding == 'zstd':
+            compressor = zstandard.ZstdCompressor(level=level).compressobj()
+            self._compress = compressor.compress
+            self._flush = lambda: compressor.flush(zstandard.COMPRESSOBJ_FLUSH_BLOCK)
+            self._finish = compressor.flush
+        else:
+            raise ValueError(f'Unsupported encoding: {encoding}')
+
+    def encode(self, data, final=False):
+        """
+        Compressed bytes for `data`, flushed so the client can decode them
+        right away; `final` ends the stream instead
+        """
+        out = self._compress(data) + (self._finish() if final else self._flush())
+        COMPRESSION_INPUT.labels(encoding=self.encoding).inc(len(data))
+        COMPRESSION_OUTPUT.labels(encoding=self.encoding).inc(len(out))
+        return out
+
+def suffix_etag(etag, encoding):
+    """ETag of the `encoding` representation: "abc" -> "abc-gzip" (weak tags keep their W/)"""
+    return f'{etag[:-1]}-{encoding}"' if etag.endswith('"') else etag
+
+def merge_vary(vary):
+    fields = [field.strip().lower() for field in (vary or '').split(',') if field.strip()]
+    if '*' in fields or 'accept-encoding' in fields:
+        return vary
+    return f'{vary}, Accept-Encoding' if fields else 'Accept-Encoding'
+
+class Compression:
+    """
+    Response compression policy shared by the WSGI and ASGI middlewares.
+
+    A response is compressed when its type is textual, it is not encoded
+    already, it allows transformation and it is at least `min_size` bytes
+    (streamed bodies of unknown length always qualify). The encoding is the
+    client's most preferred of `encodings`; ties go to the server's order.
+
+    A compressed representation gets its own ETag ("etag-gzip"). The
+    middlewares strip those suffixes from If-None-Match before the app sees
+    it, so the app's own 304 checks keep working unchanged.
+    """
+
+    def __init__(self, encodings=('br', 'zstd', 'gzip'), levels=None, min_size=1024):
+        self.encodings = tuple(encoding for encoding in encodings if installed(encoding))
+        self.levels = dict(DEFAULT_LEVELS, **(levels or {}))
+        self.min_size = min_size
+
+    @classmethod
+    def from_config(cls, config):
+        if not config['COMPRESS_ENABLED']:
+            return cls(encodings=())
+        return cls(
+            encodings=[encoding.strip() for encoding in config['COMPRESS_ENCODINGS'].split(',') if encoding.strip()],
+            levels={
+                'gzip': config['COMPRESS_GZIP_LEVEL'],
+                'br': config['COMPRESS_BR_QUALITY'],
+                'zstd': config['COMPRESS_ZSTD_LEVEL']
+            },
+            min_size=config['COMPRESS_MIN_SIZE']
+        )
+
+    @property
+    def enabled(self):
+        return bool(self.encodings)
+
+    def negotiate(self, accept_encoding):
+        """Encoding to use for an Accept-Encoding header, or None for identity"""
+        if not accept_encoding:
+            return None
+        accept = parse_accept_header(accept_encoding)
+        best, best_quality = None, 0
+        for encoding in self.encodings:
+            quality = accept[encoding]
+            if quality > best_quality:
+                best, best_quality = encoding, quality
+        return best
+
+    def strip_etag_suffixes(self, if_none_match):
+        """(If-None-Match without our encoding suffixes, whether any was found)"""
+        stripped = if_none_match
+        for encoding in self.encodings:
+            stripped = stripped.replace(f'-{encoding}"', '"')
+        return stripped, stripped != if_none_match
+
+    def eligible(self, status, headers):
+        if status < 200 or status in UNTOUCHED_STATUSES:
+            return False
+        if 'Content-Encoding' in headers or 'Content-Range' in headers:
+            return False
+        if 'no-transform' in headers.get('Cache-Control', '').lower():
+            return False
+        if not headers.get('Content-Type', '').startswith(COMPRESSIBLE_TYPES):
+            return False
+        length = headers.get('Content-Length', type=int)
+        return length is None or length >= self.min_size
+
+    def prepare(self, status, headers, encoding, suffixed):
+        """
+        Update the werkzeug `headers` of a response for `encoding` (None when
+        the client accepts none of ours); returns a ResponseEncoder for the
+        body, or None to send it as is
+        """
+        if status == 304:
+            # Echo the representation the client revalidated
+            etag = headers.get('ETag')
+            if encoding and suffixed and etag and not etag.endswith(f'-{encoding}"'):
+                headers['ETag'] = suffix_etag(etag, encoding)
+            return None
+        if not self.eligible(status, headers):
+            return None
+
+        headers['Vary'] = merge_vary(headers.get('Vary'))
+        if encoding is None:
+            return None
+        headers.remove('Content-Length')
+        headers['Content-Encoding'] = encoding
+        if 'ETag' in headers:
+            headers['ETag'] = suffix_etag(headers['ETag'], encoding)
+        return ResponseEncoder(encoding, self.levels[encoding])
+
+class CompressionMiddleware:
+    """
+    WSGI middleware applying `compression` to an app's responses. Bodies of
+    known length are compressed in one piece; streamed bodies chunk by
+    chunk, each flushed so the client receives it without delay.
+    """
+
+    def __init__(self, app, compression):
+        self.app = app
+        self.compression = compression
+
+    def __call__(self, environ, start_response):
+        if environ['REQUEST_METHOD'] == 'HEAD':
+            return self.app(environ, start_response)
+
+        encoding = self.compression.negotiate(environ.get('HTTP_ACCEPT_ENCODING'))
+        suffixed = False
+        if encoding and 'HTTP_IF_NONE_MATCH' in environ:
+            environ['HTTP_IF_NONE_MATCH'], suffixed = self.compression.strip_etag_suffixes(environ['HTTP_IF_NONE_MATCH'])
+
+        captured = {}
+
+        def capture(status, headers, exc_info=None):
+            captured.update(status=status, headers=headers, exc_info=exc_info)
+
+        app_iter = self.app(environ, capture)
+        headers = Headers(captured['headers'])
+        buffered = 'Content-Length' in headers
+        encoder = self.compression.prepare(int(captured['status'].split()[0]), headers, encoding, suffixed)
+
+        if encoder is not None and buffered:
+            try:
+                body = encoder.encode(b''.join(app_iter), final=True)
+            finally:
+                if hasattr(app_iter, 'close'):
+                    app_iter.close()
+            headers['Content-Length'] = str(len(body))
+            start_response(captured['status'], headers.to_wsgi_list(), captured['exc_info'])
+            return [body]
+
+        start_response(captured['status'], headers.to_wsgi_list(), captured['exc_info'])
+        if encoder is None:
+            return app_iter
+        return self.stream(app_iter, encoder)
+
+    def stream(self, app_iter, encoder):
+        try:
+            for chunk in app_iter:
+                if chunk:
+                    yield encoder.encode(chunk)
+            yield encoder.encode(b'', final=True)
+        finally:
+            if hasattr(app_iter, 'close'):
+                app_iter.close()
@@ -0,0 +1,76 @@
+from models.restaurant import geo_point
+from services.pagination import split_page
+
+DEFAULT_RADIUS_KM = 10
+MAX_RADIUS_KM = 50
+EARTH_RADIUS_KM = 6378.1
+
+def validate_coordinates(latitude, longitude):
+    """Raise ValueError unless latitude/longitude are numbers within range"""
+    for name, value, bound in (('latitude', latitude, 90), ('longitude', longitude, 180)):
+        if isinstance(value, bool) or not isinstance(value, (int, float)):
+            raise ValueError(f'{name} must be a number')
+        if not -bound <= value <= bound:
+            raise ValueError(f'{name} must be between -{bound} and {bound}')
+
+def near_pipeline(query, latitude, longitude, radius_km, limit, after=None):
+    """
+    Aggregation pipeline returning up to `limit` documents matching `query`
+    within `radius_km`, nearest first, each with a `distance_m` field.
+
+    $geoNear streams documents from the 2dsphere index in distance order, so
+    `$limit` stops the scan after `limit` documents; there is no `$sort`,
+    which would read every match within the radius first.
+
+    `after` is the cursor key of the previous page (see near_cursor_key):
+    its last distance and the ids it returned at that distance.
+    """
+    radius_km = min(radius_km, MAX_RADIUS_KM)
+    geo_near = {
+        'near': geo_point(latitude, longitude),
+        'key': 'location',
+        'distanceField': 'distance_m',
+        'maxDistance': radius_km * 1000,
+        'spherical': True,
+        'query': query
+    }
+    pipeline = [{'$geoNear': geo_near}]
+    if after is not None:
+        distance, seen = after[0], seen_ids(after)
+        geo_near['minDistance'] = distance
+        pipeline.append({'$match': {'$or': [
+            {'distance_m': {'$gt': distance}},
+            {'distance_m': distance, '_id': {'$nin': seen}}
+        ]}})
+    pipeline.append({'$limit': limit})
+    return pipeline
+
+def seen_ids(after):
+    # Cursors issued before ties were tracked carry a single _id
+    return after[1] if isinstance(after[1], list) else [after[1]]
+
+def near_cursor_key(page, after=None):
+    """
+    (last distance, ids returned at that distance) after a nearest-first page.
+    Equidistant documents, such as restaurants at the same address, come out
+    of $geoNear in no particular order, so the next page skips exactly the
+    ones already returned rather than resuming after an _id. A group that
+    spans pages accumulates its ids from the previous cursor `after`.
+    """
+    distance = page[-1]['distance_m']
+    seen = [doc['_id'] for doc in page if doc['distance_m'] == distance]
+    if after is not None and after[0] == distance:
+        seen = seen_ids(after) + seen
+    return distance, seen
+
+def split_near_page(docs, limit, after=None):
+    """split_page of a near_pipeline result fetched with `limit + 1` after cursor key `after`"""
+    return split_page(docs, limit, lambda last: near_cursor_key(docs[:limit], after))
+
+def within_radius(latitude, longitude, radius_km):
+    """
+    Filter on `location` for points within `radius_km`, without ordering.
+    Unlike $geoNear it can be combined with other stages such as $text.
+    """
+    radius_km = min(radius_km, MAX_RADIUS_KM)
+    return {'$geoWithin': {'$centerSphere': [[longitude, latitude], radius_km / EARTH_RADIUS_KM]}}
@@ -0,0 +1,22 @@
+from pymongo import ASCENDING, DESCENDING, GEOSPHERE, TEXT
+
+def ensure_indexes(db):
+    """Create the indexes the API relies on (no-op for existing ones)"""
+    db.restaurants.create_index([('location', GEOSPHERE)])
+    # Style filters (exact/$in on normalized values) in _id or rating order
+    db.restaurants.create_index([('style', ASCENDING), ('_id', ASCENDING)])
+    db.restaurants.create_index([('style', ASCENDING), ('average_rating', DESCENDING), ('_id', ASCENDING)])
+    db.restaurants.create_index([('average_rating', DESCENDING), ('_id', ASCENDING)])
+    # Leaderboard rebuilds read the top of one style by weighted rating
+    db.restaurants.create_index([('style', ASCENDING), ('weighted_rating', DESCENDING), ('_id', ASCENDING)])
+    db.restaurants.create_index([('name', TEXT), ('description', TEXT)])
+    db.restaurants.create_index([('updated_at', ASCENDING)])
+    # Tombstones awaiting purge, oldest first (absent on live restaurants)
+    db.restaurants.create_index([('deleted_at', ASCENDING)], partialFilterExpression={'deleted_at': {'$type': 'date'}})
+    # Natural keys of documents written by seed_data.py (absent on API-created ones)
+    seeded_only = {'seed_key': {'$type': 'string'}}
+    db.restaurants.create_index([('seed_key', ASCENDING)], unique=True, partialFilterExpression=seeded_only)
+    db.reviews.create_index([('seed_key', ASCENDING)], unique=True, partialFilterExpression=seeded_only)
+    # Newest-first reviews of one restaurant (detail embed and keyset pages)
+    db.reviews.create_index([('restaurant_id', ASCENDING), ('created_at', DESCENDING), ('_id', DESCENDING)])
+    db.reviews.create_index([('created_at', ASCENDING)])
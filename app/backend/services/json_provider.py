@@ -0,0 +1,62 @@
+import json
+import os
+from datetime import date, datetime
+from bson import ObjectId
+from flask.json.provider import DefaultJSONProvider
+
+try:
+    import orjson
+except ImportError:  # optional C accelerator
+    orjson = None
+
+def mongo_default(obj):
+    """Encode the BSON types our documents contain; used by both backends"""
+    if isinstance(obj, ObjectId):
+        return str(obj)
+    if isinstance(obj, (datetime, date)):
+        return obj.isoformat()
+    return DefaultJSONProvider.default(obj)
+
+def orjson_enabled(backend=None):
+    """True when orjson is installed and JSON_BACKEND (or `backend`) allows it"""
+    backend = backend or os.getenv('JSON_BACKEND', 'auto')
+    return orjson is not None and backend in ('auto', 'orjson')
+
+def dumps_bytes(obj, use_orjson):
+    """Compact UTF-8 JSON for `obj`, outside any Flask app (used by the ASGI app)"""
+    if use_orjson:
+        return orjson.dumps(obj, default=mongo_default)
+    return json.dumps(obj, default=mongo_default, separators=(',', ':'), ensure_ascii=False).encode()
+
+class MongoJSONProvider(DefaultJSONProvider):
+    """
+    JSON provider that encodes raw MongoDB documents in a single pass.
+
+    ObjectId and datetime values are handled by the encoder's `default`
+    hook, so documents are encoded as read, without a converted copy. When
+    orjson is installed it is used for encoding; set JSON_BACKEND=json to
+    force the standard library.
+    """
+
+    sort_keys = False
+    default = staticmethod(mongo_default)
+
+    def __init__(self, app, backend=None):
+        super().__init__(app)
+        self.use_orjson = orjson_enabled(backend)
+
+    def dumps(self, obj, **kwargs):
+        return self.dumps_bytes(obj, **kwargs).decode()
+
+    def dumps_bytes(self, obj, **kwargs):
+        """Serialize `obj` straight to UTF-8 bytes"""
+        if self.use_orjson and not kwargs:
+            option = orjson.OPT_SORT_KEYS if self.sort_keys else 0
+            return orjson.dumps(obj, default=self.default, option=option)
+        kwargs.setdefault('separators', (',', ':'))
+        kwargs.setdefault('ensure_ascii', False)
+        return super().dumps(obj, **kwargs).encode()
+
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        return self._app.response_class(self.dumps_bytes(obj) + b'\n', mimetype=self.mimetype)
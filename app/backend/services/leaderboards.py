@@ -0,0 +1,273 @@
+from datetime import datetime
+from pymongo import ReturnDocument, UpdateOne
+from models.restaurant import NOT_DELETED
+
+# Compare-and-set attempts before falling back to a rebuild of the board
+MAX_CAS_ATTEMPTS = 5
+
+ENTRY_FIELDS = {'name': 1, 'style': 1, 'rating_sum': 1, 'total_reviews': 1, 'weighted_rating': 1}
+
+# Returned by Leaderboards._fold when the board must be re-read from the index
+REBUILD = object()
+
+def weighted_rating(rating_sum, total_reviews, prior_mean, prior_weight):
+    """
+    Bayesian average: the restaurant's ratings plus `prior_weight` virtual
+    ratings of `prior_mean`, so a few 5-star reviews do not outrank a long
+    track record.
+    """
+    return round((rating_sum + prior_mean * prior_weight) / (total_reviews + prior_weight), 4)
+
+def board_update(style, version, entries):
+    """(filter, update) replacing a board's entries if it is still at `version`"""
+    return (
+        {'_id': style, 'version': version},
+        {
+            '$set': {'entries': entries, 'updated_at': datetime.utcnow()},
+            '$inc': {'version': 1}
+        }
+    )
+
+class Leaderboards:
+    """
+    Top-`size` restaurants per style by weighted rating, materialized in the
+    `leaderboards` collection as one document per style:
+
+        {_id: style, entries: [...], version: n, updated_at: ...}
+
+    Every score change is folded into the board in Python and written back
+    with a compare-and-set on `version`. When an entry leaves a full board
+    (deleted, demoted or no longer eligible) the board is rebuilt from the
+    {style, weighted_rating, _id} index, which reads `size` documents.
+    """
+
+    def __init__(self, size=50, prior_mean=3.5, prior_weight=10, min_reviews=1):
+        self.size = size
+        self.prior_mean = prior_mean
+        self.prior_weight = prior_weight
+        self.min_reviews = min_reviews
+
+    @classmethod
+    def from_config(cls, config):
+        return cls(
+            size=config['LEADERBOARD_SIZE'],
+            prior_mean=config['LEADERBOARD_PRIOR_MEAN'],
+            prior_weight=config['LEADERBOARD_PRIOR_WEIGHT'],
+            min_reviews=config['LEADERBOARD_MIN_REVIEWS']
+        )
+
+    def score(self, restaurant):
+        return weighted_rating(
+            restaurant.get('rating_sum', 0),
+            restaurant.get('total_reviews', 0),
+            self.prior_mean,
+            self.prior_weight
+        )
+
+    def eligible(self, restaurant):
+        return restaurant.get('total_reviews', 0) >= self.min_reviews
+
+    def entry(self, restaurant):
+        total_reviews = restaurant.get('total_reviews', 0)
+        return {
+            'restaurant_id': restaurant['_id'],
+            'name': restaurant.get('name'),
+            'weighted_rating': restaurant['weighted_rating'],
+            'average_rating': round(restaurant.get('rating_sum', 0) / total_reviews, 1) if total_reviews else 0.0,
+            'total_reviews': total_reviews
+        }
+
+    def top(self, db, style, limit):
+        """(entries, version) of a style's board, building it on first use"""
+        board = db.leaderboards.find_one({'_id': style}, {'entries': {'$slice': limit}, 'version': 1})
+        if board is None:
+            board = self.rebuild(db, style)
+        return board['entries'][:limit], board['version']
+
+    def record(self, db, restaurant):
+        """
+        Store the weighted rating of `restaurant` (a document with _id, name,
+        style, rating_sum and total_reviews) and fold it into its board.
+        """
+        restaurant['weighted_rating'] = self.score(restaurant)
+        result = db.restaurants.update_one(
+            {'_id': restaurant['_id'], 'total_reviews': restaurant.get('total_reviews', 0)},
+            {'$set': {'weighted_rating': restaurant['weighted_rating']}}
+        )
+        if result.matched_count == 0:
+            # Another review landed meanwhile; its writer records the newer score
+            return
+        self._update(db, restaurant['style'], restaurant['_id'], restaurant if self.eligible(restaurant) else None)
+
+    def record_many(self, db, restaurant_ids):
+        """Re-score restaurants after a bulk change, then rebuild the affected boards"""
+        restaurants = list(db.restaurants.find({'_id': {'$in': list(restaurant_ids)}}, ENTRY_FIELDS))
+        operations = []
+        for restaurant in restaurants:
+            score = self.score(restaurant)
+            if restaurant.get('weighted_rating') != score:
+                operations.append(UpdateOne({'_id': restaurant['_id']}, {'$set': {'weighted_rating': score}}))
+        if operations:
+            db.restaurants.bulk_write(operations, ordered=False)
+        for style in {restaurant['style'] for restaurant in restaurants if restaurant.get('style')}:
+            self.rebuild(db, style)
+
+    def remove(self, db, style, restaurant_id):
+        """Take a deleted restaurant off its board"""
+        self._update(db, style, restaurant_id, None)
+
+    def compute(self, db, style):
+        """Entries the board of `style` should hold, read from the restaurants index"""
+        query = dict(NOT_DELETED, style=style, total_reviews={'$gte': self.min_reviews})
+        restaurants = db.restaurants.find(query, ENTRY_FIELDS).sort([('weighted_rating', -1), ('_id', 1)]).limit(self.size)
+        return [self.entry(restaurant) for restaurant in restaurants if 'weighted_rating' in restaurant]
+
+    def rebuild(self, db, style):
+        """Replace the board of `style` with a fresh read from the index"""
+        board = db.leaderboards.find_one_and_update(
+            {'_id': style},
+            {
+                '$set': {'entries': self.compute(db, style), 'updated_at': datetime.utcnow()},
+                '$inc': {'version': 1}
+            },
+            upsert=True,
+            return_document=ReturnDocument.AFTER
+        )
+        return board
+
+    def is_stale(self, db, style):
+        """True if the stored board of `style` differs from a fresh computation"""
+        board = db.leaderboards.find_one({'_id': style}, {'entries': 1})
+        return board is None or board['entries'] != self.compute(db, style)
+
+    def rescore_all(self, db, dry_run=False):
+        """Recompute weighted_rating on every restaurant; returns the number that drifted"""
+        drifted = 0
+        operations = []
+        for restaurant in db.restaurants.find({}, ENTRY_FIELDS):
+            score = self.score(restaurant)
+            if restaurant.get('weighted_rating') == score:
+                continue
+            drifted += 1
+            operations.append(UpdateOne({'_id': restaurant['_id']}, {'$set': {'weighted_rating': score}}))
+            if len(operations) >= 1000:
+                self._flush(db, operations, dry_run)
+                operations = []
+        self._flush(db, operations, dry_run)
+        return drifted
+
+    def _flush(self, db, operations, dry_run):
+        if operations and not dry_run:
+            db.restaurants.bulk_write(operations, ordered=False)
+
+    def _fold(self, board, restaurant_id, restaurant):
+        """
+        Entries of `board` after `restaurant` (None to remove it) replaces
+        its current entry; None if the board is unaffected, REBUILD if the
+        next-best restaurant has to be read from the index.
+        """
+        entries = [entry for entry in board['entries'] if entry['restaurant_id'] != restaurant_id]
+        was_listed = len(entries) < len(board['entries'])
+        if restaurant is not None:
+            entries.append(self.entry(restaurant))
+            entries.sort(key=lambda entry: (-entry['weighted_rating'], entry['restaurant_id']))
+        listed = any(entry['restaurant_id'] == restaurant_id for entry in entries[:self.size])
+
+        if not was_listed and not listed:
+            return None
+        if was_listed and not listed and len(board['entries']) >= self.size:
+            # A slot opened on a full board; the next-best restaurant must be read
+            return REBUILD
+        return entries[:self.size]
+
+    def _update(self, db, style, restaurant_id, restaurant):
+        if not style:
+            return
+        for _ in range(MAX_CAS_ATTEMPTS):
+            board = db.leaderboards.find_one({'_id': style})
+            if board is None:
+                self.rebuild(db, style)
+                return
+
+            entries = self._fold(board, restaurant_id, restaurant)
+            if entries is None:
+                return
+            if entries is REBUILD:
+                self.rebuild(db, style)
+                return
+
+            result = db.leaderboards.update_one(*board_update(style, board['version'], entries))
+            if result.modified_count:
+                return
+        self.rebuild(db, style)
+
+class AsyncLeaderboards(Leaderboards):
+    """Leaderboards on a Motor database; the same boards, read and written with await"""
+
+    async def top(self, db, style, limit):
+        board = await db.leaderboards.find_one({'_id': style}, {'entries': {'$slice': limit}, 'version': 1})
+        if board is None:
+            board = await self.rebuild(db, style)
+        return board['entries'][:limit], board['version']
+
+    async def record(self, db, restaurant):
+        restaurant['weighted_rating'] = self.score(restaurant)
+        result = await db.restaurants.update_one(
+            {'_id': restaurant['_id'], 'total_reviews': restaurant.get('total_reviews', 0)},
+            {'$set': {'weighted_rating': restaurant['weighted_rating']}}
+        )
+        if result.matched_count == 0:
+            return
+        await self._update(db, restaurant['style'], restaurant['_id'], restaurant if self.eligible(restaurant) else None)
+
+    async def record_many(self, db, restaurant_ids):
+        restaurants = await db.restaurants.find({'_id': {'$in': list(restaurant_ids)}}, ENTRY_FIELDS).to_list(None)
+        operations = []
+        for restaurant in restaurants:
+            score = self.score(restaurant)
+            if restaurant.get('weighted_rating') != score:
+                operations.append(UpdateOne({'_id': restaurant['_id']}, {'$set': {'weighted_rating': score}}))
+        if operations:
+            await db.restaurants.bulk_write(operations, ordered=False)
+        for style in {restaurant['style'] for restaurant in restaurants if restaurant.get('style')}:
+            await self.rebuild(db, style)
+
+    async def remove(self, db, style, restaurant_id):
+        await self._update(db, style, restaurant_id, None)
+
+    async def compute(self, db, style):
+        query = dict(NOT_DELETED, style=style, total_reviews={'$gte': self.min_reviews})
+        restaurants = db.restaurants.find(query, ENTRY_FIELDS).sort([('weighted_rating', -1), ('_id', 1)]).limit(self.size)
+        return [self.entry(restaurant) async for restaurant in restaurants if 'weighted_rating' in restaurant]
+
+    async def rebuild(self, db, style):
+        return await db.leaderboards.find_one_and_update(
+            {'_id': style},
+            {
+                '$set': {'entries': await self.compute(db, style), 'updated_at': datetime.utcnow()},
+                '$inc': {'version': 1}
+            },
+            upsert=True,
+            return_document=ReturnDocument.AFTER
+        )
+
+    async def _update(self, db, style, restaurant_id, restaurant):
+        if not style:
+            return
+        for _ in range(MAX_CAS_ATTEMPTS):
+            board = await db.leaderboards.find_one({'_id': style})
+            if board is None:
+                await self.rebuild(db, style)
+                return
+
+            entries = self._fold(board, restaurant_id, restaurant)
+            if entries is None:
+                return
+            if entries is REBUILD:
+                await self.rebuild(db, style)
+                return
+
+            result = await db.leaderboards.update_one(*board_update(style, board['version'], entries))
+            if result.modified_count:
+                return
+        await self.rebuild(db, style)
@@ -0,0 +1,44 @@
+import atexit
+import queue
+import random
+from logging.handlers import QueueHandler, QueueListener
+from prometheus_client import Counter
+
+LOG_RECORDS_DROPPED = Counter('log_records_dropped_total', 'Log records dropped because the log queue was full')
+
+class DroppingQueueHandler(QueueHandler):
+    """QueueHandler that never blocks the caller: when the bounded queue is full the record is dropped and counted"""
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            LOG_RECORDS_DROPPED.inc()
+
+def start_queue_logging(logger, handlers, maxsize=10000):
+    """
+    Route `logger` through a bounded in-memory queue drained by a background
+    thread that writes to `handlers`, so formatting, disk I/O and file
+    rotation stay off the request path. Returns the running listener.
+    """
+    log_queue = queue.Queue(maxsize)
+    listener = QueueListener(log_queue, *handlers, respect_handler_level=True)
+    logger.addHandler(DroppingQueueHandler(log_queue))
+    listener.start()
+    atexit.register(listener.stop)
+    return listener
+
+class RequestLogSampler:
+    """
+    Decide which request logs to keep: errors and slow requests always,
+    the successful fast path at `sample_rate` (0.0-1.0).
+    """
+
+    def __init__(self, sample_rate=1.0, slow_ms=1000):
+        self.sample_rate = sample_rate
+        self.slow_ms = slow_ms
+
+    def should_log(self, status_code, duration_ms):
+        if status_code >= 400 or duration_ms >= self.slow_ms:
+            return True
+        return self.sample_rate >= 1 or random.random() < self.sample_rate
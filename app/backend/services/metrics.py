@@ -0,0 +1,47 @@
+import os
+
+# gunicorn.conf.py creates the shared directory before forking workers. Any
+# other process that inherits the variable without the directory (a migration,
+# the seed job, `python app.py`) keeps its metrics in-process instead of failing
+# on the first one. prometheus_client picks the mode when it is imported, so
+# this module is imported before it (see app.py).
+if os.getenv('PROMETHEUS_MULTIPROC_DIR') and not os.path.isdir(os.environ['PROMETHEUS_MULTIPROC_DIR']):
+    del os.environ['PROMETHEUS_MULTIPROC_DIR']
+
+from prometheus_client import CollectorRegistry, REGISTRY, generate_latest, CONTENT_TYPE_LATEST  # noqa: E402
+from prometheus_client import multiprocess  # noqa: E402
+
+# Label values outside these sets are folded into one bucket so a scanner
+# cannot create unbounded time series
+KNOWN_METHODS = frozenset(('GET', 'HEAD', 'POST', 'PUT', 'PATCH', 'DELETE', 'OPTIONS'))
+UNMATCHED_ENDPOINT = 'unmatched'
+OTHER_METHOD = 'other'
+
+def multiprocess_dir():
+    """Shared metrics directory, set when running under several workers"""
+    return os.getenv('PROMETHEUS_MULTIPROC_DIR') or None
+
+def endpoint_label(app, request):
+    """Metric label for the route that served `request`, never the raw URL"""
+    if request.endpoint in app.view_functions:
+        return request.endpoint
+    return UNMATCHED_ENDPOINT
+
+def method_label(request):
+    return request.method if request.method in KNOWN_METHODS else OTHER_METHOD
+
+def render_metrics():
+    """
+    Exposition payload for /metrics.
+
+    Under PROMETHEUS_MULTIPROC_DIR every worker writes its samples to
+    mmapped files in that directory; a fresh registry with a
+    MultiProcessCollector merges all of them, so whichever worker answers
+    the scrape reports the totals of the whole server.
+    """
+    if multiprocess_dir():
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+    return generate_latest(registry), CONTENT_TYPE_LATEST
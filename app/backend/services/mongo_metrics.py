@@ -0,0 +1,125 @@
+import contextvars
+import threading
+import time
+from flask import g, has_app_context
+from pymongo import monitoring
+from prometheus_client import Counter, Gauge, Histogram
+
+MONGO_COMMAND_DURATION = Histogram(
+    'mongodb_command_duration_seconds',
+    'MongoDB command latency',
+    ['collection', 'operation'],
+    buckets=(.0005, .001, .0025, .005, .01, .025, .05, .1, .25, .5, 1, 2.5, 5)
+)
+MONGO_COMMAND_FAILURES = Counter('mongodb_command_failures_total', 'Failed MongoDB commands', ['collection', 'operation'])
+MONGO_POOL_CHECKOUT_WAIT = Histogram(
+    'mongodb_pool_checkout_wait_seconds',
+    'Time spent waiting for a pooled MongoDB connection',
+    buckets=(.0001, .0005, .001, .005, .01, .05, .1, .5, 1, 5)
+)
+DB_CONNECTIONS = Gauge('mongodb_connections_active', 'Active MongoDB connections', multiprocess_mode='livesum')
+DB_CONNECTIONS_IDLE = Gauge('mongodb_connections_idle', 'Idle pooled MongoDB connections', multiprocess_mode='livesum')
+
+# Commands whose first field is not a collection name
+_NO_COLLECTION = 'none'
+
+def command_collection(command_name, command):
+    if command_name == 'getMore':
+        return command.get('collection', _NO_COLLECTION)
+    target = command.get(command_name)
+    return target if isinstance(target, str) else _NO_COLLECTION
+
+# Mongo time of the async request running in this context. Motor copies the
+# context into the executor thread that runs each command, so the listener sees it
+_async_request_stats = contextvars.ContextVar('mongo_request_stats', default=None)
+
+def request_mongo_stats():
+    """(milliseconds, commands) spent in MongoDB by the current request"""
+    return round(g.get('mongo_time', 0.0) * 1000, 2), g.get('mongo_commands', 0)
+
+def begin_async_request_stats():
+    """Start counting Mongo time for the async request in this context; returns the token for end_async_request_stats"""
+    return _async_request_stats.set({'time': 0.0, 'commands': 0})
+
+def end_async_request_stats(token):
+    """(milliseconds, commands) spent in MongoDB since begin_async_request_stats"""
+    stats = _async_request_stats.get()
+    _async_request_stats.reset(token)
+    return round(stats['time'] * 1000, 2), stats['commands']
+
+class CommandMetricsListener(monitoring.CommandListener):
+    """Per-collection/operation latency, plus Mongo time accumulated on the current request"""
+
+    def __init__(self):
+        self._pending = {}
+
+    def started(self, event):
+        self._pending[(event.connection_id, event.request_id)] = command_collection(event.command_name, event.command)
+
+    def succeeded(self, event):
+        self._finished(event, failed=False)
+
+    def failed(self, event):
+        self._finished(event, failed=True)
+
+    def _finished(self, event, failed):
+        collection = self._pending.pop((event.connection_id, event.request_id), _NO_COLLECTION)
+        seconds = event.duration_micros / 1e6
+        MONGO_COMMAND_DURATION.labels(collection=collection, operation=event.command_name).observe(seconds)
+        if failed:
+            MONGO_COMMAND_FAILURES.labels(collection=collection, operation=event.command_name).inc()
+
+        # Listeners run on the thread that issued the command
+        if has_app_context():
+            g.mongo_time = g.get('mongo_time', 0.0) + seconds
+            g.mongo_commands = g.get('mongo_commands', 0) + 1
+            return
+        stats = _async_request_stats.get()
+        if stats is not None:
+            stats['time'] += seconds
+            stats['commands'] += 1
+
+class PoolMetricsListener(monitoring.ConnectionPoolListener):
+    """Checkout wait time and in-use/idle connection counts"""
+
+    def __init__(self):
+        self._checkout = threading.local()
+
+    def connection_check_out_started(self, event):
+        self._checkout.started = time.perf_counter()
+
+    def connection_checked_out(self, event):
+        started = getattr(self._checkout, 'started', None)
+        if started is not None:
+            MONGO_POOL_CHECKOUT_WAIT.observe(time.perf_counter() - started)
+            self._checkout.started = None
+        DB_CONNECTIONS.inc()
+        DB_CONNECTIONS_IDLE.dec()
+
+    def connection_check_out_failed(self, event):
+        self._checkout.started = None
+
+    def connection_checked_in(self, event):
+        DB_CONNECTIONS.dec()
+        DB_CONNECTIONS_IDLE.inc()
+
+    def connection_created(self, event):
+        DB_CONNECTIONS_IDLE.inc()
+
+    def connection_closed(self, event):
+        DB_CONNECTIONS_IDLE.dec()
+
+    def connection_ready(self, event):
+        pass
+
+    def pool_created(self, event):
+        pass
+
+    def pool_ready(self, event):
+        pass
+
+    def pool_cleared(self, event):
+        pass
+
+    def pool_closed(self, event):
+        pass
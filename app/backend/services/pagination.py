@@ -0,0 +1,72 @@
+import base64
+import json
+from datetime import datetime
+from bson import ObjectId
+
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 500
+
+def parse_limit(value, default=DEFAULT_PAGE_SIZE, maximum=MAX_PAGE_SIZE):
+    """Parse the `limit` query argument, clamped to [1, maximum]"""
+    if value is None or value == '':
+        return default
+    try:
+        limit = int(value)
+    except (TypeError, ValueError):
+        limit = 0
+    if limit < 1:
+        raise ValueError('limit must be a positive integer')
+    return min(limit, maximum)
+
+def _encode_value(value):
+    if isinstance(value, list):
+        return [_encode_value(item) for item in value]
+    if isinstance(value, ObjectId):
+        return {'$oid': str(value)}
+    if isinstance(value, datetime):
+        return {'$date': value.isoformat()}
+    return value
+
+def _decode_value(value):
+    if isinstance(value, list):
+        return [_decode_value(item) for item in value]
+    if not isinstance(value, dict):
+        return value
+    if '$oid' in value and ObjectId.is_valid(value['$oid']):
+        return ObjectId(value['$oid'])
+    if isinstance(value.get('$date'), str):
+        try:
+            return datetime.fromisoformat(value['$date'])
+        except ValueError:
+            pass
+    raise ValueError('Invalid cursor')
+
+def encode_cursor(*values):
+    """Encode the sort key of the last item on a page as an opaque token"""
+    payload = [_encode_value(value) for value in values]
+    raw = json.dumps(payload, separators=(',', ':')).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+def decode_cursor(token, size):
+    """Decode a token produced by encode_cursor into its `size` key values"""
+    try:
+        raw = base64.urlsafe_b64decode(token + '=' * (-len(token) % 4))
+        payload = json.loads(raw)
+    except (ValueError, TypeError):
+        raise ValueError('Invalid cursor')
+    if not isinstance(payload, list) or len(payload) != size:
+        raise ValueError('Invalid cursor')
+
+    return [_decode_value(value) for value in payload]
+
+def split_page(docs, limit, cursor_key):
+    """
+    Split a `limit + 1` result into (page, next_cursor).
+
+    `cursor_key` maps the last document of the page to the tuple of sort
+    values the next page resumes after.
+    """
+    if len(docs) <= limit:
+        return docs, None
+    page = docs[:limit]
+    return page, encode_cursor(*cursor_key(page[-1]))
@@ -0,0 +1,137 @@
+import atexit
+import os
+import socket
+import threading
+import time
+from datetime import datetime, timedelta
+from prometheus_client import Counter, Gauge, Histogram
+
+PURGE_BACKLOG = Gauge('purge_backlog_restaurants', 'Deleted restaurants waiting to be purged', multiprocess_mode='livemax')
+PURGE_REVIEWS_DELETED = Counter('purge_reviews_deleted_total', 'Reviews removed by the purge worker')
+PURGE_RESTAURANTS_COMPLETED = Counter('purge_restaurants_completed_total', 'Deleted restaurants fully purged')
+PURGE_BATCH_DURATION = Histogram(
+    'purge_batch_duration_seconds',
+    'Time to find and delete one batch of reviews',
+    buckets=(.005, .01, .025, .05, .1, .25, .5, 1, 2.5, 5, 10)
+)
+
+# Restaurants tombstoned by DELETE and not yet purged
+TOMBSTONED = {'deleted_at': {'$type': 'date'}}
+
+class Purger:
+    """
+    Removes deleted restaurants in the background: the reviews of one
+    tombstoned restaurant in batches of `batch_size`, `pause` seconds apart,
+    then the restaurant document itself.
+
+    A restaurant is claimed with a lease (`purge_lease_until`, `purge_owner`)
+    renewed after every batch, so several workers can purge side by side and
+    a purge interrupted by a restart is picked up again once its lease expires.
+    """
+
+    def __init__(self, batch_size=500, pause=0.1, lease=60, owner=None):
+        self.batch_size = batch_size
+        self.pause = pause
+        self.lease = lease
+        self.owner = owner or f'{socket.gethostname()}:{os.getpid()}'
+
+    @classmethod
+    def from_config(cls, config):
+        return cls(
+            batch_size=config['PURGE_BATCH_SIZE'],
+            pause=config['PURGE_PAUSE'],
+            lease=config['PURGE_LEASE']
+        )
+
+    def backlog(self, db):
+        """Number of deleted restaurants still waiting to be purged"""
+        count = db.restaurants.count_documents(TOMBSTONED)
+        PURGE_BACKLOG.set(count)
+        return count
+
+    def claim(self, db):
+        """Lease the oldest deleted restaurant nobody else holds; None if there is none"""
+        now = datetime.utcnow()
+        return db.restaurants.find_one_and_update(
+            dict(TOMBSTONED, **{'$or': [
+                {'purge_lease_until': {'$exists': False}},
+                {'purge_lease_until': {'$lt': now}}
+            ]}),
+            {'$set': {'purge_lease_until': now + timedelta(seconds=self.lease), 'purge_owner': self.owner}},
+            projection={'_id': 1},
+            sort=[('deleted_at', 1)]
+        )
+
+    def renew(self, db, restaurant_id):
+        """Extend our lease on a restaurant; False if it was taken over meanwhile"""
+        result = db.restaurants.update_one(
+            {'_id': restaurant_id, 'purge_owner': self.owner},
+            {'$set': {'purge_lease_until': datetime.utcnow() + timedelta(seconds=self.lease)}}
+        )
+        return result.matched_count == 1
+
+    def purge(self, db, restaurant_id, stop):
+        """
+        Delete the reviews of a claimed restaurant batch by batch, then the
+        restaurant. Returns the number of reviews deleted, or None if the
+        purge was stopped or lost its lease before finishing.
+        """
+        deleted = 0
+        while True:
+            started = time.perf_counter()
+            # Reviews reference restaurants by string id
+            ids = [doc['_id'] for doc in db.reviews.find({'restaurant_id': str(restaurant_id)}, {'_id': 1}).limit(self.batch_size)]
+            if not ids:
+                break
+            count = db.reviews.delete_many({'_id': {'$in': ids}}).deleted_count
+            PURGE_BATCH_DURATION.observe(time.perf_counter() - started)
+            PURGE_REVIEWS_DELETED.inc(count)
+            deleted += count
+
+            if not self.renew(db, restaurant_id) or stop.wait(self.pause):
+                return None
+
+        db.restaurants.delete_one(dict(TOMBSTONED, _id=restaurant_id, purge_owner=self.owner))
+        PURGE_RESTAURANTS_COMPLETED.inc()
+        return deleted
+
+    def drain(self, db, stop=None):
+        """Purge deleted restaurants until none is left to claim; returns (restaurants, reviews) purged"""
+        stop = stop or threading.Event()
+        restaurants = reviews = 0
+        self.backlog(db)
+        while not stop.is_set():
+            claimed = self.claim(db)
+            if claimed is None:
+                break
+            deleted = self.purge(db, claimed['_id'], stop)
+            if deleted is not None:
+                restaurants += 1
+                reviews += deleted
+        self.backlog(db)
+        return restaurants, reviews
+
+def start_purge_worker(get_db, purger, poll_interval=30, logger=None):
+    """
+    Run `purger.drain` on a daemon thread every `poll_interval` seconds
+    against the database returned by `get_db()`. The thread is stopped at
+    interpreter exit; returns the stop event.
+    """
+    stop = threading.Event()
+
+    def run():
+        while not stop.is_set():
+            try:
+                restaurants, reviews = purger.drain(get_db(), stop)
+                if restaurants and logger is not None:
+                    logger.info(f'Purged {restaurants} deleted restaurants and {reviews} reviews',
+                                extra={'event': 'purge'})
+            except Exception:
+                if logger is not None:
+                    logger.exception('Purge failed', extra={'event': 'purge'})
+            stop.wait(poll_interval)
+
+    thread = threading.Thread(target=run, name='purge-worker', daemon=True)
+    thread.start()
+    atexit.register(stop.set)
+    return stop
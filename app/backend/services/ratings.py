@@ -0,0 +1,197 @@
+import math
+from bson import ObjectId
+from pymongo import ReturnDocument, UpdateOne
+from models.restaurant import NOT_DELETED
+from services.versions import bump_version
+
+RATING_STARS = (1, 2, 3, 4, 5)
+BULK_CHUNK_SIZE = 1000
+
+def rating_bucket(rating):
+    """Histogram bucket key ('1'..'5') for a rating"""
+    return str(min(5, max(1, int(round(rating)))))
+
+def empty_histogram():
+    return {str(star): 0 for star in RATING_STARS}
+
+def average_rating(rating_sum, total_reviews):
+    """Mean rating to one decimal, rounded half up exactly as AVERAGE_EXPRESSION does on the server"""
+    if not total_reviews:
+        return 0.0
+    return math.floor(rating_sum / total_reviews * 10 + 0.5) / 10
+
+# average_rating() as an aggregation expression over the document's own fields
+AVERAGE_EXPRESSION = {'$divide': [
+    {'$floor': {'$add': [{'$multiply': [{'$divide': ['$rating_sum', '$total_reviews']}, 10]}, 0.5]}},
+    10
+]}
+
+def added(field, amount):
+    """Expression for `field` + `amount`, counting a missing field as 0"""
+    return {'$add': [{'$ifNull': [f'${field}', 0]}, amount]}
+
+def rating_increments(ratings):
+    """Amounts by which `ratings` move the sum, count and histogram buckets of an aggregate"""
+    increments = {'rating_sum': sum(ratings), 'total_reviews': len(ratings)}
+    for rating in ratings:
+        key = f'rating_counts.{rating_bucket(rating)}'
+        increments[key] = increments.get(key, 0) + 1
+    return increments
+
+def rating_aggregate(ratings):
+    """The full aggregate of a restaurant whose reviews have `ratings`"""
+    counts = empty_histogram()
+    for rating in ratings:
+        counts[rating_bucket(rating)] += 1
+    return {
+        'rating_sum': sum(ratings),
+        'total_reviews': len(ratings),
+        'rating_counts': counts,
+        'average_rating': average_rating(sum(ratings), len(ratings))
+    }
+
+# Fields apply_ratings returns: the aggregate plus what a leaderboard entry needs
+AGGREGATE_FIELDS = {'name': 1, 'style': 1, 'rating_sum': 1, 'total_reviews': 1}
+
+def rating_update(restaurant_id, ratings):
+    """
+    (filter, update) folding `ratings` into a live restaurant. The update is
+    a pipeline, so the counters, the average derived from them and the
+    reviews_version keyed on by ETags and the detail cache all change in one
+    document write
+    """
+    increments = dict(rating_increments(ratings), reviews_version=1)
+    return (
+        dict(NOT_DELETED, _id=ObjectId(restaurant_id)),
+        [
+            {'$set': dict(
+                {field: added(field, amount) for field, amount in increments.items()},
+                updated_at='$$NOW'
+            )},
+            {'$set': {'average_rating': AVERAGE_EXPRESSION}}
+        ]
+    )
+
+def apply_ratings(db, restaurant_id, ratings):
+    """
+    Atomically add `ratings` to the running aggregate of a restaurant.
+
+    The sum, count and histogram are only ever changed relative to their
+    stored values, so concurrent writers never lose updates, and
+    `average_rating` is recomputed from them by the same update: no reader
+    sees new counters next to an old average. The restaurant's
+    `reviews_version` is bumped in that write too, so conditional GETs on
+    its detail and reviews see the change.
+
+    Returns the updated aggregate (with the restaurant's name and style), or
+    None if the restaurant does not exist or is deleted.
+    """
+    return db.restaurants.find_one_and_update(
+        *rating_update(restaurant_id, ratings),
+        projection=AGGREGATE_FIELDS,
+        return_document=ReturnDocument.AFTER
+    )
+
+async def apply_ratings_async(db, restaurant_id, ratings):
+    """apply_ratings on a Motor database"""
+    return await db.restaurants.find_one_and_update(
+        *rating_update(restaurant_id, ratings),
+        projection=AGGREGATE_FIELDS,
+        return_document=ReturnDocument.AFTER
+    )
+
+def rating_batch_updates(ratings_by_restaurant):
+    return [UpdateOne(*rating_update(restaurant_id, ratings)) for restaurant_id, ratings in ratings_by_restaurant.items()]
+
+def live_query(ratings_by_restaurant):
+    object_ids = [ObjectId(restaurant_id) for restaurant_id in ratings_by_restaurant]
+    return dict(NOT_DELETED, _id={'$in': object_ids})
+
+def apply_rating_batches(db, ratings_by_restaurant):
+    """
+    Fold many restaurants' new ratings in two round trips in total: one
+    bulk of the atomic updates from apply_ratings and one read of which
+    restaurants are live, i.e. were updated.
+
+    Returns the ids (as strings) of the restaurants that were updated.
+    """
+    if not ratings_by_restaurant:
+        return set()
+
+    db.restaurants.bulk_write(rating_batch_updates(ratings_by_restaurant), ordered=False)
+    return {str(doc['_id']) for doc in db.restaurants.find(live_query(ratings_by_restaurant), {'_id': 1})}
+
+async def apply_rating_batches_async(db, ratings_by_restaurant):
+    """apply_rating_batches on a Motor database"""
+    if not ratings_by_restaurant:
+        return set()
+
+    await db.restaurants.bulk_write(rating_batch_updates(ratings_by_restaurant), ordered=False)
+    return {str(doc['_id']) async for doc in db.restaurants.find(live_query(ratings_by_restaurant), {'_id': 1})}
+
+def compute_rating_aggregates(db, restaurant_ids=None):
+    """Recompute {restaurant_id: aggregate} from the reviews collection, optionally for `restaurant_ids` only"""
+    aggregates = {}
+    pipeline = [{'$group': {
+        '_id': {'restaurant_id': '$restaurant_id', 'rating': '$rating'},
+        'count': {'$sum': 1}
+    }}]
+    if restaurant_ids is not None:
+        pipeline.insert(0, {'$match': {'restaurant_id': {'$in': [str(restaurant_id) for restaurant_id in restaurant_ids]}}})
+    for group in db.reviews.aggregate(pipeline, allowDiskUse=True):
+        restaurant_id = group['_id']['restaurant_id']
+        rating = group['_id']['rating']
+        aggregate = aggregates.setdefault(restaurant_id, {
+            'rating_sum': 0,
+            'total_reviews': 0,
+            'rating_counts': empty_histogram()
+        })
+        aggregate['rating_sum'] += rating * group['count']
+        aggregate['total_reviews'] += group['count']
+        aggregate['rating_counts'][rating_bucket(rating)] += group['count']
+
+    for aggregate in aggregates.values():
+        aggregate['average_rating'] = average_rating(aggregate['rating_sum'], aggregate['total_reviews'])
+    return aggregates
+
+def rebuild_rating_aggregates(db, dry_run=False, restaurant_ids=None):
+    """
+    Reconcile the stored aggregate of every restaurant (or of those in
+    `restaurant_ids`) with its reviews.
+
+    Only restaurants whose stored values drift from the recomputed ones are
+    written. Returns counters describing the run.
+    """
+    aggregates = compute_rating_aggregates(db, restaurant_ids)
+    fields = ('rating_sum', 'total_reviews', 'rating_counts', 'average_rating')
+    stats = {'scanned': 0, 'drifted': 0, 'updated': 0}
+    operations = []
+
+    query = {}
+    if restaurant_ids is not None:
+        query['_id'] = {'$in': [ObjectId(restaurant_id) for restaurant_id in restaurant_ids]}
+    for restaurant in db.restaurants.find(query, {field: 1 for field in fields}):
+        stats['scanned'] += 1
+        expected = aggregates.get(str(restaurant['_id'])) or rating_aggregate([])
+        if all(restaurant.get(field) == expected[field] for field in fields):
+            continue
+
+        stats['drifted'] += 1
+        operations.append(UpdateOne(
+            {'_id': restaurant['_id']},
+            {'$set': expected, '$inc': {'reviews_version': 1}, '$currentDate': {'updated_at': True}}
+        ))
+        if len(operations) >= BULK_CHUNK_SIZE:
+            stats['updated'] += _flush(db, operations, dry_run)
+            operations = []
+
+    stats['updated'] += _flush(db, operations, dry_run)
+    if stats['updated']:
+        bump_version(db, 'restaurants')
+    return stats
+
+def _flush(db, operations, dry_run):
+    if not operations or dry_run:
+        return 0
+    result = db.restaurants.bulk_write(operations, ordered=False)
+    return result.modified_count
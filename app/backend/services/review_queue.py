@@ -0,0 +1,203 @@
+import atexit
+import queue
+import threading
+import time
+from bson import ObjectId
+from prometheus_client import Counter, Gauge, Histogram
+from pymongo import InsertOne
+from pymongo.errors import BulkWriteError
+from models.restaurant import NOT_DELETED
+from services.ratings import apply_rating_batches
+
+# Duplicate key: the review was written by an earlier attempt at the same batch
+DUPLICATE_KEY = 11000
+
+# Longest the flusher blocks on the queue before checking for shutdown
+STOP_CHECK_INTERVAL = 0.1
+
+REVIEW_QUEUE_DEPTH = Gauge('review_queue_depth', 'Accepted reviews waiting to be written', multiprocess_mode='livesum')
+REVIEW_QUEUE_REJECTED = Counter('review_queue_rejected_total', 'Reviews refused with 503 because the queue was full')
+REVIEW_QUEUE_WRITTEN = Counter('review_queue_written_total', 'Queued reviews by flush outcome', ['outcome'])
+REVIEW_QUEUE_FLUSH_DURATION = Histogram(
+    'review_queue_flush_duration_seconds',
+    'Time to write one batch of queued reviews and fold its ratings',
+    buckets=(.005, .01, .025, .05, .1, .25, .5, 1, 2.5, 5, 10)
+)
+REVIEW_QUEUE_LAG = Histogram(
+    'review_queue_lag_seconds',
+    'Time from accepting a review to writing it',
+    buckets=(.01, .025, .05, .1, .25, .5, 1, 2.5, 5, 10, 30)
+)
+
+class ReviewQueue:
+    """
+    Write-behind buffer for single review submissions.
+
+    Requests put validated review documents on a bounded in-process queue
+    and return 202; a flusher thread writes them in batches, closed after
+    `batch_size` reviews or `flush_interval` seconds from the first, with one
+    unordered bulk_write and one rating update per restaurant
+    (apply_rating_batches).
+
+    Reviews get their _id when accepted, so a batch that failed is retried
+    as is: reviews an earlier attempt already wrote fail with a duplicate key
+    and are not counted twice. A full queue refuses new reviews instead of
+    blocking the request; `retry_after` is the Retry-After sent with that 503.
+    """
+
+    def __init__(self, max_size=10000, batch_size=500, flush_interval=0.05, retry_interval=1.0, retry_after=1):
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.retry_interval = retry_interval
+        self.retry_after = retry_after
+        self._queue = queue.Queue(maxsize=max_size)
+
+    @classmethod
+    def from_config(cls, config):
+        return cls(
+            max_size=config['REVIEW_QUEUE_SIZE'],
+            batch_size=config['REVIEW_BATCH_SIZE'],
+            flush_interval=config['REVIEW_FLUSH_INTERVAL'],
+            retry_after=config['REVIEW_RETRY_AFTER']
+        )
+
+    def __len__(self):
+        return self._queue.qsize()
+
+    def submit(self, review):
+        """Queue a review document, assigning its _id; False if the queue is full"""
+        review['_id'] = ObjectId()
+        try:
+            self._queue.put_nowait((review, time.monotonic()))
+        except queue.Full:
+            REVIEW_QUEUE_REJECTED.inc()
+            return False
+        REVIEW_QUEUE_DEPTH.inc()
+        return True
+
+    def take(self, timeout, linger, stop=None):
+        """
+        Up to batch_size queued (review, accepted_at) pairs: waits at most
+        `timeout` for the first, then at most `linger` more to fill the batch,
+        cutting the wait short once `stop` is set
+        """
+        try:
+            batch = [self._queue.get(timeout=timeout) if timeout > 0 else self._queue.get_nowait()]
+        except queue.Empty:
+            return []
+        deadline = time.monotonic() + linger
+        while len(batch) < self.batch_size:
+            try:
+                batch.append(self._queue.get_nowait())
+                continue
+            except queue.Empty:
+                pass
+            remaining = deadline - time.monotonic()
+            if remaining <= 0 or stop is not None and stop.is_set():
+                break
+            try:
+                batch.append(self._queue.get(timeout=min(remaining, STOP_CHECK_INTERVAL)))
+            except queue.Empty:
+                pass
+        REVIEW_QUEUE_DEPTH.dec(len(batch))
+        return batch
+
+    def flush(self, db, batch, logger=None):
+        """
+        Write a batch taken from the queue. Reviews of restaurants deleted
+        since they were accepted are discarded, and logged to `logger`.
+        Returns the ids (as strings) of the restaurants whose aggregates
+        were updated.
+        """
+        started = time.perf_counter()
+        reviews = [review for review, _ in batch]
+        referenced = {ObjectId(review['restaurant_id']) for review in reviews}
+        existing = {str(doc['_id']) for doc in db.restaurants.find(dict(NOT_DELETED, _id={'$in': list(referenced)}), {'_id': 1})}
+        docs = [review for review in reviews if str(ObjectId(review['restaurant_id'])) in existing]
+        discarded = [review for review in reviews if str(ObjectId(review['restaurant_id'])) not in existing]
+        if discarded and logger is not None:
+            logger.warning(
+                f'Discarded {len(discarded)} queued reviews of missing or deleted restaurants',
+                extra={'event': 'review_flush', 'review_ids': [str(review['_id']) for review in discarded]}
+            )
+
+        written = self._insert(db, docs)
+        ratings = {}
+        for doc in written:
+            ratings.setdefault(doc['restaurant_id'], []).append(doc['rating'])
+        updated = apply_rating_batches(db, ratings)
+
+        flushed = time.monotonic()
+        for _, accepted_at in batch:
+            REVIEW_QUEUE_LAG.observe(flushed - accepted_at)
+        REVIEW_QUEUE_WRITTEN.labels(outcome='inserted').inc(len(written))
+        REVIEW_QUEUE_WRITTEN.labels(outcome='discarded').inc(len(discarded))
+        REVIEW_QUEUE_FLUSH_DURATION.observe(time.perf_counter() - started)
+        return updated
+
+    def _insert(self, db, docs):
+        """Insert `docs`; returns those written by this call"""
+        if not docs:
+            return []
+        try:
+            db.reviews.bulk_write([InsertOne(doc) for doc in docs], ordered=False)
+            return docs
+        except BulkWriteError as e:
+            errors = e.details['writeErrors']
+            if any(error['code'] != DUPLICATE_KEY for error in errors):
+                raise
+            skipped = {error['index'] for error in errors}
+            REVIEW_QUEUE_WRITTEN.labels(outcome='duplicate').inc(len(skipped))
+            return [doc for index, doc in enumerate(docs) if index not in skipped]
+
+def start_review_flusher(get_db, review_queue, on_flush=None, shutdown_timeout=10, logger=None):
+    """
+    Flush `review_queue` on a daemon thread against the database returned
+    by `get_db()`, calling `on_flush(db, updated_restaurant_ids)` after each
+    batch. A batch that fails is retried every `retry_interval` seconds.
+
+    At interpreter exit (a worker's graceful shutdown) the thread drains the
+    queue, giving up after `shutdown_timeout` seconds. Returns the stop event.
+    """
+    stop = threading.Event()
+
+    def run():
+        batch = []
+        deadline = None
+        while True:
+            if stop.is_set():
+                if deadline is None:
+                    deadline = time.monotonic() + shutdown_timeout
+                if not batch and not len(review_queue) or time.monotonic() >= deadline:
+                    break
+            if not batch:
+                if stop.is_set():
+                    batch = review_queue.take(0, 0)
+                else:
+                    batch = review_queue.take(STOP_CHECK_INTERVAL, review_queue.flush_interval, stop)
+                if not batch:
+                    continue
+            try:
+                db = get_db()
+                updated = review_queue.flush(db, batch, logger)
+                batch = []
+                if updated and on_flush is not None:
+                    on_flush(db, updated)
+            except Exception:
+                if logger is not None:
+                    logger.exception('Review flush failed', extra={'event': 'review_flush'})
+                time.sleep(review_queue.retry_interval)
+
+        lost = len(batch) + len(review_queue)
+        if lost and logger is not None:
+            logger.error(f'Shut down with {lost} queued reviews unwritten', extra={'event': 'review_flush'})
+
+    thread = threading.Thread(target=run, name='review-flusher', daemon=True)
+    thread.start()
+
+    def shutdown():
+        stop.set()
+        thread.join(shutdown_timeout + 1)
+
+    atexit.register(shutdown)
+    return stop
@@ -0,0 +1,40 @@
+MAX_QUERY_LENGTH = 200
+
+# Fields returned by search: enough for a result list, without the rating
+# histogram, GeoJSON point or other detail-only fields
+SEARCH_FIELDS = ('name', 'address', 'latitude', 'longitude', 'style', 'description', 'average_rating', 'total_reviews')
+
+def normalize_query(text):
+    """Collapse whitespace so equivalent queries share cache entries; ValueError if empty or too long"""
+    text = ' '.join((text or '').split())
+    if not text:
+        raise ValueError('q is required')
+    if len(text) > MAX_QUERY_LENGTH:
+        raise ValueError(f'q must be at most {MAX_QUERY_LENGTH} characters')
+    return text
+
+def search_pipeline(text, query, limit, after=None):
+    """
+    Aggregation pipeline returning up to `limit` documents matching `text`
+    on the text index (name, description) and `query`, best match first,
+    each with a `score` field.
+
+    `after` is the (score, _id) of the last document of the previous page;
+    ties on score are broken by _id so pages never overlap.
+    """
+    match = dict(query)
+    match['$text'] = {'$search': text}
+    pipeline = [
+        {'$match': match},
+        {'$addFields': {'score': {'$meta': 'textScore'}}}
+    ]
+    if after is not None:
+        score, last_id = after
+        pipeline.append({'$match': {'$or': [
+            {'score': {'$lt': score}},
+            {'score': score, '_id': {'$gt': last_id}}
+        ]}})
+    pipeline.append({'$sort': {'score': -1, '_id': 1}})
+    pipeline.append({'$limit': limit})
+    pipeline.append({'$project': dict.fromkeys(SEARCH_FIELDS + ('score',), 1)})
+    return pipeline
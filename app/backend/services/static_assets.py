@@ -0,0 +1,127 @@
+import gzip
+import hashlib
+import mimetypes
+import os
+import re
+from werkzeug.utils import get_content_type
+# brotli is optional; without it only gzip variants are built
+from services.compression import COMPRESSIBLE_TYPES, brotli
+
+# Build output named after its contents (CRA: main.3f2a1b9c.js, 453.8e2d7a1f.chunk.css)
+FINGERPRINTED = re.compile(r'\.[0-9a-f]{8,}(\.chunk)?\.\w+$')
+
+IMMUTABLE = 'public, max-age=31536000, immutable'
+REVALIDATE = 'no-cache'
+
+# Tiny files are not worth a variant
+MIN_COMPRESS_SIZE = 256
+
+# Source maps and unusually large files are left on disk
+MAX_ASSET_SIZE = 8 * 1024 * 1024
+SKIPPED_SUFFIXES = ('.map',)
+
+# Preferred first when the client accepts several
+ENCODINGS = ('br', 'gzip')
+
+class Asset:
+    """
+    One file held in memory with its precompressed variants. Each variant
+    is its own representation, so it has its own ETag; since they all hold
+    the same content, revalidating with any of them (or the bare ETag the
+    compression middleware leaves in If-None-Match) gets a 304.
+    """
+
+    def __init__(self, body, mimetype, cache_control):
+        self.content_type = get_content_type(mimetype, 'utf-8')
+        self.cache_control = cache_control
+        self.etag = hashlib.sha1(body).hexdigest()[:20]
+        self.variants = {'identity': body}
+        if mimetype.startswith(COMPRESSIBLE_TYPES) and len(body) >= MIN_COMPRESS_SIZE:
+            self._add_variant('gzip', gzip.compress(body, compresslevel=9, mtime=0))
+            if brotli is not None:
+                self._add_variant('br', brotli.compress(body, quality=11))
+
+    def _add_variant(self, encoding, body):
+        if len(body) < len(self.variants['identity']):
+            self.variants[encoding] = body
+
+    def negotiate(self, accept_encodings):
+        """(encoding, body) of the best variant for a werkzeug Accept-Encoding header"""
+        for encoding in ENCODINGS:
+            if encoding in self.variants and accept_encodings[encoding]:
+                return encoding, self.variants[encoding]
+        return 'identity', self.variants['identity']
+
+    def response(self, accept_encodings, if_none_match):
+        """(status, body, headers) answering a GET for this asset"""
+        encoding, body = self.negotiate(accept_encodings)
+        etag = self.etag if encoding == 'identity' else f'{self.etag}-{encoding}'
+        headers = {'ETag': f'"{etag}"', 'Cache-Control': self.cache_control}
+        if len(self.variants) > 1:
+            headers['Vary'] = 'Accept-Encoding'
+        if if_none_match.contains(etag) or if_none_match.contains(self.etag):
+            return 304, b'', headers
+
+        headers['Content-Type'] = self.content_type
+        if encoding != 'identity':
+            headers['Content-Encoding'] = encoding
+        return 200, body, headers
+
+class SpaBuild:
+    """
+    The React build, read once per worker: index.html and every file under
+    the build directory, keyed by URL path. build/static/* is served under
+    `static_url_path`, other build files (favicon, manifest.json) at the root.
+    Fingerprinted files are cached as immutable, everything else revalidates
+    with its ETag.
+
+    Without a build, `index` is the JSON `fallback` body.
+    """
+
+    def __init__(self, build_dir, static_url_path='', fallback=b''):
+        self.build_dir = build_dir
+        self.static_url_path = static_url_path.rstrip('/')
+        self.assets = {}
+        # URL path -> path under build/static of the files left on disk
+        self.disk_files = {}
+        index_path = os.path.join(build_dir, 'index.html')
+        if os.path.isfile(index_path):
+            with open(index_path, 'rb') as f:
+                self.index = Asset(f.read(), 'text/html', REVALIDATE)
+            self._load()
+        else:
+            self.index = Asset(fallback, 'application/json', REVALIDATE)
+
+    @property
+    def static_dir(self):
+        return os.path.join(self.build_dir, 'static')
+
+    def _load(self):
+        for root, _, files in os.walk(self.build_dir):
+            for name in files:
+                path = os.path.join(root, name)
+                relative = os.path.relpath(path, self.build_dir).replace(os.sep, '/')
+                if relative == 'index.html':
+                    continue
+                if name.endswith(SKIPPED_SUFFIXES) or os.path.getsize(path) > MAX_ASSET_SIZE:
+                    if relative.startswith('static/'):
+                        self.disk_files[self.url_path(relative)] = relative[len('static/'):]
+                    continue
+                with open(path, 'rb') as f:
+                    body = f.read()
+                mimetype = mimetypes.guess_type(name)[0] or 'application/octet-stream'
+                self.assets[self.url_path(relative)] = Asset(
+                    body,
+                    mimetype,
+                    IMMUTABLE if FINGERPRINTED.search(name) else REVALIDATE
+                )
+
+    def url_path(self, relative):
+        """URL path of a file given its path relative to the build directory"""
+        if relative.startswith('static/'):
+            return f'{self.static_url_path}/{relative[len("static/"):]}'
+        return f'/{relative}'
+
+    def static_file(self, url_path):
+        """Path under build/static of a URL the build serves from disk, or None"""
+        return self.disk_files.get(url_path)
@@ -0,0 +1,29 @@
+import hashlib
+
+def get_version(db, name):
+    """Current value of a collection-level version counter (0 if never bumped)"""
+    doc = db.versions.find_one({'_id': name})
+    return doc['version'] if doc else 0
+
+def bump_version(db, name):
+    """Advance a collection-level version counter after a write"""
+    db.versions.update_one({'_id': name}, {'$inc': {'version': 1}}, upsert=True)
+
+async def get_version_async(db, name):
+    """get_version on a Motor database"""
+    doc = await db.versions.find_one({'_id': name})
+    return doc['version'] if doc else 0
+
+async def bump_version_async(db, name):
+    """bump_version on a Motor database"""
+    await db.versions.update_one({'_id': name}, {'$inc': {'version': 1}}, upsert=True)
+
+def make_etag(namespace, version, variant=()):
+    """
+    Strong entity tag for one representation of a versioned resource.
+
+    `variant` distinguishes representations of the same version, e.g. the
+    normalised query arguments of a list page.
+    """
+    digest = hashlib.sha1(repr(variant).encode()).hexdigest()[:16]
+    return f'{namespace}-{version}-{digest}'
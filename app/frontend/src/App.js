@@ -2,11 +2,12 @@ import React, { useState, useEffect } from 'react';
 import Map from './components/Map';
 import RestaurantList from './components/RestaurantList';
 import RestaurantModal from './components/RestaurantModal';
-import { restaurantAPI } from './services/api';
+import { restaurantAPI, nextCursor } from './services/api';
 import './App.css';
 
 function App() {
   const [restaurants, setRestaurants] = useState([]);
+  const [restaurantsCursor, setRestaurantsCursor] = useState(null);
   const [categories, setCategories] = useState([]);
   const [selectedCategory, setSelectedCategory] = useState(null);
   const [selectedRestaurant, setSelectedRestaurant] = useState(null);
@@ -22,34 +23,13 @@ function App() {
   const fetchCategories = async () => {
     setLoading(true);
     try {
-      const response = await restaurantAPI.getRestaurants();
-      const allRestaurants = response.data;
-      
-      // Group restaurants by cuisine type
-      const categoryMap = {};
-      allRestaurants.forEach(restaurant => {
-        const style = restaurant.style;
-        if (!categoryMap[style]) {
-          categoryMap[style] = {
-            category: style,
-            count: 0,
-            restaurants: [],
-            // Use average coordinates for category center
-            avgLat: 0,
-            avgLng: 0
-          };
-        }
-        categoryMap[style].count++;
-        categoryMap[style].restaurants.push(restaurant);
-        categoryMap[style].avgLat += restaurant.latitude;
-        categoryMap[style].avgLng += restaurant.longitude;
-      });
-
-      // Calculate average coordinates for each category
-      const categoriesArray = Object.values(categoryMap).map(cat => ({
-        ...cat,
-        avgLat: cat.avgLat / cat.count,
-        avgLng: cat.avgLng / cat.count
+      // Counts and marker positions come from a per-style summary, not the full list
+      const response = await restaurantAPI.getStyles();
+      const categoriesArray = response.data.map(style => ({
+        category: style.style,
+        count: style.count,
+        avgLat: style.latitude,
+        avgLng: style.longitude
       }));
 
       setCategories(categoriesArray);
@@ -61,11 +41,16 @@ function App() {
     }
   };
 
-  const fetchRestaurantsByCategory = async (categoryName) => {
-    setLoading(true);
+  // Restaurants arrive one page at a time; `cursor` loads the next page
+  const fetchRestaurantsByCategory = async (categoryName, cursor = null) => {
+    if (!cursor) {
+      setLoading(true);
+    }
     try {
-      const response = await restaurantAPI.getRestaurants({ style: categoryName });
-      setRestaurants(response.data);
+      const params = cursor ? { style: categoryName, cursor } : { style: categoryName };
+      const response = await restaurantAPI.getRestaurants(params);
+      setRestaurants(cursor ? (previous) => previous.concat(response.data) : response.data);
+      setRestaurantsCursor(nextCursor(response));
       setSelectedCategory(categoryName);
       setViewMode('restaurants');
     } catch (error) {
@@ -100,6 +85,7 @@ function App() {
     setViewMode('categories');
     setSelectedCategory(null);
     setRestaurants([]);
+    setRestaurantsCursor(null);
     fetchCategories();
   };
 
@@ -136,7 +122,7 @@ function App() {
             ← Back to Categories
           </button>
           <span className="font-semibold text-gray-700">
-            Showing: {getCategoryDisplayName(selectedCategory)} ({restaurants.length} restaurants)
+            Showing: {getCategoryDisplayName(selectedCategory)} ({restaurants.length}{restaurantsCursor ? '+' : ''} restaurants)
           </span>
           <button
             onClick={() => fetchRestaurantsByCategory(selectedCategory)}
@@ -160,6 +146,7 @@ function App() {
             <RestaurantList
               restaurants={restaurants}
               onRestaurantSelect={handleRestaurantSelect}
+              onLoadMore={restaurantsCursor ? () => fetchRestaurantsByCategory(selectedCategory, restaurantsCursor) : null}
             />
           )}
         </div>
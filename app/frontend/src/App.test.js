@@ -5,12 +5,16 @@ import App from './App';
 // Mock the API with proper response
 jest.mock('./services/api', () => ({
   restaurantAPI: {
+    getStyles: jest.fn().mockResolvedValue({
+      data: [{ style: 'pizza', count: 1, latitude: 32.0853, longitude: 34.7818 }]
+    }),
     getRestaurants: jest.fn().mockResolvedValue({ 
       data: [
         { _id: '1', name: 'Test Pizza', style: 'pizza', latitude: 32.0853, longitude: 34.7818, average_rating: 4.5, total_reviews: 10 }
       ] 
     })
-  }
+  },
+  nextCursor: () => null
 }));
 
 // Mock the Map component
@@ -1,6 +1,6 @@
 import React from 'react';
 
-const RestaurantList = ({ restaurants, onRestaurantSelect }) => {
+const RestaurantList = ({ restaurants, onRestaurantSelect, onLoadMore }) => {
   if (!restaurants.length) {
     return <div className="p-4">No restaurants found.</div>;
   }
@@ -24,6 +24,14 @@ const RestaurantList = ({ restaurants, onRestaurantSelect }) => {
           </div>
         </div>
       ))}
+      {onLoadMore && (
+        <button
+          onClick={onLoadMore}
+          className="w-full bg-white border border-gray-300 text-gray-700 px-4 py-2 rounded hover:bg-gray-100"
+        >
+          Load more restaurants
+        </button>
+      )}
     </div>
   );
 };
@@ -4,6 +4,7 @@ import { restaurantAPI } from '../services/api';
 
 const RestaurantModal = ({ restaurant, onClose }) => {
   const [reviews, setReviews] = useState([]);
+  const [reviewsCursor, setReviewsCursor] = useState(null);
   const [newReview, setNewReview] = useState({ user_name: '', rating: 5, comment: '' });
   const [loading, setLoading] = useState(false);
 
@@ -13,10 +14,12 @@ const RestaurantModal = ({ restaurant, onClose }) => {
     }
   }, [restaurant]);
 
-  const fetchReviews = async () => {
+  // Reviews arrive newest first, one page at a time; `cursor` loads the next page
+  const fetchReviews = async (cursor = null) => {
     try {
-      const response = await restaurantAPI.getReviews(restaurant._id);
-      setReviews(response.data);
+      const response = await restaurantAPI.getReviews(restaurant._id, cursor ? { cursor } : {});
+      setReviews(cursor ? (previous) => previous.concat(response.data) : response.data);
+      setReviewsCursor((response.headers && response.headers['x-next-cursor']) || null);
     } catch (error) {
       console.error('Error fetching reviews:', error);
     }
@@ -224,7 +227,7 @@ const RestaurantModal = ({ restaurant, onClose }) => {
         {/* Reviews Section */}
         <div style={{ padding: '0 24px 24px 24px', borderTop: '1px solid #e5e7eb' }}>
           <h3 style={{ fontSize: '18px', fontWeight: '600', margin: '24px 0 16px 0', color: '#1f2937' }}>
-            Reviews ({reviews.length})
+            Reviews ({Math.max(restaurant.total_reviews || 0, reviews.length)})
           </h3>
           {reviews.length === 0 ? (
             <p style={{ color: '#6b7280', fontStyle: 'italic' }}>No reviews yet.</p>
@@ -250,6 +253,21 @@ const RestaurantModal = ({ restaurant, onClose }) => {
                   )}
                 </div>
               ))}
+              {reviewsCursor && (
+                <button
+                  onClick={() => fetchReviews(reviewsCursor)}
+                  style={{
+                    background: 'none',
+                    border: '1px solid #d1d5db',
+                    borderRadius: '6px',
+                    padding: '8px 16px',
+                    color: '#374151',
+                    cursor: 'pointer'
+                  }}
+                >
+                  Load more reviews
+                </button>
+              )}
             </div>
           )}
         </div>
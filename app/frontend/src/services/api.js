@@ -10,11 +10,31 @@ const api = axios.create({
   },
 });
 
+// List endpoints return one page at a time and advertise the next page
+// through the X-Next-Cursor header; null once the list is exhausted
+export const nextCursor = (response) => (response.headers && response.headers['x-next-cursor']) || null;
+
 export const restaurantAPI = {
+  // One page of restaurants; pass { cursor } from nextCursor(response) for the next one
   getRestaurants: (params = {}) => {
     return api.get('/api/restaurants', { params });
   },
 
+  // Restaurant count and mean coordinates per cuisine style
+  getStyles: () => {
+    return api.get('/api/restaurants/styles');
+  },
+
+  // Ranked full-text search; accepts the same style/lat/lng/radius filters
+  searchRestaurants: (q, params = {}) => {
+    return api.get('/api/restaurants/search', { params: { ...params, q } });
+  },
+
+  // Top restaurants of one cuisine by weighted rating
+  getLeaderboard: (style, params = {}) => {
+    return api.get(`/api/leaderboards/${style}`, { params });
+  },
+
   getRestaurant: (id) => {
     return api.get(`/api/restaurants/${id}`);
   },
@@ -27,8 +47,9 @@ export const restaurantAPI = {
     return api.post(`/api/restaurants/${restaurantId}/reviews`, data);
   },
 
-  getReviews: (restaurantId) => {
-    return api.get(`/api/restaurants/${restaurantId}/reviews`);
+  // One page of reviews, newest first; pass { cursor } from X-Next-Cursor for the next one
+  getReviews: (restaurantId, params = {}) => {
+    return api.get(`/api/restaurants/${restaurantId}/reviews`, { params });
   },
 };
 
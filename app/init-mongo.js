@@ -6,9 +6,17 @@ db.createCollection('restaurants');
 db.createCollection('reviews');
 
 // Create indexes for better performance
-db.restaurants.createIndex({ "latitude": 1, "longitude": 1 });
-db.restaurants.createIndex({ "style": 1 });
+db.restaurants.createIndex({ "location": "2dsphere" });
+db.restaurants.createIndex({ "style": 1, "_id": 1 });
+db.restaurants.createIndex({ "style": 1, "average_rating": -1, "_id": 1 });
+db.restaurants.createIndex({ "average_rating": -1, "_id": 1 });
+db.restaurants.createIndex({ "style": 1, "weighted_rating": -1, "_id": 1 });
 db.restaurants.createIndex({ "name": "text", "description": "text" });
-db.reviews.createIndex({ "restaurant_id": 1 });
+db.restaurants.createIndex({ "updated_at": 1 });
+db.restaurants.createIndex({ "deleted_at": 1 }, { partialFilterExpression: { deleted_at: { $type: "date" } } });
+db.restaurants.createIndex({ "seed_key": 1 }, { unique: true, partialFilterExpression: { seed_key: { $type: "string" } } });
+db.reviews.createIndex({ "restaurant_id": 1, "created_at": -1, "_id": -1 });
+db.reviews.createIndex({ "created_at": 1 });
+db.reviews.createIndex({ "seed_key": 1 }, { unique: true, partialFilterExpression: { seed_key: { $type: "string" } } });
 
 print('Database initialized successfully');
\ No newline at end of file
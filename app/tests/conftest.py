@@ -0,0 +1,156 @@
+import json
+import os
+import sys
+from datetime import datetime
+
+import mongomock
+import mongomock.collection
+import pytest
+from flask.testing import FlaskClient
+from mongomock_motor import AsyncMongoMockClient
+from starlette.testclient import TestClient
+
+# Backend modules import each other as top-level packages (services, routes, models)
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'backend'))
+
+# Metrics stay in the default registry; the multiprocess directory only exists under gunicorn
+os.environ.pop('PROMETHEUS_MULTIPROC_DIR', None)
+
+from app import create_app  # noqa: E402
+from asgi import create_asgi_app  # noqa: E402
+
+def pytest_generate_tests(metafunc):
+    """API tests run against both serving modes; those that reach into the Flask app run on it alone"""
+    if 'server' in metafunc.fixturenames:
+        metafunc.parametrize('server', ['flask'] if 'app' in metafunc.fixturenames else ['flask', 'asgi'])
+
+def with_now(value, now):
+    """`value` with the $$NOW variable replaced by `now`"""
+    if value == '$$NOW':
+        return now
+    if isinstance(value, dict):
+        return {key: with_now(item, now) for key, item in value.items()}
+    if isinstance(value, list):
+        return [with_now(item, now) for item in value]
+    return value
+
+def patch_pipeline_updates():
+    """
+    mongomock 4.1 predates update pipelines (MongoDB 4.2); run them through
+    its aggregation support, one matched document at a time
+    """
+    validate_ok_for_update = mongomock.collection.validate_ok_for_update
+    update = mongomock.collection.Collection._update
+
+    def validate(document):
+        if not isinstance(document, list):
+            validate_ok_for_update(document)
+
+    def pipeline_update(self, spec, document, upsert=False, multi=False, **kwargs):
+        if not isinstance(document, list):
+            return update(self, spec, document, upsert=upsert, multi=multi, **kwargs)
+        assert not upsert, 'pipeline upserts are not emulated'
+        pipeline = with_now(document, datetime.utcnow())
+        matched = [doc['_id'] for doc in self.find(spec, {'_id': 1}).limit(0 if multi else 1)]
+        for _id in matched:
+            self.replace_one({'_id': _id}, next(self.aggregate([{'$match': {'_id': _id}}] + pipeline)))
+        return {'n': len(matched), 'nModified': len(matched), 'upserted': None, 'updatedExisting': bool(matched), 'err': None, 'ok': 1}
+
+    mongomock.collection.validate_ok_for_update = validate
+    mongomock.collection.Collection._update = pipeline_update
+
+patch_pipeline_updates()
+
+class MockMongo:
+    """Stands in for flask_pymongo.PyMongo: routes only use its `db`"""
+
+    def __init__(self, db):
+        self.db = db
+
+class BufferedClient(FlaskClient):
+    """
+    Reads and closes each response as a WSGI server would once it is sent,
+    so call_on_close callbacks (the admission slot) run; buffered=False
+    leaves that to the test
+    """
+
+    def open(self, *args, buffered=True, **kwargs):
+        return super().open(*args, buffered=buffered, **kwargs)
+
+class AsgiResponse:
+    """The parts of a Flask test response the tests read, over an httpx response"""
+
+    def __init__(self, response, data):
+        self.status_code = response.status_code
+        self.headers = response.headers
+        self.data = data
+
+    def get_data(self):
+        return self.data
+
+    def get_json(self):
+        return json.loads(self.data)
+
+    def close(self):
+        pass
+
+class AsgiClient:
+    """Flask test client calls (query_string=, headers=, json=) made against the ASGI app"""
+
+    def __init__(self, client):
+        self.client = client
+        # Like the Flask test client, ask for no encoding unless a test does
+        del self.client.headers['Accept-Encoding']
+
+    def open(self, method, url, query_string=None, **kwargs):
+        # Streamed so the body is read as sent: httpx would otherwise decompress it
+        with self.client.stream(method, url, params=query_string, **kwargs) as response:
+            return AsgiResponse(response, b''.join(response.iter_raw()))
+
+    def get(self, url, **kwargs):
+        return self.open('GET', url, **kwargs)
+
+    def post(self, url, **kwargs):
+        return self.open('POST', url, **kwargs)
+
+    def delete(self, url, **kwargs):
+        return self.open('DELETE', url, **kwargs)
+
+@pytest.fixture
+def db():
+    return mongomock.MongoClient().restaurant_db
+
+@pytest.fixture
+def app_config():
+    return {'TESTING': True}
+
+@pytest.fixture
+def app(db, app_config):
+    app = create_app(app_config)
+    app.mongo = MockMongo(db)
+    app.test_client_class = BufferedClient
+    return app
+
+@pytest.fixture
+def client(server, request, db, app_config):
+    if server == 'flask':
+        yield request.getfixturevalue('app').test_client()
+        return
+    asgi_app = create_asgi_app(app_config)
+    with TestClient(asgi_app) as client:
+        # Same mongomock client underneath: tests inspect the data through `db`
+        asgi_app.state.db = AsyncMongoMockClient(mock_mongo_client=db.client)[db.name]
+        yield AsgiClient(client)
+
+@pytest.fixture
+def restaurant(client):
+    """Create a restaurant through the API; returns its id"""
+    response = client.post('/api/restaurants', json={
+        'name': 'Test Cafe',
+        'address': '1 Test St, Tel Aviv, Israel',
+        'latitude': 32.08,
+        'longitude': 34.78,
+        'style': 'cafe'
+    })
+    assert response.status_code == 201
+    return response.get_json()['id']
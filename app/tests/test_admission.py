@@ -0,0 +1,109 @@
+import asyncio
+import threading
+import time
+
+import pytest
+
+from app import create_app
+from services.admission import (
+    CRITICAL, DEFAULT_LIMIT, LOW, NORMAL, THREAD_RESERVE, AdmissionController, AsyncAdmissionController,
+    admission_limit
+)
+
+def test_default_limit_follows_worker_concurrency():
+    assert admission_limit(None, 4) == 4
+    assert admission_limit(None, 1000) == DEFAULT_LIMIT
+    assert admission_limit(None, 0) == DEFAULT_LIMIT
+
+def test_limit_that_can_never_shed_is_rejected():
+    with pytest.raises(ValueError):
+        admission_limit(100, 4)
+    assert admission_limit(6, 4) == 6
+    assert admission_limit(0, 4) == 0
+
+def test_worker_refuses_unreachable_limit():
+    with pytest.raises(ValueError):
+        create_app({'TESTING': True, 'ADMISSION_LIMIT': 100, 'WORKER_CONCURRENCY': 4})
+
+def test_low_priority_is_shed_first():
+    admission = AdmissionController(limit=4, queue_timeout=0)
+    assert [admission.acquire(LOW) for _ in range(3)] == [True, True, False]
+    assert admission.acquire(NORMAL)
+    assert not admission.acquire(NORMAL)
+    assert admission.acquire(CRITICAL)
+    assert not admission.acquire(CRITICAL)
+
+def test_waiting_request_is_admitted_when_a_slot_frees():
+    admission = AdmissionController(limit=2, queue_timeout=5)
+    assert admission.acquire(CRITICAL) and admission.acquire(CRITICAL)
+    result = []
+    waiter = threading.Thread(target=lambda: result.append(admission.acquire(CRITICAL)))
+    waiter.start()
+    admission.release()
+    waiter.join(5)
+    assert result == [True]
+
+def test_queue_wait_times_out():
+    admission = AdmissionController(limit=1, queue_timeout=0.05)
+    assert admission.acquire(CRITICAL)
+    assert not admission.acquire(CRITICAL)
+
+def test_full_queue_rejects_immediately():
+    admission = AdmissionController(limit=1, queue_size=0, queue_timeout=5)
+    assert admission.acquire(CRITICAL)
+    assert not admission.acquire(CRITICAL)
+
+def test_async_controller_sheds_low_priority():
+    async def run():
+        admission = AsyncAdmissionController(limit=2, queue_timeout=0.05)
+        return [await admission.acquire(LOW), await admission.acquire(LOW), await admission.acquire(CRITICAL)]
+
+    assert asyncio.run(run()) == [True, False, True]
+
+def test_saturated_worker_answers_503_but_keeps_probes(app, client):
+    app.admission = AdmissionController(limit=4, queue_timeout=0, retry_after=3)
+    for _ in range(2):
+        app.admission.acquire(CRITICAL)
+
+    response = client.get('/api/restaurants')
+    assert response.status_code == 503
+    assert response.headers['Retry-After'] == '3'
+    assert client.get('/health').status_code == 200
+
+    # Writes still have capacity left; the slot is freed once the response is sent
+    assert client.post('/api/restaurants', json={}).status_code == 400
+    assert app.admission.in_flight == 2
+
+def test_waiting_reads_leave_threads_for_writes():
+    # gthread default: the limit equals the worker's 4 threads
+    admission = AdmissionController(limit=4, threads=4, queue_timeout=5)
+    assert admission.acquire(LOW) and admission.acquire(LOW)
+    result = []
+    waiter = threading.Thread(target=lambda: result.append(admission.acquire(LOW)))
+    waiter.start()
+    for _ in range(100):
+        if admission.waiting[LOW]:
+            break
+        time.sleep(0.01)
+
+    # A second waiter would leave no thread for probes and writes: rejected without waiting
+    started = time.perf_counter()
+    assert not admission.acquire(LOW)
+    assert time.perf_counter() - started < 1
+    assert admission.in_flight + admission.waiting[LOW] == admission.threads - THREAD_RESERVE
+    assert admission.acquire(CRITICAL)
+
+    # The waiter still gets the next low priority slot
+    admission.release()
+    admission.release()
+    waiter.join(5)
+    assert result == [True]
+
+def test_streamed_export_holds_its_slot_until_sent(app, client, restaurant):
+    app.admission = AdmissionController(limit=4, queue_timeout=0)
+    response = client.get('/api/export/restaurants', buffered=False)
+    assert response.status_code == 200
+    assert app.admission.in_flight == 1
+    response.get_data()
+    response.close()
+    assert app.admission.in_flight == 0
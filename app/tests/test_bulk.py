@@ -0,0 +1,95 @@
+import pytest
+from bson import ObjectId
+from pymongo import ASCENDING
+
+import routes.async_restaurants
+import routes.restaurants
+from services.versions import get_version
+from test_pagination import create
+
+def restaurant_payload(name, **fields):
+    return dict({'name': name, 'address': 'a', 'latitude': 32.0, 'longitude': 34.0, 'style': 'cafe'}, **fields)
+
+def review_payload(restaurant_id, user_name='noa', rating=4):
+    return {'restaurant_id': restaurant_id, 'user_name': user_name, 'rating': rating}
+
+def statuses(report):
+    return [(result['index'], result['status'], result.get('error')) for result in report['results']]
+
+@pytest.fixture
+def small_chunks(monkeypatch):
+    monkeypatch.setattr(routes.restaurants, 'BULK_INSERT_CHUNK', 2)
+    monkeypatch.setattr(routes.async_restaurants, 'BULK_INSERT_CHUNK', 2)
+
+def test_restaurants_report_every_item(client, db):
+    response = client.post('/api/restaurants/bulk', json=[
+        restaurant_payload('A'), restaurant_payload('B', latitude=100), restaurant_payload('C')
+    ])
+    assert response.status_code == 200
+    report = response.get_json()
+    assert (report['created'], report['failed']) == (2, 1)
+    assert statuses(report) == [(0, 'created', None), (1, 'error', 'latitude must be between -90 and 90'), (2, 'created', None)]
+    assert sorted(doc['name'] for doc in db.restaurants.find()) == ['A', 'C']
+    assert [(style['style'], style['count']) for style in client.get('/api/restaurants/styles').get_json()] == [('cafe', 2)]
+
+def test_reviews_report_invalid_and_unknown_restaurants(client, db, restaurant):
+    response = client.post('/api/reviews/bulk', json={'reviews': [
+        review_payload(restaurant, rating=5),
+        review_payload('not-an-id'),
+        review_payload(str(ObjectId())),
+        review_payload(restaurant, rating=6),
+        review_payload(restaurant, rating=3)
+    ]})
+    report = response.get_json()
+    assert statuses(report) == [
+        (0, 'created', None),
+        (1, 'error', 'Invalid restaurant ID format'),
+        (2, 'error', 'Restaurant not found'),
+        (3, 'error', 'Rating must be between 1 and 5'),
+        (4, 'created', None)
+    ]
+    detail = client.get(f'/api/restaurants/{restaurant}').get_json()
+    assert (detail['total_reviews'], detail['average_rating']) == (2, 4.0)
+
+def test_duplicate_inside_a_chunk_fails_alone(client, db, restaurant):
+    # A unique key the bulk insert can collide on within one insert_many
+    db.reviews.create_index([('restaurant_id', ASCENDING), ('user_name', ASCENDING)], unique=True)
+    report = client.post('/api/reviews/bulk', json=[
+        review_payload(restaurant, 'noa', 5), review_payload(restaurant, 'noa', 1), review_payload(restaurant, 'dan', 3)
+    ]).get_json()
+
+    assert [(index, status) for index, status, _ in statuses(report)] == [(0, 'created'), (1, 'error'), (2, 'created')]
+    assert 'duplicate key' in report['results'][1]['error'].lower()
+    # Only the written reviews are counted
+    assert db.restaurants.find_one()['total_reviews'] == 2
+    assert db.restaurants.find_one()['average_rating'] == 4.0
+
+def test_partial_failure_in_one_chunk_keeps_the_others(client, db, small_chunks):
+    db.restaurants.create_index([('name', ASCENDING)], unique=True)
+    create(client, 'Taken')
+    report = client.post('/api/restaurants/bulk', json=[
+        restaurant_payload('A'), restaurant_payload('Taken'), restaurant_payload('B')
+    ]).get_json()
+    assert [status for _, status, _ in statuses(report)] == ['created', 'error', 'created']
+    assert db.restaurants.count_documents({}) == 3
+
+def test_chunks_written_before_a_failure_are_counted(client, db, restaurant, small_chunks, monkeypatch):
+    insert_many = db.reviews.insert_many
+    calls = []
+
+    def failing_second_chunk(docs, *args, **kwargs):
+        calls.append(len(docs))
+        if len(calls) == 2:
+            raise ConnectionError('connection reset')
+        return insert_many(docs, *args, **kwargs)
+
+    monkeypatch.setattr(db.reviews, 'insert_many', failing_second_chunk)
+    version = get_version(db, 'restaurants')
+    response = client.post('/api/reviews/bulk', json=[review_payload(restaurant, rating=rating) for rating in (5, 3, 1, 1)])
+
+    assert response.status_code == 500
+    assert calls == [2, 2]
+    # The first chunk's reviews are in the aggregate, the list version and the detail response
+    assert db.restaurants.find_one()['total_reviews'] == 2
+    assert get_version(db, 'restaurants') > version
+    assert client.get(f'/api/restaurants/{restaurant}').get_json()['average_rating'] == 4.0
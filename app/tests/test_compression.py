@@ -0,0 +1,67 @@
+import gzip
+
+import pytest
+
+from app import create_app
+from conftest import MockMongo
+from services.compression import Compression, brotli, installed, suffix_etag, zstandard
+
+DECODERS = {
+    'gzip': gzip.decompress,
+    'br': lambda data: brotli.decompress(data),  # looked up late: brotli is None without the package
+    'zstd': lambda data: zstandard.ZstdDecompressor().decompressobj().decompress(data)
+}
+
+needs_br = pytest.mark.skipif(not installed('br'), reason='Brotli is not installed')
+
+@pytest.fixture
+def restaurants(client):
+    for n in range(20):
+        client.post('/api/restaurants', json={
+            'name': f'Cafe {n}', 'address': f'{n} Test St, Tel Aviv, Israel',
+            'latitude': 32.08, 'longitude': 34.78, 'style': 'cafe'
+        })
+
+@pytest.mark.parametrize('accept, expected', [
+    ('gzip', 'gzip'),
+    pytest.param('gzip, br, zstd', 'br', marks=needs_br),
+    ('gzip;q=1, br;q=0.5', 'gzip'),
+    ('br;q=0, gzip', 'gzip'),
+    pytest.param('*', 'br', marks=needs_br),
+    ('identity', None),
+    ('', None)
+])
+def test_negotiation_prefers_client_quality_then_server_order(accept, expected):
+    assert Compression().negotiate(accept) == expected
+
+def test_etag_suffix_keeps_weak_prefix():
+    assert suffix_etag('"abc"', 'gzip') == '"abc-gzip"'
+    assert suffix_etag('W/"abc"', 'br') == 'W/"abc-br"'
+
+@pytest.mark.parametrize('encoding', ['gzip', 'br', 'zstd'])
+def test_list_is_compressed_with_a_distinct_etag(client, restaurants, encoding):
+    if not installed(encoding):
+        pytest.skip(f'{encoding} is not installed')
+    plain = client.get('/api/restaurants')
+    response = client.get('/api/restaurants', headers={'Accept-Encoding': encoding})
+
+    assert response.headers['Content-Encoding'] == encoding
+    assert 'Accept-Encoding' in response.headers['Vary']
+    assert response.headers['ETag'] == suffix_etag(plain.headers['ETag'], encoding)
+    assert DECODERS[encoding](response.get_data()) == plain.get_data()
+
+def test_compressed_etag_revalidates(client, restaurants):
+    etag = client.get('/api/restaurants', headers={'Accept-Encoding': 'gzip'}).headers['ETag']
+    response = client.get('/api/restaurants', headers={'Accept-Encoding': 'gzip', 'If-None-Match': etag})
+    assert response.status_code == 304
+    assert response.headers['ETag'] == etag
+
+def test_small_responses_are_sent_as_is(client):
+    response = client.get('/health', headers={'Accept-Encoding': 'gzip'})
+    assert 'Content-Encoding' not in response.headers
+
+def test_disabled_compression_sends_identity(db):
+    app = create_app({'TESTING': True, 'COMPRESS_ENABLED': False})
+    app.mongo = MockMongo(db)
+    response = app.test_client().get('/api/restaurants', headers={'Accept-Encoding': 'gzip'})
+    assert 'Content-Encoding' not in response.headers
@@ -0,0 +1,78 @@
+from app import create_app
+from conftest import MockMongo
+
+def detail_keys(app, restaurant_id):
+    return [key for key in app.response_cache._entries if key[:2] == ('detail', restaurant_id)]
+
+def test_detail_revalidates_with_304(client, restaurant):
+    response = client.get(f'/api/restaurants/{restaurant}')
+    assert response.status_code == 200
+    etag = response.headers['ETag']
+
+    response = client.get(f'/api/restaurants/{restaurant}', headers={'If-None-Match': etag})
+    assert response.status_code == 304
+    assert response.headers['ETag'] == etag
+
+def test_revalidation_reads_only_the_version(client, db, restaurant, monkeypatch):
+    etag = client.get(f'/api/restaurants/{restaurant}').headers['ETag']
+    projections = []
+    find_one = db.restaurants.find_one
+
+    def spy(query, projection=None, *args, **kwargs):
+        projections.append(dict(projection or {}))
+        return find_one(query, projection, *args, **kwargs)
+
+    monkeypatch.setattr(db.restaurants, 'find_one', spy)
+    assert client.get(f'/api/restaurants/{restaurant}', headers={'If-None-Match': etag}).status_code == 304
+    assert projections == [{'reviews_version': 1}]
+
+def test_new_review_changes_detail_etag_and_drops_cached_versions(app, client, restaurant):
+    etag = client.get(f'/api/restaurants/{restaurant}').headers['ETag']
+    assert detail_keys(app, restaurant)
+
+    client.post(f'/api/restaurants/{restaurant}/reviews', json={'user_name': 'noa', 'rating': 5})
+    assert detail_keys(app, restaurant) == []
+
+    response = client.get(f'/api/restaurants/{restaurant}', headers={'If-None-Match': etag})
+    assert response.status_code == 200
+    assert response.headers['ETag'] != etag
+    assert [review['rating'] for review in response.get_json()['reviews']] == [5]
+
+def test_list_etag_moves_on_restaurant_writes(client, restaurant):
+    etag = client.get('/api/restaurants').headers['ETag']
+    assert client.get('/api/restaurants', headers={'If-None-Match': etag}).status_code == 304
+
+    client.post(f'/api/restaurants/{restaurant}/reviews', json={'user_name': 'noa', 'rating': 4})
+    response = client.get('/api/restaurants', headers={'If-None-Match': etag})
+    assert response.status_code == 200
+    assert response.get_json()[0]['average_rating'] == 4.0
+
+def test_reviews_page_revalidates(client, restaurant):
+    client.post(f'/api/restaurants/{restaurant}/reviews', json={'user_name': 'noa', 'rating': 4})
+    etag = client.get(f'/api/restaurants/{restaurant}/reviews').headers['ETag']
+    assert client.get(f'/api/restaurants/{restaurant}/reviews', headers={'If-None-Match': etag}).status_code == 304
+
+def test_worker_reading_during_a_review_write_caches_the_new_average(app, client, db, restaurant, monkeypatch):
+    # A second worker serving the same database, with its own response cache
+    other = create_app({'TESTING': True})
+    other.mongo = MockMongo(db)
+    other_client = other.test_client()
+    etag = other_client.get(f'/api/restaurants/{restaurant}').headers['ETag']
+
+    # It reads the restaurant right after the rating write, while the review request is still running
+    find_one_and_update = db.restaurants.find_one_and_update
+    seen = []
+
+    def interleaved(*args, **kwargs):
+        doc = find_one_and_update(*args, **kwargs)
+        seen.append(other_client.get(f'/api/restaurants/{restaurant}').get_json())
+        return doc
+
+    monkeypatch.setattr(db.restaurants, 'find_one_and_update', interleaved)
+    assert client.post(f'/api/restaurants/{restaurant}/reviews', json={'user_name': 'noa', 'rating': 5}).status_code == 201
+
+    assert [(doc['total_reviews'], doc['average_rating']) for doc in seen] == [(1, 5.0)]
+    response = other_client.get(f'/api/restaurants/{restaurant}', headers={'If-None-Match': etag})
+    assert response.status_code == 200
+    assert (response.get_json()['total_reviews'], response.get_json()['average_rating']) == (1, 5.0)
+    assert other_client.get(f'/api/restaurants/{restaurant}', headers={'If-None-Match': response.headers['ETag']}).status_code == 304
@@ -0,0 +1,80 @@
+import json
+from datetime import datetime
+
+from bson import ObjectId
+
+from routes.export import EXPORT_FLUSH_DOCS, ndjson_stream
+from test_pagination import create
+
+def export(client, url, **params):
+    response = client.get(url, query_string=params)
+    assert response.status_code == 200
+    return [json.loads(line) for line in response.get_data().splitlines()]
+
+def test_reviews_of_deleted_restaurants_are_not_exported(client, restaurant):
+    kept = create(client, 'Kept', style='pizza')
+    for restaurant_id in (restaurant, kept):
+        client.post(f'/api/restaurants/{restaurant_id}/reviews', json={'user_name': 'noa', 'rating': 4})
+    client.delete(f'/api/restaurants/{restaurant}')
+
+    assert [review['restaurant_id'] for review in export(client, '/api/export/reviews')] == [kept]
+
+def test_export_is_one_json_document_per_line(client):
+    ids = [create(client, f'Cafe {n}') for n in range(3)]
+    response = client.get('/api/export/restaurants')
+    assert response.status_code == 200
+    assert response.headers['Content-Type'] == 'application/x-ndjson'
+    assert response.headers['X-Accel-Buffering'] == 'no'
+
+    body = response.get_data()
+    assert body.endswith(b'\n') and not body.endswith(b'\n\n')
+    assert sorted(json.loads(line)['_id'] for line in body.splitlines()) == sorted(ids)
+
+def test_export_larger_than_a_chunk_is_complete(client):
+    for n in range(250):
+        create(client, f'Cafe {n}')
+    restaurants = export(client, '/api/export/restaurants')
+    assert len(restaurants) == 250
+    assert len({restaurant['_id'] for restaurant in restaurants}) == 250
+
+def test_chunks_end_on_document_boundaries(db):
+    db.restaurants.insert_many([{'n': n} for n in range(EXPORT_FLUSH_DOCS * 2 + 1)])
+    chunks = list(ndjson_stream(db.restaurants.find({}, {'_id': 0}), lambda doc: json.dumps(doc).encode()))
+    assert [chunk.count(b'\n') for chunk in chunks] == [EXPORT_FLUSH_DOCS, EXPORT_FLUSH_DOCS, 1]
+    assert all(chunk.endswith(b'\n') for chunk in chunks)
+
+def test_empty_export_has_an_empty_body(client):
+    response = client.get('/api/export/reviews')
+    assert response.status_code == 200
+    assert response.get_data() == b''
+
+def test_updated_since_filters_restaurants_and_reviews(client, db, restaurant):
+    client.post(f'/api/restaurants/{restaurant}/reviews', json={'user_name': 'noa', 'rating': 4})
+    old = create(client, 'Old Cafe')
+    db.restaurants.update_one({'_id': ObjectId(old)}, {'$set': {'updated_at': datetime(2020, 1, 1)}})
+    legacy = create(client, 'Legacy Cafe')
+    db.restaurants.update_one({'_id': ObjectId(legacy)}, {'$unset': {'updated_at': ''}, '$set': {'created_at': datetime(2020, 1, 1)}})
+    db.reviews.insert_one({'restaurant_id': restaurant, 'user_name': 'dan', 'rating': 2, 'created_at': datetime(2020, 1, 1)})
+
+    since = {'updated_since': '2021-01-01T00:00:00Z'}
+    assert sorted(r['_id'] for r in export(client, '/api/export/restaurants', **since)) == [restaurant]
+    assert [r['user_name'] for r in export(client, '/api/export/reviews', **since)] == ['noa']
+    assert len(export(client, '/api/export/restaurants')) == 3
+    assert len(export(client, '/api/export/reviews')) == 2
+
+def test_updated_since_accepts_offsets(client, db, restaurant):
+    db.restaurants.update_one({'_id': ObjectId(restaurant)}, {'$set': {'updated_at': datetime(2024, 5, 1, 10, 0)}})
+    # 12:30+02:00 is 10:30 UTC, after the write
+    assert export(client, '/api/export/restaurants', updated_since='2024-05-01T12:30:00+02:00') == []
+    assert len(export(client, '/api/export/restaurants', updated_since='2024-05-01T11:30:00+02:00')) == 1
+
+def test_invalid_updated_since_is_rejected(client):
+    for url in ('/api/export/restaurants', '/api/export/reviews'):
+        response = client.get(url, query_string={'updated_since': 'yesterday'})
+        assert response.status_code == 400
+        assert 'ISO 8601' in response.get_json()['error']
+
+def test_deleted_restaurants_are_not_exported(client, restaurant):
+    kept = create(client, 'Kept')
+    client.delete(f'/api/restaurants/{restaurant}')
+    assert [r['_id'] for r in export(client, '/api/export/restaurants')] == [kept]
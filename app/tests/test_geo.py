@@ -0,0 +1,68 @@
+import random
+
+import mongomock
+import pytest
+from bson import ObjectId
+
+from services.geo import MAX_RADIUS_KM, near_pipeline, split_near_page, validate_coordinates
+from services.pagination import decode_cursor, encode_cursor
+
+def geo_near_output(docs, geo_near):
+    """
+    What $geoNear feeds the next stage: matches within [minDistance, maxDistance]
+    nearest first, equidistant documents in no particular order.
+    mongomock has no $geoNear, so the distances are precomputed.
+    """
+    rng = random.Random(7)
+    matches = [doc for doc in docs if geo_near.get('minDistance', 0) <= doc['distance_m'] <= geo_near['maxDistance']]
+    rng.shuffle(matches)
+    collection = mongomock.MongoClient().db.near
+    collection.insert_many(sorted(matches, key=lambda doc: doc['distance_m']))
+    return collection
+
+def fetch_page(docs, limit, cursor):
+    after = decode_cursor(cursor, 2) if cursor else None
+    pipeline = near_pipeline({}, 32.08, 34.78, 10, limit + 1, after)
+    collection = geo_near_output(docs, pipeline[0]['$geoNear'])
+    return split_near_page(list(collection.aggregate(pipeline[1:])), limit, after)
+
+def test_pipeline_keeps_index_order_and_stops_at_limit():
+    pipeline = near_pipeline({'deleted_at': None}, 32.08, 34.78, 500, 11)
+    assert list(pipeline[0]) == ['$geoNear']
+    assert pipeline[0]['$geoNear']['maxDistance'] == MAX_RADIUS_KM * 1000
+    assert pipeline[-1] == {'$limit': 11}
+    assert not any('$sort' in stage for stage in pipeline)
+
+def test_pages_cover_equidistant_restaurants_exactly_once():
+    # Groups of restaurants sharing an address, larger than a page
+    docs = [
+        {'_id': ObjectId(), 'distance_m': float(distance)}
+        for distance, count in ((0, 2), (150, 7), (150.5, 1), (900, 4))
+        for _ in range(count)
+    ]
+    seen, cursor = [], None
+    for _ in range(len(docs)):
+        page, cursor = fetch_page(docs, 3, cursor)
+        seen.extend(doc['_id'] for doc in page)
+        if cursor is None:
+            break
+
+    assert sorted(seen) == sorted(doc['_id'] for doc in docs)
+    distances = {doc['_id']: doc['distance_m'] for doc in docs}
+    assert [distances[_id] for _id in seen] == sorted(distances[_id] for _id in seen)
+
+def test_cursor_from_before_tie_tracking_still_decodes():
+    last_id = ObjectId()
+    after = decode_cursor(encode_cursor(150.0, last_id), 2)
+    match = near_pipeline({}, 32.08, 34.78, 10, 5, after)[1]['$match']
+    assert match['$or'][1] == {'distance_m': 150.0, '_id': {'$nin': [last_id]}}
+
+@pytest.mark.parametrize('latitude, longitude', [(91, 0), (0, -181), ('32', 34), (True, 34)])
+def test_invalid_coordinates_are_rejected(latitude, longitude):
+    with pytest.raises(ValueError):
+        validate_coordinates(latitude, longitude)
+
+def test_list_rejects_invalid_location(client):
+    assert client.get('/api/restaurants?lat=95&lng=34').status_code == 400
+    assert client.get('/api/restaurants?lat=32&lng=34&radius=-1').status_code == 400
+    assert client.get('/api/restaurants?lat=32&lng=34&sort=rating').status_code == 400
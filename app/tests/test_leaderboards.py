@@ -0,0 +1,102 @@
+from bson import ObjectId
+
+from services.leaderboards import MAX_CAS_ATTEMPTS, Leaderboards, weighted_rating
+
+def restaurant_doc(name, ratings, style='cafe'):
+    return {
+        '_id': ObjectId(),
+        'name': name,
+        'style': style,
+        'deleted_at': None,
+        'rating_sum': sum(ratings),
+        'total_reviews': len(ratings)
+    }
+
+def seed(db, leaderboards, *restaurants):
+    db.restaurants.insert_many(restaurants)
+    leaderboards.record_many(db, [restaurant['_id'] for restaurant in restaurants])
+
+def board_names(db):
+    return [entry['name'] for entry in db.leaderboards.find_one({'_id': 'cafe'})['entries']]
+
+def test_weighted_rating_pulls_few_reviews_toward_the_prior():
+    assert weighted_rating(5, 1, 3.5, 10) == round(40 / 11, 4)
+    assert weighted_rating(0, 0, 3.5, 10) == 3.5
+    assert weighted_rating(400, 100, 3.5, 10) > weighted_rating(10, 2, 3.5, 10)
+
+def test_endpoint_ranks_by_weighted_rating(client, restaurant):
+    steady = client.post('/api/restaurants', json={
+        'name': 'Steady', 'address': 'a', 'latitude': 32.0, 'longitude': 34.0, 'style': 'cafe'
+    }).get_json()['id']
+    client.post(f'/api/restaurants/{restaurant}/reviews', json={'user_name': 'noa', 'rating': 5})
+    for _ in range(20):
+        client.post(f'/api/restaurants/{steady}/reviews', json={'user_name': 'noa', 'rating': 5})
+
+    response = client.get('/api/leaderboards/cafe')
+    assert response.status_code == 200
+    assert [entry['name'] for entry in response.get_json()] == ['Steady', 'Test Cafe']
+    assert client.get('/api/leaderboards/cafe', headers={'If-None-Match': response.headers['ETag']}).status_code == 304
+    assert client.get('/api/leaderboards/sushi').status_code == 400
+
+def test_record_retries_when_the_board_moved_underneath(db, monkeypatch):
+    leaderboards = Leaderboards(size=3, prior_weight=0)
+    first = restaurant_doc('First', [4])
+    seed(db, leaderboards, first)
+
+    # A concurrent writer bumps the version between our read and our write, once
+    find_one = db.leaderboards.find_one
+    raced = []
+
+    def racing_find_one(*args, **kwargs):
+        board = find_one(*args, **kwargs)
+        if not raced:
+            raced.append(True)
+            db.leaderboards.update_one({'_id': 'cafe'}, {'$inc': {'version': 1}})
+        return board
+
+    monkeypatch.setattr(db.leaderboards, 'find_one', racing_find_one)
+    second = restaurant_doc('Second', [5])
+    db.restaurants.insert_one(second)
+    leaderboards.record(db, dict(second))
+
+    assert raced
+    assert board_names(db) == ['Second', 'First']
+
+def test_record_rebuilds_after_repeated_conflicts(db, monkeypatch):
+    leaderboards = Leaderboards(size=3, prior_weight=0)
+    seed(db, leaderboards, restaurant_doc('First', [4]))
+    rebuilds = []
+    rebuild = leaderboards.rebuild
+    monkeypatch.setattr(leaderboards, 'rebuild', lambda db, style: rebuilds.append(style) or rebuild(db, style))
+
+    # Every compare-and-set loses: the board's version always moved on
+    update_one = db.leaderboards.update_one
+    attempts = []
+    monkeypatch.setattr(db.leaderboards, 'update_one', lambda query, update: attempts.append(1) or update_one(dict(query, version=-1), update))
+    second = restaurant_doc('Second', [5])
+    db.restaurants.insert_one(second)
+    leaderboards.record(db, dict(second))
+
+    assert len(attempts) == MAX_CAS_ATTEMPTS
+    assert rebuilds == ['cafe']
+    assert board_names(db) == ['Second', 'First']
+
+def test_removal_from_a_full_board_reads_the_next_best(db):
+    leaderboards = Leaderboards(size=2, prior_weight=0)
+    best, second, third = restaurant_doc('Best', [5]), restaurant_doc('Second', [4]), restaurant_doc('Third', [3])
+    seed(db, leaderboards, best, second, third)
+    assert board_names(db) == ['Best', 'Second']
+
+    db.restaurants.update_one({'_id': best['_id']}, {'$set': {'deleted_at': 1}})
+    leaderboards.remove(db, 'cafe', best['_id'])
+    assert board_names(db) == ['Second', 'Third']
+
+def test_stale_score_is_not_recorded(db):
+    leaderboards = Leaderboards(size=3, prior_weight=0)
+    current = restaurant_doc('Current', [5, 5])
+    seed(db, leaderboards, current)
+
+    # Read before the second review landed; the writer of that review records the newer score
+    leaderboards.record(db, dict(current, rating_sum=1, total_reviews=1))
+    assert db.restaurants.find_one()['weighted_rating'] == 5.0
+    assert db.leaderboards.find_one()['entries'][0]['weighted_rating'] == 5.0
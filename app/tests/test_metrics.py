@@ -0,0 +1,47 @@
+import logging
+import os
+import subprocess
+import sys
+from types import SimpleNamespace
+
+from services.mongo_metrics import CommandMetricsListener, begin_async_request_stats, end_async_request_stats
+
+BACKEND = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'backend')
+
+def run_in_backend(code, env):
+    return subprocess.run([sys.executable, '-c', code], cwd=BACKEND, env=dict(os.environ, **env), capture_output=True, text=True)
+
+def test_missing_multiprocess_dir_falls_back_to_in_process_metrics(tmp_path):
+    # A migration or the seed job inheriting the server's setting, without gunicorn having created the directory
+    result = run_in_backend(
+        'import app, migrations.purge_deleted, migrations.rebuild_leaderboards\n'
+        'from services.metrics import multiprocess_dir\n'
+        'print(multiprocess_dir())',
+        {'PROMETHEUS_MULTIPROC_DIR': str(tmp_path / 'missing')}
+    )
+    assert result.returncode == 0, result.stderr
+    assert result.stdout.strip() == 'None'
+
+def test_existing_multiprocess_dir_shares_metrics(tmp_path):
+    result = run_in_backend(
+        'from app import create_app\n'
+        'print(create_app({"TESTING": True}).test_client().get("/metrics").status_code)',
+        {'PROMETHEUS_MULTIPROC_DIR': str(tmp_path)}
+    )
+    assert result.returncode == 0, result.stderr
+    assert result.stdout.strip() == '200'
+    assert os.listdir(tmp_path)
+
+def test_async_request_counts_its_mongo_commands():
+    listener = CommandMetricsListener()
+    token = begin_async_request_stats()
+    event = SimpleNamespace(connection_id=1, request_id=1, command_name='find', command={'find': 'restaurants'}, duration_micros=2500)
+    listener.started(event)
+    listener.succeeded(event)
+    assert end_async_request_stats(token) == (2.5, 1)
+
+def test_request_log_reports_mongo_time(client, restaurant, caplog):
+    with caplog.at_level(logging.INFO):
+        client.get(f'/api/restaurants/{restaurant}')
+    logged = [record for record in caplog.records if getattr(record, 'event', None) == 'http_request']
+    assert logged and all(hasattr(record, 'mongo_ms') and hasattr(record, 'mongo_commands') for record in logged)
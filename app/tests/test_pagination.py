@@ -0,0 +1,86 @@
+def create(client, name, style='cafe', latitude=32.08):
+    response = client.post('/api/restaurants', json={
+        'name': name,
+        'address': '1 Test St, Tel Aviv, Israel',
+        'latitude': latitude,
+        'longitude': 34.78,
+        'style': style
+    })
+    return response.get_json()['id']
+
+def all_pages(client, url, limit, **params):
+    items, cursor = [], None
+    for _ in range(100):
+        response = client.get(url, query_string=dict(params, limit=limit, **({'cursor': cursor} if cursor else {})))
+        assert response.status_code == 200
+        page = response.get_json()
+        assert len(page) <= limit
+        items.extend(page)
+        cursor = response.headers.get('X-Next-Cursor')
+        if not cursor:
+            return items
+    raise AssertionError('pagination did not terminate')
+
+def test_list_pages_cover_every_restaurant_once(client):
+    ids = [create(client, f'Cafe {n}') for n in range(7)]
+    pages = all_pages(client, '/api/restaurants', 3)
+    assert [restaurant['_id'] for restaurant in pages] == sorted(ids)
+
+def test_last_page_has_no_next_cursor(client):
+    create(client, 'Only Cafe')
+    response = client.get('/api/restaurants', query_string={'limit': 5})
+    assert len(response.get_json()) == 1
+    assert 'X-Next-Cursor' not in response.headers
+
+def test_rating_order_pages_by_rating_then_id(client):
+    ids = [create(client, f'Cafe {n}') for n in range(5)]
+    for restaurant_id, rating in zip(ids, (3, 5, 3, 1, 5)):
+        client.post(f'/api/restaurants/{restaurant_id}/reviews', json={'user_name': 'noa', 'rating': rating})
+
+    pages = [(r['average_rating'], r['_id']) for r in all_pages(client, '/api/restaurants', 2, sort='rating')]
+    assert pages == sorted(((rating, _id) for _id, rating in zip(ids, (3.0, 5.0, 3.0, 1.0, 5.0))), key=lambda pair: (-pair[0], pair[1]))
+
+def test_invalid_limit_and_cursor_are_rejected(client):
+    assert client.get('/api/restaurants?limit=0').status_code == 400
+    assert client.get('/api/restaurants?limit=abc').status_code == 400
+    assert client.get('/api/restaurants?cursor=not-a-cursor').status_code == 400
+
+def test_reviews_page_newest_first(client, restaurant):
+    for rating in (1, 2, 3, 4, 5):
+        client.post(f'/api/restaurants/{restaurant}/reviews', json={'user_name': 'noa', 'rating': rating})
+    reviews = all_pages(client, f'/api/restaurants/{restaurant}/reviews', 2)
+    assert len(reviews) == 5
+    assert len({review['_id'] for review in reviews}) == 5
+    created = [review['created_at'] for review in reviews]
+    assert created == sorted(created, reverse=True)
+
+def test_styles_summarise_live_restaurants(client):
+    create(client, 'Cafe A', latitude=32.0)
+    create(client, 'Cafe B', latitude=32.2)
+    deleted = create(client, 'Pizza C', style='pizza')
+    create(client, 'Pizza D', style='pizza')
+    client.delete(f'/api/restaurants/{deleted}')
+
+    styles = client.get('/api/restaurants/styles').get_json()
+    assert [(style['style'], style['count']) for style in styles] == [('cafe', 2), ('pizza', 1)]
+    assert round(styles[0]['latitude'], 6) == 32.1
+
+def test_styles_revalidate_until_a_write(client):
+    create(client, 'Cafe A')
+    etag = client.get('/api/restaurants/styles').headers['ETag']
+    assert client.get('/api/restaurants/styles', headers={'If-None-Match': etag}).status_code == 304
+
+    create(client, 'Cafe B')
+    response = client.get('/api/restaurants/styles', headers={'If-None-Match': etag})
+    assert response.status_code == 200
+    assert response.get_json()[0]['count'] == 2
+
+def test_styles_are_not_invalidated_by_reviews(client, restaurant):
+    etag = client.get('/api/restaurants/styles').headers['ETag']
+    client.post(f'/api/restaurants/{restaurant}/reviews', json={'user_name': 'noa', 'rating': 5})
+    assert client.get('/api/restaurants/styles', headers={'If-None-Match': etag}).status_code == 304
+
+    client.delete(f'/api/restaurants/{restaurant}')
+    response = client.get('/api/restaurants/styles', headers={'If-None-Match': etag})
+    assert response.status_code == 200
+    assert response.get_json() == []
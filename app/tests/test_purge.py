@@ -0,0 +1,67 @@
+import threading
+from datetime import datetime, timedelta
+
+from bson import ObjectId
+
+from services.purge import Purger
+
+def add_reviews(client, restaurant_id, count):
+    for _ in range(count):
+        client.post(f'/api/restaurants/{restaurant_id}/reviews', json={'user_name': 'noa', 'rating': 4})
+
+def test_deleted_restaurant_disappears_from_reads(client, db, restaurant):
+    add_reviews(client, restaurant, 2)
+    response = client.delete(f'/api/restaurants/{restaurant}')
+    assert response.status_code == 200
+
+    assert client.get('/api/restaurants').get_json() == []
+    assert client.get(f'/api/restaurants/{restaurant}').status_code == 404
+    assert client.get(f'/api/restaurants/{restaurant}/reviews').status_code == 404
+    assert client.delete(f'/api/restaurants/{restaurant}').status_code == 404
+
+    # Tombstoned, not removed: the purge worker does that
+    assert db.restaurants.count_documents({}) == 1
+    assert db.reviews.count_documents({}) == 2
+
+def test_drain_removes_reviews_in_batches_then_the_restaurant(client, db, restaurant):
+    add_reviews(client, restaurant, 5)
+    kept = client.post('/api/restaurants', json={
+        'name': 'Kept', 'address': 'a', 'latitude': 32.0, 'longitude': 34.0, 'style': 'pizza'
+    }).get_json()['id']
+    add_reviews(client, kept, 1)
+    client.delete(f'/api/restaurants/{restaurant}')
+
+    purger = Purger(batch_size=2, pause=0)
+    assert purger.drain(db) == (1, 5)
+    assert db.restaurants.find_one({'_id': ObjectId(restaurant)}) is None
+    assert [review['restaurant_id'] for review in db.reviews.find()] == [kept]
+    assert purger.backlog(db) == 0
+
+def test_live_lease_is_not_claimed_by_another_worker(client, db, restaurant):
+    client.delete(f'/api/restaurants/{restaurant}')
+    first = Purger(lease=60, owner='a')
+    second = Purger(lease=60, owner='b')
+
+    assert first.claim(db)['_id'] == ObjectId(restaurant)
+    assert second.claim(db) is None
+
+def test_expired_lease_is_taken_over(client, db, restaurant):
+    add_reviews(client, restaurant, 1)
+    client.delete(f'/api/restaurants/{restaurant}')
+    Purger(owner='crashed').claim(db)
+    db.restaurants.update_one({'_id': ObjectId(restaurant)}, {'$set': {'purge_lease_until': datetime.utcnow() - timedelta(seconds=1)}})
+
+    assert Purger(owner='b', pause=0).drain(db) == (1, 1)
+    assert db.restaurants.count_documents({}) == 0
+
+def test_purge_stops_when_its_lease_is_lost(client, db, restaurant):
+    add_reviews(client, restaurant, 4)
+    client.delete(f'/api/restaurants/{restaurant}')
+    purger = Purger(batch_size=2, pause=0, owner='a')
+    claimed = purger.claim(db)
+    db.restaurants.update_one({'_id': claimed['_id']}, {'$set': {'purge_owner': 'b'}})
+
+    assert purger.purge(db, claimed['_id'], threading.Event()) is None
+    # The restaurant stays for its new owner to finish
+    assert db.restaurants.count_documents({}) == 1
+    assert db.reviews.count_documents({}) == 2
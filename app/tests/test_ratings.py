@@ -0,0 +1,137 @@
+import sys
+
+import mongomock
+import pytest
+from bson import ObjectId
+from pymongo.errors import OperationFailure
+
+import seed_data
+from services.ratings import (
+    apply_rating_batches, apply_ratings, average_rating, rating_aggregate, rating_increments, rebuild_rating_aggregates
+)
+
+def aggregate_fields(doc):
+    return {field: doc[field] for field in ('rating_sum', 'total_reviews', 'rating_counts', 'average_rating')}
+
+def test_rating_increments_fold_sum_count_and_histogram():
+    assert rating_increments([5, 4, 5]) == {
+        'rating_sum': 14,
+        'total_reviews': 3,
+        'rating_counts.5': 2,
+        'rating_counts.4': 1
+    }
+
+def test_rating_aggregate_of_no_reviews_is_empty():
+    assert rating_aggregate([]) == {
+        'rating_sum': 0,
+        'total_reviews': 0,
+        'rating_counts': {'1': 0, '2': 0, '3': 0, '4': 0, '5': 0},
+        'average_rating': 0.0
+    }
+
+def test_review_updates_aggregate(client, db, restaurant):
+    for rating in (5, 4):
+        response = client.post(f'/api/restaurants/{restaurant}/reviews', json={'user_name': 'noa', 'rating': rating})
+        assert response.status_code == 201
+
+    doc = db.restaurants.find_one({'_id': ObjectId(restaurant)})
+    assert aggregate_fields(doc) == rating_aggregate([5, 4])
+    assert doc['reviews_version'] == 2
+
+def test_review_for_missing_restaurant_is_not_kept(client, db):
+    response = client.post(f'/api/restaurants/{ObjectId()}/reviews', json={'user_name': 'noa', 'rating': 5})
+    assert response.status_code == 404
+    assert db.reviews.count_documents({}) == 0
+
+def test_rating_batches_update_each_restaurant_once(client, db, restaurant):
+    updated = apply_rating_batches(db, {restaurant: [1, 3, 5]})
+    assert updated == {restaurant}
+    assert aggregate_fields(db.restaurants.find_one({'_id': ObjectId(restaurant)})) == rating_aggregate([1, 3, 5])
+
+def test_rebuild_repairs_drifted_aggregates(client, db, restaurant):
+    client.post(f'/api/restaurants/{restaurant}/reviews', json={'user_name': 'noa', 'rating': 2})
+    db.restaurants.update_one({'_id': ObjectId(restaurant)}, {'$set': {'average_rating': 4.5, 'total_reviews': 28}})
+
+    stats = rebuild_rating_aggregates(db)
+    assert stats == {'scanned': 1, 'drifted': 1, 'updated': 1}
+    assert aggregate_fields(db.restaurants.find_one({'_id': ObjectId(restaurant)})) == rating_aggregate([2])
+
+def test_seeded_aggregates_match_seeded_reviews(db):
+    assert seed_data.seed_sample(db)
+    assert rebuild_rating_aggregates(db, dry_run=True)['drifted'] == 0
+
+def test_review_on_seeded_restaurant_keeps_average_consistent(client, db):
+    seed_data.seed_sample(db)
+    tonys = db.restaurants.find_one({'name': "Tony's Pizza"})
+    ratings = [review['rating'] for review in db.reviews.find({'restaurant_id': str(tonys['_id'])})]
+
+    response = client.post(f"/api/restaurants/{tonys['_id']}/reviews", json={'user_name': 'noa', 'rating': 4})
+    assert response.status_code == 201
+    assert aggregate_fields(db.restaurants.find_one({'_id': tonys['_id']})) == rating_aggregate(ratings + [4])
+
+def test_reseed_reconciles_aggregates_of_existing_restaurants(db):
+    seed_data.seed_sample(db)
+    # As left by the old seeder: a display average without the sum and histogram
+    db.restaurants.update_many({}, {'$set': {'average_rating': 4.5, 'total_reviews': 28}, '$unset': {'rating_sum': '', 'rating_counts': ''}})
+
+    assert seed_data.seed_sample(db)
+    assert rebuild_rating_aggregates(db, dry_run=True)['drifted'] == 0
+
+def test_reseed_folds_reviews_added_to_the_sample(db, monkeypatch):
+    seed_data.seed_sample(db)
+    extra = {'restaurant': 1, 'user_name': 'Noa Katz', 'rating': 3, 'comment': ''}
+    monkeypatch.setattr(seed_data, 'israeli_reviews', seed_data.israeli_reviews + [extra])
+
+    assert seed_data.seed_sample(db)
+    sababa = db.restaurants.find_one({'name': 'Pizza Sababa'})
+    assert sababa['total_reviews'] == 1
+    assert sababa['average_rating'] == 3.0
+
+def test_unchanged_reseed_writes_nothing(db):
+    seed_data.seed_sample(db)
+    assert not seed_data.seed_sample(db)
+
+def test_failed_seed_fails_the_run(db, monkeypatch, capsys):
+    def failing_sync(*args):
+        raise OperationFailure('not authorized on restaurant_db')
+
+    monkeypatch.setattr(seed_data, 'sync', failing_sync)
+    monkeypatch.setattr(seed_data, 'wait_for_mongo', lambda: db.client)
+    monkeypatch.setattr(db.client, 'get_default_database', lambda: db)
+    monkeypatch.setattr(sys, 'argv', ['seed_data.py'])
+    with pytest.raises(OperationFailure):
+        seed_data.main()
+    assert 'already up to date' not in capsys.readouterr().out
+
+def test_counters_and_average_change_in_one_write(client, db, restaurant, monkeypatch):
+    writes = []
+    for name in ('update_one', 'find_one_and_update', 'bulk_write'):
+        method = getattr(db.restaurants, name)
+        monkeypatch.setattr(db.restaurants, name, lambda *args, _method=method, _name=name, **kwargs: writes.append(_name) or _method(*args, **kwargs))
+
+    apply_ratings(db, restaurant, [5])
+    apply_rating_batches(db, {restaurant: [4, 4]})
+    assert writes == ['find_one_and_update', 'bulk_write']
+    assert db.restaurants.find_one({'_id': ObjectId(restaurant)})['average_rating'] == 4.3
+
+def test_average_rounds_half_up_like_the_server():
+    assert average_rating(17, 4) == 4.3
+    assert average_rating(9, 2) == 4.5
+    assert rating_aggregate([4, 4, 5, 4])['average_rating'] == 4.3
+
+def generate_into(db, monkeypatch, seed, first_review=0):
+    monkeypatch.setattr(seed_data, '_worker_db', db)
+    return seed_data.generate_chunk(seed, 0, 0, first_review, [3, 0, 2], batch_size=2)
+
+def test_generated_reviews_have_ids_derived_from_the_seed(db, monkeypatch):
+    other = mongomock.MongoClient().restaurant_db
+    generate_into(db, monkeypatch, seed=7)
+    generate_into(other, monkeypatch, seed=7)
+    assert [review['_id'] for review in db.reviews.find()] == [review['_id'] for review in other.reviews.find()]
+    assert [review['_id'] for review in db.reviews.find()] == [seed_data.generated_object_id(7, n) for n in range(5)]
+
+def test_append_with_a_reused_seed_skips_existing_documents(db, monkeypatch):
+    assert generate_into(db, monkeypatch, seed=7)[:3] == (3, 5, 0)
+    assert generate_into(db, monkeypatch, seed=7)[:3] == (0, 0, 8)
+    assert generate_into(db, monkeypatch, seed=8)[:3] == (3, 5, 0)
+    assert db.restaurants.count_documents({}) == 6
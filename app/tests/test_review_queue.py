@@ -0,0 +1,56 @@
+import logging
+
+import pytest
+
+from services.review_queue import ReviewQueue
+
+@pytest.fixture
+def app_config():
+    return {'TESTING': True, 'REVIEW_WRITE_BEHIND': True, 'REVIEW_QUEUE_SIZE': 2, 'REVIEW_RETRY_AFTER': 7}
+
+def post_review(client, restaurant_id, rating=4):
+    return client.post(f'/api/restaurants/{restaurant_id}/reviews', json={'user_name': 'noa', 'rating': rating})
+
+def flush(app, db, logger=None):
+    return app.review_queue.flush(db, app.review_queue.take(0, 0), logger)
+
+def test_review_is_accepted_then_written_at_flush(app, client, db, restaurant):
+    response = post_review(client, restaurant, 5)
+    assert response.status_code == 202
+    assert db.reviews.count_documents({}) == 0
+
+    assert flush(app, db) == {restaurant}
+    assert str(db.reviews.find_one()['_id']) == response.get_json()['id']
+    assert client.get(f'/api/restaurants/{restaurant}').get_json()['average_rating'] == 5.0
+
+def test_full_queue_answers_503_with_its_own_retry_after(client, restaurant):
+    assert [post_review(client, restaurant).status_code for _ in range(2)] == [202, 202]
+    response = post_review(client, restaurant)
+    assert response.status_code == 503
+    assert response.headers['Retry-After'] == '7'
+
+def test_missing_or_deleted_restaurant_is_refused_before_queueing(app, client, restaurant):
+    assert post_review(client, '0' * 24).status_code == 404
+    assert client.delete(f'/api/restaurants/{restaurant}').status_code == 200
+    assert post_review(client, restaurant).status_code == 404
+    assert len(app.review_queue) == 0
+
+def test_reviews_of_a_restaurant_deleted_after_accepting_are_discarded_and_logged(app, client, db, restaurant, caplog):
+    assert post_review(client, restaurant).status_code == 202
+    client.delete(f'/api/restaurants/{restaurant}')
+
+    with caplog.at_level(logging.WARNING):
+        assert flush(app, db, logging.getLogger('review_flush')) == set()
+    assert db.reviews.count_documents({}) == 0
+    assert 'Discarded 1 queued reviews' in caplog.text
+
+def test_retried_batch_does_not_count_reviews_twice(db, restaurant, client):
+    review_queue = ReviewQueue()
+    review = {'restaurant_id': restaurant, 'user_name': 'noa', 'rating': 3, 'comment': ''}
+    assert review_queue.submit(review)
+    batch = review_queue.take(0, 0)
+
+    review_queue.flush(db, batch)
+    assert review_queue.flush(db, batch) == set()
+    assert db.reviews.count_documents({}) == 1
+    assert db.restaurants.find_one()['total_reviews'] == 1
@@ -0,0 +1,112 @@
+import mongomock
+import pytest
+from bson import ObjectId
+
+from services.pagination import decode_cursor
+from services.search import MAX_QUERY_LENGTH, search_pipeline
+from test_pagination import all_pages, create
+
+def text_score(doc, text):
+    """Stand-in for textScore: how many times the query's words occur in name and description"""
+    words = f"{doc.get('name', '')} {doc.get('description', '')}".lower().split()
+    return float(sum(words.count(term) for term in text.lower().split()))
+
+def text_search(collection, pipeline):
+    """
+    Run a search_pipeline on mongomock, which has no $text: the matches and
+    their scores are computed here, then the stages after $addFields run as is.
+    """
+    match = dict(pipeline[0]['$match'])
+    text = match.pop('$text')['$search']
+    scored = mongomock.MongoClient().db.text_matches
+    for doc in collection.find(match):
+        score = text_score(doc, text)
+        if score:
+            scored.insert_one(dict(doc, score=score))
+    return scored.aggregate(pipeline[2:])
+
+@pytest.fixture
+def text_index(db, monkeypatch):
+    """Answer the search endpoint's $text aggregations through text_search"""
+    aggregate = db.restaurants.aggregate
+
+    def aggregate_with_text(pipeline, *args, **kwargs):
+        if '$text' in pipeline[0].get('$match', {}):
+            return text_search(db.restaurants, pipeline)
+        return aggregate(pipeline, *args, **kwargs)
+
+    monkeypatch.setattr(db.restaurants, 'aggregate', aggregate_with_text)
+
+def test_pipeline_sorts_by_score_then_id():
+    pipeline = search_pipeline('pizza', {'deleted_at': None}, 11)
+    assert pipeline[0]['$match'] == {'deleted_at': None, '$text': {'$search': 'pizza'}}
+    assert pipeline[-3:-1] == [{'$sort': {'score': -1, '_id': 1}}, {'$limit': 11}]
+
+def test_pages_cover_equal_scores_exactly_once():
+    collection = mongomock.MongoClient().db.restaurants
+    # Groups of equal scores larger than a page
+    collection.insert_many(
+        [{'_id': ObjectId(), 'name': 'pizza pizza', 'deleted_at': None} for _ in range(3)]
+        + [{'_id': ObjectId(), 'name': 'pizza', 'deleted_at': None} for _ in range(5)]
+        + [{'_id': ObjectId(), 'name': 'sushi', 'deleted_at': None}]
+    )
+    seen, after = [], None
+    for _ in range(10):
+        page = list(text_search(collection, search_pipeline('pizza', {'deleted_at': None}, 2, after)))
+        seen.extend((doc['score'], doc['_id']) for doc in page)
+        if len(page) < 2:
+            break
+        after = (page[-1]['score'], page[-1]['_id'])
+
+    assert len(seen) == 8
+    assert seen == sorted(seen, key=lambda pair: (-pair[0], pair[1]))
+
+def test_search_pages_through_the_endpoint(client, text_index):
+    best = create(client, 'Pizza Pizza')
+    ids = [create(client, f'Pizza {n}') for n in range(4)]
+    create(client, 'Sushi Bar')
+    deleted = create(client, 'Pizza Gone')
+    client.delete(f'/api/restaurants/{deleted}')
+
+    results = all_pages(client, '/api/restaurants/search', 2, q='pizza')
+    assert [restaurant['_id'] for restaurant in results] == [best] + sorted(ids)
+    assert [restaurant['score'] for restaurant in results] == [2.0] + [1.0] * 4
+
+def test_next_cursor_resumes_after_score_and_id(client, text_index):
+    ids = sorted(create(client, f'Pizza {n}') for n in range(3))
+    response = client.get('/api/restaurants/search', query_string={'q': 'pizza', 'limit': 2})
+    assert decode_cursor(response.headers['X-Next-Cursor'], 2) == [1.0, ObjectId(ids[1])]
+
+@pytest.mark.parametrize('params', [{}, {'q': '   '}, {'q': 'x' * (MAX_QUERY_LENGTH + 1)}, {'q': 'pizza', 'limit': 0},
+                                    {'q': 'pizza', 'cursor': 'not-a-cursor'}, {'q': 'pizza', 'style': 'sushi'}])
+def test_invalid_search_is_rejected(client, params):
+    assert client.get('/api/restaurants/search', query_string=params).status_code == 400
+
+def test_equivalent_queries_share_a_cache_entry(client, db, text_index, monkeypatch):
+    create(client, 'Pizza Place')
+    response = client.get('/api/restaurants/search', query_string={'q': 'Pizza  place'})
+    etag = response.headers['ETag']
+
+    # Whitespace and case do not make a new entry; the cached answer needs no search
+    searches = []
+    aggregate = db.restaurants.aggregate
+    monkeypatch.setattr(db.restaurants, 'aggregate', lambda pipeline, *args, **kwargs: searches.append(1) or aggregate(pipeline, *args, **kwargs))
+    same = client.get('/api/restaurants/search', query_string={'q': ' pizza PLACE '})
+    assert same.headers['ETag'] == etag
+    assert same.get_json() == response.get_json()
+    assert client.get('/api/restaurants/search', query_string={'q': 'pizza place'}, headers={'If-None-Match': etag}).status_code == 304
+    assert searches == []
+
+    # Another page size or query is another entry
+    assert client.get('/api/restaurants/search', query_string={'q': 'pizza place', 'limit': 5}).headers['ETag'] != etag
+    assert client.get('/api/restaurants/search', query_string={'q': 'pizza'}).headers['ETag'] != etag
+    assert len(searches) == 2
+
+def test_search_etag_moves_on_restaurant_writes(client, text_index):
+    create(client, 'Pizza Place')
+    etag = client.get('/api/restaurants/search', query_string={'q': 'pizza'}).headers['ETag']
+    create(client, 'Pizza Corner')
+
+    response = client.get('/api/restaurants/search', query_string={'q': 'pizza'}, headers={'If-None-Match': etag})
+    assert response.status_code == 200
+    assert len(response.get_json()) == 2
@@ -0,0 +1,36 @@
+import os
+
+import pytest
+
+from services.static_assets import IMMUTABLE, SpaBuild
+
+@pytest.fixture
+def build(tmp_path):
+    (tmp_path / 'static' / 'js').mkdir(parents=True)
+    (tmp_path / 'index.html').write_text('<html></html>')
+    (tmp_path / 'manifest.json').write_text('{}')
+    (tmp_path / 'static' / 'js' / 'main.3f2a1b9c.js').write_text('console.log(1)')
+    (tmp_path / 'static' / 'js' / 'main.3f2a1b9c.js.map').write_text('{}')
+    return tmp_path
+
+def test_build_files_are_served_from_memory_or_known_disk_paths(build):
+    spa = SpaBuild(str(build), '')
+    assert spa.assets['/js/main.3f2a1b9c.js'].cache_control == IMMUTABLE
+    assert '/manifest.json' in spa.assets
+    assert spa.static_file('/js/main.3f2a1b9c.js.map') == 'js/main.3f2a1b9c.js.map'
+
+def test_spa_navigation_does_not_touch_the_disk(build, monkeypatch):
+    spa = SpaBuild(str(build), '')
+
+    def no_stat(*args, **kwargs):
+        raise AssertionError('looked up on disk')
+
+    monkeypatch.setattr(os, 'stat', no_stat)
+    assert spa.static_file('/restaurants/42') is None
+    assert spa.static_file('/js/missing.js.map') is None
+
+def test_static_url_path_prefixes_static_files(build):
+    spa = SpaBuild(str(build), '/static')
+    assert '/static/js/main.3f2a1b9c.js' in spa.assets
+    assert spa.static_file('/static/js/main.3f2a1b9c.js.map') == 'js/main.3f2a1b9c.js.map'
+    assert spa.static_file('/js/main.3f2a1b9c.js.map') is None